@@ -0,0 +1,508 @@
+"""
+AI factions.
+
+Every non-player Faction gets an AIController (stored as
+Faction.ai_controller, so it is saved with the game) and the AIScheduler
+drives them from the main loop. AI factions have no units; they act on the
+territory map directly:
+
+    explore   learn one more ring of regions around what the faction knows
+    plan      choose the known region to expand into next (by value and by
+              walking distance over land from the territory)
+    expand    claim AI_TILES_PER_DAY unowned tiles a day along the frontier,
+              inside the target region or towards it
+    conquer   take AI_CONQUER_TILES_PER_DAY tiles a day from the weakest
+              neighbouring faction the faction outsizes by
+              AI_CONQUER_STRENGTH_RATIO (the player only with AI_CONQUER_PLAYER)
+
+Decisions are tasks due at a simulation tick. Due tasks wait in a ready queue
+ordered by due tick minus urgency (AI_URGENCY_TICKS per level), so urgent
+work goes first but nothing starves, and each frame runs them only until
+AI_FRAME_BUDGET_MS is spent. The rest carries over to the next frame, so the
+frame time does not grow with the number of factions. A plan search
+that does not finish within AI_PLAN_SLICE_STEPS (candidate regions far from
+the territory) is finished in a process pool and applied on the frame its
+result arrives; with a single CPU it continues in slices on later frames
+instead.
+"""
+import heapq
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+import config as C
+import cache_manager
+import grids
+from territory import NO_OWNER
+
+# Task kinds and their urgency (higher runs first when several are due)
+EXPLORE = "explore"
+PLAN = "plan"
+EXPAND = "expand"
+CONQUER = "conquer"
+URGENCY = {PLAN: 4, EXPAND: 3, CONQUER: 2, EXPLORE: 1}
+
+
+class AIController:
+    """
+    Decision state of one AI faction.
+
+    Attributes:
+        faction_id: Faction this controller plays
+        known_regions: Region ids the faction has explored
+        target_region: Region being expanded into (None = needs a plan)
+        planning: True while a plan is queued or running on the pool
+    """
+
+    def __init__(self, faction_id: int):
+        self.faction_id = faction_id
+        self.known_regions: Set[int] = set()
+        self.target_region: Optional[int] = None
+        self.planning = False
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # A plan in flight when the game was saved is not resumed
+        self.planning = False
+
+    def __repr__(self):
+        return f"AIController({self.faction_id}, known={len(self.known_regions)}, target={self.target_region})"
+
+
+class ExpansionSearch:
+    """
+    Choice of the candidate region with the best value per step of walking
+    distance from a faction's territory.
+
+    The distance is a breadth-first search over passable tiles, one 4-way
+    dilation of the whole front per step; it ends once every candidate
+    region has been reached or nothing more can be. The search can be run
+    in slices (advance) across frames, or whole in a pool worker
+    (plan_expansion), so it only holds arrays.
+
+    Args:
+        own: (H, W) bool, tiles of the faction
+        passable: (H, W) bool, tiles that can be walked (land)
+        region_grid: (H, W) region ids (-1 = none)
+        values: Value per region id
+        candidates: Bool per region id, regions that may be chosen
+    """
+
+    def __init__(self, own: np.ndarray, passable: np.ndarray, region_grid: np.ndarray,
+                 values: np.ndarray, candidates: np.ndarray):
+        self.passable = passable
+        self.region_grid = region_grid
+        self.values = values
+        self.candidates = candidates
+        self.dist = np.full(len(values), np.inf)
+        self.seen = own.copy()
+        self.front = own.copy()
+        self.remaining = int(candidates.sum())
+        self.step = 0
+
+    @property
+    def done(self) -> bool:
+        return not self.remaining or not self.front.any()
+
+    def advance(self, max_steps: Optional[int] = None) -> bool:
+        """
+        Run up to max_steps steps (None = to the end).
+
+        Returns:
+            True if the search is complete
+        """
+        end = None if max_steps is None else self.step + max_steps
+        while not self.done and (end is None or self.step < end):
+            rids = self.region_grid[self.front]
+            rids = np.unique(rids[rids >= 0])
+            new = rids[np.isinf(self.dist[rids])]
+            self.dist[new] = self.step
+            self.remaining -= int(self.candidates[new].sum())
+
+            front = self.front
+            grown = np.zeros_like(front)
+            grown[:, 1:] |= front[:, :-1]
+            grown[:, :-1] |= front[:, 1:]
+            grown[1:, :] |= front[:-1, :]
+            grown[:-1, :] |= front[1:, :]
+            self.front = grown & self.passable & ~self.seen
+            self.seen |= self.front
+            self.step += 1
+        return self.done
+
+    def best(self) -> int:
+        """Best reached candidate region, or -1 if none was reached."""
+        if not len(self.values):
+            return -1
+        score = np.where(self.candidates & np.isfinite(self.dist), self.values / (1.0 + self.dist), -np.inf)
+        best = int(np.argmax(score))
+        return best if np.isfinite(score[best]) else -1
+
+
+def finish_search(search: ExpansionSearch) -> int:
+    """Run a search to the end and return its choice (the pool worker entry point)."""
+    search.advance()
+    return search.best()
+
+
+# (biome_grid, land mask) of the last world seen
+_land_cache = (None, None)
+
+
+def _land(state) -> np.ndarray:
+    """(H, W) bool, True on land tiles (cached per world)."""
+    global _land_cache
+    if _land_cache[0] is not state.biome_grid:
+        _land_cache = (state.biome_grid, ~grids.water_mask(state.biome_grid))
+    return _land_cache[1]
+
+
+def _candidate_regions(state, controller) -> np.ndarray:
+    """Known regions with unowned land that no faction controls (bool per region id)."""
+    index = state.region_index
+    free = (state.territory.owner == NO_OWNER) & _land(state)
+    free_counts = np.bincount(state.region_grid[free & (state.region_grid >= 0)], minlength=index.count)
+    candidates = np.zeros(index.count, dtype=bool)
+    known = [rid for rid in controller.known_regions if rid < index.count]
+    candidates[known] = True
+    candidates &= free_counts[:index.count] > 0
+    for faction in state.factions:
+        controlled = [rid for rid in faction.controlled_regions if rid < index.count]
+        candidates[controlled] = False
+    # Leave the regions the player is conquering to the player
+    conquering = [rid for rid in state.territory_expansion_regions if rid < index.count]
+    candidates[conquering] = False
+    return candidates
+
+
+def _plan_args(state, controller) -> Tuple[tuple, int]:
+    """Arguments of ExpansionSearch for a faction, and the number of candidate regions."""
+    index = state.region_index
+    candidates = _candidate_regions(state, controller)
+    # Value: land to claim plus what its resource nodes produce
+    yields = state.territory.yields.sum(axis=0)
+    valid = state.region_grid >= 0
+    resources = np.bincount(state.region_grid[valid], weights=yields[valid], minlength=index.count)
+    values = index.land_sizes[:index.count] + resources[:index.count] * C.AI_TILES_PER_DAY
+    own = np.array(state.territory.mask(controller.faction_id))
+    args = (own, _land(state), state.region_grid, values.astype(np.float64), candidates)
+    return args, int(candidates.sum())
+
+
+def _apply_plan(state, controller, region_id: int):
+    controller.planning = False
+    if region_id >= 0 and _candidate_regions(state, controller)[region_id]:
+        controller.target_region = region_id
+
+
+def _explore(state, controller):
+    """Learn the regions of the territory and one more ring of neighbours."""
+    info = state.region_info or []
+    known = controller.known_regions
+    if not known:
+        rids = np.unique(state.region_grid[state.territory.mask(controller.faction_id)])
+        known.update(int(rid) for rid in rids if rid >= 0)
+    ring = {n for rid in known if rid < len(info) for n in info[rid].get("neighbors", ())}
+    known.update(ring)
+
+
+def _expand(state, controller) -> List[Tuple[int, int]]:
+    """
+    Claim up to AI_TILES_PER_DAY unowned land tiles next to the territory:
+    inside the target region when it touches the frontier, otherwise the
+    frontier tiles closest to the target's seed.
+
+    Returns:
+        Claimed tiles
+    """
+    target = controller.target_region
+    territory = state.territory
+    fid = controller.faction_id
+    land = _land(state)
+    bbox = territory.bbox(fid)
+    if bbox is None:
+        controller.target_region = None
+        return []
+
+    # Only the territory's bounding box and the ring around it can hold frontier tiles
+    height, width = territory.owner.shape
+    x0, y0 = max(0, bbox[0] - 1), max(0, bbox[1] - 1)
+    x1, y1 = min(width, bbox[2] + 2), min(height, bbox[3] + 2)
+    win = (slice(y0, y1), slice(x0, x1))
+    free = territory.frontier_mask(fid, (x0, y0, x1, y1)) & (territory.owner[win] == NO_OWNER) & land[win]
+    in_target = free & (state.region_grid[win] == target)
+    ys, xs = np.nonzero(in_target if in_target.any() else free)
+    if xs.size == 0:
+        # Boxed in: plan again
+        controller.target_region = None
+        return []
+    xs += x0
+    ys += y0
+
+    sx, sy = state.region_seeds[target]
+    order = (xs - sx) ** 2 + (ys - sy) ** 2
+    k = min(C.AI_TILES_PER_DAY, xs.size)
+    pick = np.argpartition(order, k - 1)[:k]
+    tiles = list(zip(xs[pick].tolist(), ys[pick].tolist()))
+    territory.claim_tiles(fid, tiles)
+
+    # Done with the region once none of its land is left unowned
+    rx0, ry0, rx1, ry1 = state.region_index.bboxes[target]
+    rwin = (slice(ry0, ry1 + 1), slice(rx0, rx1 + 1))
+    remaining = (state.region_grid[rwin] == target) & (territory.owner[rwin] == NO_OWNER) & land[rwin]
+    if not remaining.any():
+        state.factions[fid].add_region(target)
+        controller.target_region = None
+    return tiles
+
+
+def _update_control(state, region_ids):
+    """
+    Keep controlled_regions in step with the land after tiles changed owner:
+    a faction loses a region when it has no tile left there and gains it
+    when it owns all of its land.
+    """
+    territory = state.territory
+    land = _land(state)
+    for rid in region_ids:
+        rx0, ry0, rx1, ry1 = state.region_index.bboxes[rid]
+        rwin = (slice(ry0, ry1 + 1), slice(rx0, rx1 + 1))
+        region_land = (state.region_grid[rwin] == rid) & land[rwin]
+        owners = territory.owner[rwin][region_land]
+        for faction in state.factions:
+            if faction.owns_region(rid) and not (owners == faction.faction_id).any():
+                faction.remove_region(rid)
+        if owners.size and owners[0] != NO_OWNER and (owners == owners[0]).all():
+            state.factions[int(owners[0])].add_region(rid)
+
+
+def _conquer(state, controller) -> List[Tuple[int, int]]:
+    """
+    Take up to AI_CONQUER_TILES_PER_DAY tiles from the weakest neighbouring
+    faction whose territory the faction outsizes by AI_CONQUER_STRENGTH_RATIO:
+    its tiles along the common border closest to the centre of the
+    faction's territory.
+
+    Returns:
+        Claimed tiles
+    """
+    territory = state.territory
+    fid = controller.faction_id
+    bbox = territory.bbox(fid)
+    if bbox is None:
+        return []
+
+    height, width = territory.owner.shape
+    x0, y0 = max(0, bbox[0] - 1), max(0, bbox[1] - 1)
+    x1, y1 = min(width, bbox[2] + 2), min(height, bbox[3] + 2)
+    win = (slice(y0, y1), slice(x0, x1))
+    owners = territory.owner[win]
+    border = territory.frontier_mask(fid, (x0, y0, x1, y1)) & (owners != NO_OWNER) & _land(state)[win]
+    strength = territory.count(fid)
+    victims = [
+        int(other) for other in np.unique(owners[border]).tolist()
+        if (C.AI_CONQUER_PLAYER or not state.factions[other].is_player)
+        and strength >= C.AI_CONQUER_STRENGTH_RATIO * territory.count(other)
+    ]
+    if not victims:
+        return []
+    victim = min(victims, key=territory.count)
+
+    ys, xs = np.nonzero(border & (owners == victim))
+    xs += x0
+    ys += y0
+    if C.AI_CONQUER_PLAYER:
+        # Not the regions the player's conquistadors are taking
+        keep = ~np.isin(state.region_grid[ys, xs], list(state.territory_expansion_regions))
+        xs, ys = xs[keep], ys[keep]
+        if xs.size == 0:
+            return []
+    cx, cy = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+    order = (xs - cx) ** 2 + (ys - cy) ** 2
+    k = min(C.AI_CONQUER_TILES_PER_DAY, xs.size)
+    pick = np.argpartition(order, k - 1)[:k]
+    tiles = list(zip(xs[pick].tolist(), ys[pick].tolist()))
+    territory.claim_tiles(fid, tiles)
+    _update_control(state, np.unique(state.region_grid[ys[pick], xs[pick]]).tolist())
+    return tiles
+
+
+class AIScheduler:
+    """
+    Runs the AI factions' decisions from the main loop within a time budget.
+
+    Args:
+        budget_ms: Main-thread milliseconds per update (None = run everything due)
+        use_pool: Send heavy plans to worker processes
+    """
+
+    def __init__(self, budget_ms: Optional[float] = C.AI_FRAME_BUDGET_MS, use_pool: bool = C.AI_PROCESS_POOL):
+        self.budget_ms = budget_ms
+        self.use_pool = use_pool
+        self._state = None
+        self._factions = 0
+        self._waiting: List[tuple] = []  # (due tick, seq, faction_id, kind)
+        self._ready: List[tuple] = []  # (due tick - urgency, seq, faction_id, kind)
+        self._seq = itertools.count()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._searches: Dict[int, ExpansionSearch] = {}  # Plans being run in slices
+        self._pending: Dict[int, object] = {}  # faction_id -> Future of finish_search
+
+    @staticmethod
+    def _now(state) -> int:
+        return state.day * C.TICKS_PER_DAY + int(state.game_time)
+
+    @property
+    def backlog(self) -> int:
+        """Decisions due but not run yet (carried over for lack of budget)."""
+        return len(self._ready)
+
+    def _schedule(self, faction_id: int, kind: str, due: int):
+        heapq.heappush(self._waiting, (due, next(self._seq), faction_id, kind))
+
+    def _reset(self, state):
+        self._state = state
+        self._factions = 0
+        self._waiting = []
+        self._ready = []
+        self._searches = {}
+        for future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+
+    def _sync_factions(self, state):
+        """Give new AI factions a controller and their first decisions."""
+        now = self._now(state)
+        for faction in state.factions[self._factions:]:
+            if faction.is_player:
+                continue
+            if faction.ai_controller is None:
+                faction.ai_controller = AIController(faction.faction_id)
+            self._schedule(faction.faction_id, EXPLORE, now)
+            self._schedule(faction.faction_id, EXPAND, now + C.TICKS_PER_DAY)
+            self._schedule(faction.faction_id, CONQUER, now + C.TICKS_PER_DAY)
+        self._factions = len(state.factions)
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Worker pool for long plans; None with a single CPU, where workers would only take time from the frame."""
+        if self._pool is None and self.use_pool:
+            workers = min(C.AI_POOL_WORKERS, (os.cpu_count() or 1) - 1)
+            if workers < 1:
+                self.use_pool = False
+                return None
+            try:
+                # spawn: the main process runs pygame and the save thread
+                self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            except (OSError, ValueError) as e:
+                print(f"AI process pool unavailable, planning on the main thread: {e}")
+                self.use_pool = False
+        return self._pool
+
+    def _plan(self, state, controller, now: int):
+        """
+        One slice of a plan search. A search that does not finish in its
+        first slice goes to the pool, or without one continues next frame.
+        """
+        fid = controller.faction_id
+        if fid in self._pending:
+            return
+        if controller.target_region is not None:
+            controller.planning = False
+            self._searches.pop(fid, None)
+            return
+        search = self._searches.pop(fid, None)
+        first = search is None
+        if first:
+            args, candidates = _plan_args(state, controller)
+            if candidates == 0:
+                controller.planning = False
+                return
+            search = ExpansionSearch(*args)
+
+        if search.advance(C.AI_PLAN_SLICE_STEPS):
+            _apply_plan(state, controller, search.best())
+            return
+        pool = self._get_pool() if first else None
+        if pool is not None:
+            self._pending[fid] = pool.submit(finish_search, search)
+        else:
+            self._searches[fid] = search
+            self._schedule(fid, PLAN, now)
+
+    def _collect_plans(self, state):
+        """Apply the pool plans that have finished."""
+        for faction_id, future in list(self._pending.items()):
+            if not future.done():
+                continue
+            del self._pending[faction_id]
+            controller = state.factions[faction_id].ai_controller
+            try:
+                region_id = future.result()
+            except Exception as e:
+                print(f"AI plan for faction {faction_id} failed: {e}")
+                region_id = -1
+            _apply_plan(state, controller, region_id)
+
+    def _run(self, state, faction_id: int, kind: str, now: int):
+        controller = state.factions[faction_id].ai_controller
+        if kind == EXPLORE:
+            _explore(state, controller)
+            self._schedule(faction_id, EXPLORE, now + C.AI_EXPLORE_INTERVAL_DAYS * C.TICKS_PER_DAY)
+        elif kind == PLAN:
+            self._plan(state, controller, now)
+        elif kind == EXPAND:
+            if controller.target_region is not None:
+                tiles = _expand(state, controller)
+                if tiles:
+                    cache_manager.damage_tiles(state, tiles)
+            if controller.target_region is None and not controller.planning:
+                controller.planning = True
+                self._schedule(faction_id, PLAN, now)
+            self._schedule(faction_id, EXPAND, now + C.TICKS_PER_DAY)
+        elif kind == CONQUER:
+            tiles = _conquer(state, controller)
+            if tiles:
+                cache_manager.damage_tiles(state, tiles)
+            self._schedule(faction_id, CONQUER, now + C.TICKS_PER_DAY)
+
+    def update(self, state) -> int:
+        """
+        Run due decisions, most urgent first, until the budget is spent.
+        A new or loaded game restarts the schedule.
+
+        Returns:
+            Number of decisions run
+        """
+        if state is not self._state:
+            self._reset(state)
+        if state.territory is None or state.region_index is None or not state.factions:
+            return 0
+        if len(state.factions) != self._factions:
+            self._sync_factions(state)
+
+        started = time.perf_counter()
+        deadline = None if self.budget_ms is None else started + self.budget_ms / 1000.0
+        self._collect_plans(state)
+
+        now = self._now(state)
+        while self._waiting and self._waiting[0][0] <= now:
+            due, seq, faction_id, kind = heapq.heappop(self._waiting)
+            heapq.heappush(self._ready, (due - URGENCY[kind] * C.AI_URGENCY_TICKS, seq, faction_id, kind))
+
+        ran = 0
+        while self._ready and (deadline is None or time.perf_counter() < deadline):
+            _, _, faction_id, kind = heapq.heappop(self._ready)
+            self._run(state, faction_id, kind, now)
+            ran += 1
+        return ran
+
+    def shutdown(self):
+        """Stop the worker processes (call before exiting)."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
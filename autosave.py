@@ -0,0 +1,51 @@
+"""
+Autosave.
+Every AUTOSAVE_INTERVAL_DAYS in-game days the running game is saved to the
+next of AUTOSAVE_SLOTS rotating autosave slots, overwriting the oldest one.
+Saving goes through save_manager.save_game_async, so the frame only pays for
+the snapshot; compression and the atomic write happen on the save thread.
+"""
+from typing import Optional
+
+import config as C
+import save_manager
+
+
+class AutoSaver:
+    """
+    Decides when to autosave and into which slot.
+
+    Args:
+        interval_days: In-game days between autosaves (0 disables autosave)
+    """
+
+    def __init__(self, interval_days: int = C.AUTOSAVE_INTERVAL_DAYS):
+        self.interval_days = interval_days
+        self._state = None
+        self._last_day = 0
+        self._next_slot: Optional[int] = None
+
+    def update(self, state) -> bool:
+        """
+        Call once per frame. A new or loaded game restarts the interval
+        without saving.
+
+        Returns:
+            True if an autosave was queued
+        """
+        if state is not self._state:
+            self._state = state
+            self._last_day = state.day
+            return False
+        if self.interval_days <= 0 or state.screen_state != "game" or state.biome_grid is None:
+            return False
+        if state.day - self._last_day < self.interval_days:
+            return False
+
+        self._last_day = state.day
+        if self._next_slot is None:
+            self._next_slot = save_manager.next_autosave_slot()
+        slot_id = self._next_slot
+        slots = save_manager.AUTOSAVE_SLOT_IDS
+        self._next_slot = slots[(slots.index(slot_id) + 1) % len(slots)]
+        return save_manager.save_game_async(state, slot_id)
@@ -0,0 +1,157 @@
+"""
+Benchmark: scalar vs batched passes of mapgen world generation.
+
+- Noise: per-tile value_noise / fbm / classify_biome loop vs the whole-grid
+  noise_engine path.
+- Voronoi: per-tile scan over every seed vs the bucketed SeedIndex used by
+  assign_regions, plus a synthetic run on a much larger grid.
+
+Each pair is checked for identical output before timings are printed.
+
+Usage:
+    python bench_mapgen.py [--seed N] [--repeat N]
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+import config as C
+import grids
+import mapgen as mg
+import noise_engine as ne
+from spatial_index import SeedIndex
+
+
+def scalar_noise_pass(seeds, elev_freq=C.elev_freq, humid_freq=C.humid_freq):
+    """Original per-tile loop."""
+    biome_grid = []
+    for y in range(C.BASE_GRID_HEIGHT):
+        row_b = []
+        for x in range(C.BASE_GRID_WIDTH):
+            wx = mg.value_noise(seeds["warp_x"], x * C.warp_freq, y * C.warp_freq) * C.warp_amp
+            wy = mg.value_noise(seeds["warp_y"], x * C.warp_freq, y * C.warp_freq) * C.warp_amp
+            sx = x + wx
+            sy = y + wy
+            e = mg.fbm(seeds["elev"], sx, sy, elev_freq, octaves=4, gain=0.55)
+            h = mg.fbm(seeds["humid"], sx + 1000, sy - 500, humid_freq, octaves=3, gain=0.6)
+            swamp_jitter = (mg.value_noise(seeds["boundary"], x * 0.25, y * 0.25) - 0.5) * 0.15
+            row_b.append(mg.classify_biome(e, h, swamp_jitter))
+        biome_grid.append(row_b)
+    return biome_grid
+
+
+def grid_noise_pass(seeds, elev_freq=C.elev_freq, humid_freq=C.humid_freq):
+    """Batched pass as used by generate_biome_map."""
+    xs, ys = ne.grid_coords(C.BASE_GRID_WIDTH, C.BASE_GRID_HEIGHT)
+    wx = ne.value_noise_grid(seeds["warp_x"], xs * C.warp_freq, ys * C.warp_freq) * C.warp_amp
+    wy = ne.value_noise_grid(seeds["warp_y"], xs * C.warp_freq, ys * C.warp_freq) * C.warp_amp
+    sx = xs + wx
+    sy = ys + wy
+    e = ne.fbm_grid(seeds["elev"], sx, sy, elev_freq, octaves=4, gain=0.55)
+    h = ne.fbm_grid(seeds["humid"], sx + 1000, sy - 500, humid_freq, octaves=3, gain=0.6)
+    swamp_jitter = (ne.value_noise_grid(seeds["boundary"], xs * 0.25, ys * 0.25) - 0.5) * 0.15
+    return mg.classify_biome_grid(e, h, swamp_jitter).tolist()
+
+
+def scalar_voronoi(biome_grid, seeds, noise_seed):
+    """Original assign_regions nearest-seed loop."""
+    region_grid = [[-1 for _ in range(C.BASE_GRID_WIDTH)] for _ in range(C.BASE_GRID_HEIGHT)]
+    for y in range(C.BASE_GRID_HEIGHT):
+        for x in range(C.BASE_GRID_WIDTH):
+            if biome_grid[y][x] in ("SEA", "LAKE"):
+                continue
+            best_id = None
+            best_dist = 1e9
+            noise_jitter = mg.value_noise(noise_seed, x * C.voronoi_freq, y * C.voronoi_freq) * C.REGION_NOISE_WEIGHT
+            for idx, (sx, sy) in enumerate(seeds):
+                dx = sx - x
+                dy = sy - y
+                d = math.sqrt(dx * dx + dy * dy) + noise_jitter
+                if d < best_dist:
+                    best_dist = d
+                    best_id = idx
+            region_grid[y][x] = best_id
+    return region_grid
+
+
+def indexed_voronoi(biome_grid, seeds, noise_seed):
+    """SeedIndex path as used by assign_regions."""
+    water = np.isin(np.array(biome_grid, dtype=object), ("SEA", "LAKE"))
+    land_ys, land_xs = np.nonzero(~water)
+    jitter = ne.value_noise_grid(noise_seed, land_xs * C.voronoi_freq, land_ys * C.voronoi_freq) * C.REGION_NOISE_WEIGHT
+    index = SeedIndex(seeds, area=C.BASE_GRID_WIDTH * C.BASE_GRID_HEIGHT)
+    region_arr = np.full((C.BASE_GRID_HEIGHT, C.BASE_GRID_WIDTH), -1, dtype=np.int64)
+    region_arr[land_ys, land_xs] = index.nearest(land_xs, land_ys, jitter)
+    return region_arr.tolist()
+
+
+def large_voronoi(seed, width, height, seed_count):
+    """Synthetic nearest-seed run on a larger grid."""
+    rnd = np.random.default_rng(seed)
+    seeds = list(zip(rnd.integers(0, width, seed_count).tolist(), rnd.integers(0, height, seed_count).tolist()))
+    xs, ys = np.meshgrid(np.arange(width), np.arange(height))
+    t0 = time.perf_counter()
+    SeedIndex(seeds, area=width * height).nearest(xs, ys)
+    return time.perf_counter() - t0
+
+
+def _distribution(grid):
+    counts = {}
+    for row in grid:
+        for b in row:
+            counts[b] = counts.get(b, 0) + 1
+    total = C.BASE_GRID_WIDTH * C.BASE_GRID_HEIGHT
+    return {b: round(ct / total * 100, 1) for b, ct in sorted(counts.items())}
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    seeds = mg.noise_seeds(args.seed)
+    t_scalar, scalar_grid = _time(lambda: scalar_noise_pass(seeds), 1)
+    t_grid, grid = _time(lambda: grid_noise_pass(seeds), args.repeat)
+
+    mismatches = sum(
+        1
+        for y in range(C.BASE_GRID_HEIGHT)
+        for x in range(C.BASE_GRID_WIDTH)
+        if scalar_grid[y][x] != grid[y][x]
+    )
+
+    print(f"grid: {C.BASE_GRID_WIDTH}x{C.BASE_GRID_HEIGHT}, seed: {args.seed}")
+    print(f"scalar noise pass:  {t_scalar * 1000:9.1f} ms")
+    print(f"batched noise pass: {t_grid * 1000:9.1f} ms  (x{t_scalar / t_grid:.0f})")
+    print(f"mismatched tiles:   {mismatches}")
+    print(f"distribution:       {_distribution(grid)}")
+
+    player = next((x, y) for y in range(C.BASE_GRID_HEIGHT) for x in range(C.BASE_GRID_WIDTH)
+                  if grid[y][x] not in ("SEA", "LAKE"))
+    region_seeds = mg.pick_region_seeds(grids.encode_biomes(grid), player, mg.stage_rng(args.seed, "regions"))
+    t_scan, scan_regions = _time(lambda: scalar_voronoi(grid, region_seeds, seeds["voronoi"]), 1)
+    t_index, index_regions = _time(lambda: indexed_voronoi(grid, region_seeds, seeds["voronoi"]), args.repeat)
+    print(f"voronoi seeds:      {len(region_seeds)}")
+    print(f"scalar voronoi:     {t_scan * 1000:9.1f} ms")
+    print(f"indexed voronoi:    {t_index * 1000:9.1f} ms  (x{t_scan / t_index:.0f})")
+    print(f"identical regions:  {scan_regions == index_regions}")
+
+    t_large = large_voronoi(args.seed, 2080, 1376, 8000)
+    print(f"indexed voronoi 2080x1376 / 8000 seeds: {t_large * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,11 @@ Centralizes cache invalidation logic to avoid code duplication.
 def invalidate_all(state):
     """
     Invalidate all rendering caches.
-    Use when map data changes (new game, conquest, etc.)
+    Use when map data changes (new game, etc.)
     """
+    state.map_damage = set()
     state.map_surface = None
-    state.zoom_full_map_cache = None
-    state.zoom_fog_layer = None
+    state.zoom_chunks = None
     state.selected_region_overlay_cache = None
     state.selected_region_overlay_zoom_cache = None
 
@@ -21,15 +21,26 @@ def invalidate_fog(state):
     Use when fog is revealed but map data hasn't changed.
     """
     state.fog_surface = None
-    state.zoom_fog_layer = None
+    if state.zoom_chunks is not None:
+        state.zoom_chunks.drop_fog()
 
 
 def invalidate_map(state):
     """
-    Invalidate map and overlay caches but keep fog.
-    Use when territory changes but fog doesn't.
+    Invalidate map and overlay caches but keep the world fog surface.
+    Use when most of the map changes but fog doesn't.
+    (Zoom chunks hold their fog layer too; it is rebuilt with the chunk.)
     """
+    state.map_damage = set()
     state.map_surface = None
-    state.zoom_full_map_cache = None
+    state.zoom_chunks = None
     state.selected_region_overlay_cache = None
     state.selected_region_overlay_zoom_cache = None
+
+
+def damage_tiles(state, tiles):
+    """
+    Record tiles whose look on the map changed (e.g. conquered tiles).
+    The map caches are repainted only around them on the next frame.
+    """
+    state.map_damage.update(tiles)
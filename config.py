@@ -18,16 +18,40 @@ REGION_SEED_MAX = 135
 REGION_NOISE_WEIGHT = 6.0
 BOUNDARY_NOISE_WEIGHT = 2.0
 BOUNDARY_NOISE_FREQ = 0.12
-LOADING_DELAY_FRAMES = 10
 
-# Debug settings
-DEBUG_LOAD_MAP = True  # If True, try to load 'debug_map.pkl' on start instead of generating
-DEBUG_MAP_FILE = "debug_map.pkl"
+# World generation stages (in execution order) reported to the loading screen
+GENERATION_STAGES = ["noise", "sea", "regions", "merge", "factions", "resources"]
+GENERATION_STAGE_NAMES = {
+    "noise": "地形ノイズ",
+    "sea": "海岸線",
+    "regions": "リージョン",
+    "merge": "リージョン統合",
+    "factions": "勢力",
+    "resources": "資源",
+}
+
+# Map cache (generated worlds keyed by seed + generation parameters)
+MAP_CACHE_ENABLED = True  # If True, starting a world seen before loads it from disk
+MAP_CACHE_DIR = "map_cache"
+MAP_CACHE_MAX_ENTRIES = 8
 SEA_JITTER_AMP = 30
 SEA_JITTER_FREQ = 0.15
 HIGHLIGHT_FRAMES = 180
 ZOOM_SCALE = 5
 ZOOM_MARGIN = 3
+ZOOM_CHUNK_TILES = 16  # Zoom view is rendered and cached in chunks of N x N tiles
+ZOOM_CHUNK_CACHE_MB = 24  # Surface memory kept for zoom chunks before the least recently drawn are dropped
+
+# Frame profiler (F3: overlay on/off, F4: start / stop a trace)
+PROFILER_WINDOW = 300  # Frames in the rolling percentiles
+PROFILER_TRACE_DIR = "profile"
+PROFILER_TRACE_FORMAT = "csv"  # "csv" or "json"
+
+# Save files (save_format.py)
+SAVE_THUMB_STEP = 4  # Save thumbnail: one pixel per N x N tiles
+SAVE_COMPRESS_LEVEL = 6  # zlib level of the save body sections
+AUTOSAVE_INTERVAL_DAYS = 5  # In-game days between autosaves (0 = off)
+AUTOSAVE_SLOTS = 3  # Autosaves rotate through this many files
 # noise frequencies and warp
 elev_freq = 0.03
 humid_freq = 0.05
@@ -151,16 +175,55 @@ UNIT_NAMES = {
     "conquistador": "征服者",
 }
 
+# Pathfinding (pathfinding.py)
+# Movement cost per biome; None = cannot be entered. Units move at move_speed / cost.
+BIOME_MOVE_COSTS = {
+    "SEA": None,
+    "LAKE": None,
+    "BEACH": 1.0,
+    "GRASSLAND": 1.0,
+    "FOREST": 1.5,
+    "MOUNTAIN": 3.0,
+    "ALPINE": 4.0,
+    "SWAMP": 2.0,
+    "ARID": 1.2,
+    "VOLCANO": 5.0,
+}
+PATH_ENTRANCE_SPACING = 24  # One region entrance per N border tiles
+PATH_LOCAL_TILES = 24  # Trips shorter than this try a plain tile A* first
+PATH_LOCAL_MAX_NODES = 64  # Tiles the plain A* may expand before the region A* / entrance table is used
+PATH_CACHE_SIZE = 256  # Finished paths kept by (start, goal)
+PATH_FLOW_FIELD_UNITS = 3  # Long orders to the same goal before its flow field is built and shared
+PATH_FLOW_FIELD_CACHE = 16  # Goals whose flow fields are kept
+
 # =========================
 # Game Timing
 # =========================
 TICKS_PER_DAY = 1000  # Number of game ticks per day
+SIM_TICKS_PER_SECOND = 100  # Ticks per real second at 1x speed (fixed timestep)
+SIM_MAX_FRAME_SECONDS = 0.25  # Real time simulated per frame at most; longer stalls are dropped
+GAME_SPEEDS = (1.0, 2.0, 4.0)  # Speeds selected with keys 1 / 2 / 3
+FPS_CAP = 60  # Frame rate limit (0 = unthrottled)
 
 # =========================
 # Conquest Settings
 # =========================
 CONQUEST_TILES_PER_DAY = 10  # Number of tiles conquered per day
 
+# =========================
+# AI Factions (ai.py)
+# =========================
+AI_FRAME_BUDGET_MS = 2.0  # Main-thread time per frame for AI decisions; the rest waits a frame
+AI_TILES_PER_DAY = 10  # Tiles an AI faction claims per day
+AI_EXPLORE_INTERVAL_DAYS = 3  # Days between AI exploration steps (one ring of regions each)
+AI_URGENCY_TICKS = 500  # Ticks a decision is moved ahead in the queue per urgency level
+AI_PROCESS_POOL = True  # Run heavy expansion plans in worker processes
+AI_POOL_WORKERS = 2
+AI_PLAN_SLICE_STEPS = 8  # Search steps (tiles of distance) of a plan per decision; longer plans go to the pool
+AI_CONQUER_TILES_PER_DAY = 5  # Tiles an AI faction takes a day from a weaker neighbouring faction
+AI_CONQUER_STRENGTH_RATIO = 1.5  # Territory size over the neighbour's needed to attack it
+AI_CONQUER_PLAYER = False  # If True, AI factions also take the player's land
+
 # =========================
 # UI Settings
 # =========================
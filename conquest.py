@@ -2,6 +2,9 @@
 Conquest management module for Conquistador units.
 Handles territory expansion logic.
 """
+import heapq
+from typing import List, Optional, Set, Tuple
+
 import config as C
 import cache_manager
 
@@ -21,7 +24,7 @@ def update_conquest(unit, state):
     region_id = unit.conquering_region_id
     
     # Check if we're in the target region
-    if state.region_grid[uy][ux] != region_id:
+    if state.region_grid[uy, ux] != region_id:
         return
     
     # Check if expansion tracking exists
@@ -48,12 +51,100 @@ def update_conquest(unit, state):
             # No seed info, assume arrived (fallback)
             expansion["arrived_at_seed"] = True
     
-    # Expand once per day (when game_time wraps)
-    if state.game_time < state.game_speed:
+    # Expand once per day (on the first tick after game_time wraps)
+    if state.game_time < 1:
         _expand_territory(expansion, region_id, (ux, uy), state)
         _check_completion(unit, expansion, region_id, state)
 
 
+class ConquestFrontier:
+    """
+    Tiles the conquest of one region can take next, nearest to the
+    conquistador first.
+
+    `heap` holds (squared distance, y, x) for region tiles next to conquered
+    ones. `islands` holds every region tile the same way and is built only
+    when the heap runs dry, for the tiles cut off from the conquered area.
+    A tile taken some other way keeps its entry, which is skipped when
+    popped. Claiming K tiles therefore costs O(K log n), not a rescan of the
+    conquered tiles per claim.
+
+    Args:
+        region_id: Region being conquered
+        center: (x, y) the distances are measured from (the conquistador)
+    """
+
+    def __init__(self, region_id: int, center: Tuple[int, int]):
+        self.region_id = region_id
+        self.center = center
+        self.heap: List[Tuple[int, int, int]] = []
+        self.islands: Optional[List[Tuple[int, int, int]]] = None
+        self.queued: Set[Tuple[int, int]] = set()
+
+    @classmethod
+    def from_tiles(cls, region_id: int, center: Tuple[int, int], tiles, state) -> "ConquestFrontier":
+        """Frontier of an expansion already under way (e.g. after a load)."""
+        frontier = cls(region_id, center)
+        frontier.queued.update(tiles)
+        for x, y in tiles:
+            frontier.push_neighbors(x, y, state)
+        return frontier
+
+    def _key(self, x: int, y: int) -> Tuple[int, int, int]:
+        cx, cy = self.center
+        return ((x - cx) ** 2 + (y - cy) ** 2, y, x)
+
+    def recenter(self, center: Tuple[int, int]):
+        """Measure distances from a new position (re-keys the heap, drops the island heap)."""
+        if center == self.center:
+            return
+        self.center = center
+        self.heap = [self._key(x, y) for _, y, x in self.heap]
+        heapq.heapify(self.heap)
+        self.islands = None
+
+    def push_neighbors(self, x: int, y: int, state):
+        """Queue the region's 4-neighbours of a conquered tile."""
+        region_grid = state.region_grid
+        height, width = region_grid.shape
+        for nx, ny in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+            if (0 <= nx < width and 0 <= ny < height and (nx, ny) not in self.queued
+                    and region_grid[ny, nx] == self.region_id):
+                self.queued.add((nx, ny))
+                heapq.heappush(self.heap, self._key(nx, ny))
+
+    def pop(self, tiles, state) -> Optional[Tuple[int, int]]:
+        """
+        Take the next tile to conquer: the nearest unowned tile next to the
+        conquered area, else the nearest unowned tile of the region.
+
+        Args:
+            tiles: Tiles this conquest has taken so far
+
+        Returns:
+            (x, y), or None if the region has nothing left to take
+        """
+        faction_id = state.player_faction_id
+        heap = self.heap
+        while heap:
+            _, y, x = heapq.heappop(heap)
+            if not state.territory.owns(faction_id, x, y):
+                return x, y
+
+        # Nothing adjacent: reach out to a disconnected tile (islands)
+        if self.islands is None:
+            self.islands = [self._key(x, y) for x, y in state.region_index.tiles(self.region_id)
+                            if (x, y) not in tiles]
+            heapq.heapify(self.islands)
+        islands = self.islands
+        while islands:
+            _, y, x = heapq.heappop(islands)
+            if (x, y) not in tiles and not state.territory.owns(faction_id, x, y):
+                self.queued.add((x, y))
+                return x, y
+        return None
+
+
 def _expand_territory(expansion, region_id, unit_pos, state):
     """
     Expand territory by adding tiles to player control.
@@ -68,57 +159,35 @@ def _expand_territory(expansion, region_id, unit_pos, state):
     
     # Lazy initialization of all_tiles for this region
     if "all_tiles" not in expansion:
-        expansion["all_tiles"] = set()
-        for y in range(C.BASE_GRID_HEIGHT):
-            for x in range(C.BASE_GRID_WIDTH):
-                if state.region_grid[y][x] == region_id:
-                    expansion["all_tiles"].add((x, y))
+        expansion["all_tiles"] = set(state.region_index.tiles(region_id))
+    
+    frontier = state.conquest_frontiers.get(region_id)
+    if frontier is None:
+        frontier = ConquestFrontier.from_tiles(region_id, unit_pos, expansion["tiles"], state)
+        state.conquest_frontiers[region_id] = frontier
+    else:
+        frontier.recenter(unit_pos)
     
     # Expand multiple tiles per day
-    tiles_added = False
     for _ in range(C.CONQUEST_TILES_PER_DAY):
-        owned_in_region = [t for t in expansion["tiles"]]
-        
-        candidates = []
-        if not owned_in_region:
+        if not expansion["tiles"]:
             # INITIAL CONQUEST: Claim the tile under the unit
-            if state.region_grid[uy][ux] == region_id:
-                candidates.append((ux, uy))
+            if state.region_grid[uy, ux] != region_id:
+                break
+            best_tile = (ux, uy)
+            frontier.queued.add(best_tile)
         else:
-            # EXISTING LOGIC: Expand from owned tiles
-            for (px, py) in expansion["tiles"]:
-                for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    nx, ny = px + dx, py + dy
-                    if (0 <= nx < C.BASE_GRID_WIDTH and 
-                        0 <= ny < C.BASE_GRID_HEIGHT and
-                        state.region_grid[ny][nx] == region_id and
-                        (nx, ny) not in state.player_region_mask):
-                        candidates.append((nx, ny))
-            
-            # If no adjacent candidates found, look for disconnected tiles (islands)
-            if not candidates:
-                unowned = expansion["all_tiles"] - expansion["tiles"]
-                unowned = {t for t in unowned if t not in state.player_region_mask}
-                
-                if unowned:
-                    # Pick closest to Conquistador to simulate reaching out
-                    best_island_tile = min(unowned, key=lambda t: (t[0]-ux)**2 + (t[1]-uy)**2)
-                    candidates.append(best_island_tile)
+            # Closest unowned tile to the conquistador next to the territory (or an island)
+            best_tile = frontier.pop(expansion["tiles"], state)
+            if best_tile is None:
+                break  # No more candidates found
         
         # Add one tile to territory
-        if candidates:
-            # Choose closest to conquistador
-            best_tile = min(candidates, key=lambda t: (t[0]-ux)**2 + (t[1]-uy)**2)
-            state.player_region_mask.add(best_tile)
-            expansion["tiles"].add(best_tile)
-            expansion["progress"] += 1
-            tiles_added = True
-        else:
-            break  # No more candidates found
-    
-    # Only invalidate caches if we actually added tiles
-    if tiles_added:
-        cache_manager.invalidate_map(state)
+        state.territory.claim(state.player_faction_id, *best_tile)
+        expansion["tiles"].add(best_tile)
+        frontier.push_neighbors(*best_tile, state)
+        cache_manager.damage_tiles(state, [best_tile])
+        expansion["progress"] += 1
 
 
 def _check_completion(unit, expansion, region_id, state):
@@ -133,6 +202,7 @@ def _check_completion(unit, expansion, region_id, state):
     """
     if len(expansion["tiles"]) >= len(expansion["all_tiles"]):
         unit.conquering_region_id = None
+        state.conquest_frontiers.pop(region_id, None)
         
         def close_dialog():
             pass
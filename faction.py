@@ -3,6 +3,8 @@ Faction system for managing multiple powers/factions in the game.
 Supports player and AI factions with different types (Empire, Tribe, etc.)
 """
 from typing import Set, Dict, List, Optional
+
+import numpy as np
 from enum import Enum
 
 
@@ -35,10 +37,10 @@ class Faction:
         faction_type: Type of faction (Empire, Tribe, etc.)
         color: RGB color tuple for territory display
         is_player: Whether this is the player's faction
-        territory_mask: Set of (x, y) tiles owned by this faction
+        territory: Shared TerritoryMap of the game (attached by GameState.add_faction)
+        territory_mask: Read-only (H, W) bool bitmap of the tiles owned by this faction
         controlled_regions: Set of region IDs controlled
-        food: Food resource amount
-        gold: Gold resource amount
+        food_income, gold_income: Summed development of the food / gold nodes in the territory
         units: List of units belonging to this faction
     """
     
@@ -56,14 +58,10 @@ class Faction:
         self.color = color  # (R, G, B)
         self.is_player = is_player
         
-        # Territory
-        self.territory_mask: Set[tuple] = set()  # {(x, y), ...}
+        # Territory (tile owners live in the shared TerritoryMap)
+        self.territory = None
         self.controlled_regions: Set[int] = set()  # {region_id, ...}
         
-        # Resources
-        self.food = 0
-        self.gold = 0
-        
         # Units
         self.units: List = []  # List of Unit objects
         
@@ -73,17 +71,40 @@ class Faction:
         # AI controller (for future use)
         self.ai_controller = None
     
+    @property
+    def territory_mask(self) -> Optional[np.ndarray]:
+        """Bitmap of this faction's tiles (None before it joins a game)"""
+        if self.territory is None:
+            return None
+        return self.territory.mask(self.faction_id)
+
+    @property
+    def territory_size(self) -> int:
+        """Number of tiles owned"""
+        return self.territory.count(self.faction_id) if self.territory is not None else 0
+
+    @property
+    def food_income(self) -> int:
+        """Food produced by the resource nodes in the territory (O(1), see TerritoryMap.income)"""
+        return self.territory.income(self.faction_id, "food") if self.territory is not None else 0
+
+    @property
+    def gold_income(self) -> int:
+        """Gold produced by the resource nodes in the territory"""
+        return self.territory.income(self.faction_id, "gold") if self.territory is not None else 0
+
     def add_territory(self, x: int, y: int):
-        """Add a tile to this faction's territory"""
-        self.territory_mask.add((x, y))
+        """Add a tile to this faction's territory (taking it from its owner)"""
+        self.territory.claim(self.faction_id, x, y)
     
     def remove_territory(self, x: int, y: int):
         """Remove a tile from this faction's territory"""
-        self.territory_mask.discard((x, y))
+        if self.owns_tile(x, y):
+            self.territory.release(x, y)
     
     def owns_tile(self, x: int, y: int) -> bool:
         """Check if this faction owns a specific tile"""
-        return (x, y) in self.territory_mask
+        return self.territory is not None and self.territory.owns(self.faction_id, x, y)
     
     def add_region(self, region_id: int):
         """Add a region to controlled regions"""
@@ -97,5 +118,18 @@ class Faction:
         """Check if this faction controls a region"""
         return region_id in self.controlled_regions
     
+    def __getstate__(self):
+        """The TerritoryMap is saved with the GameState, which attaches it again on load"""
+        state = self.__dict__.copy()
+        state.pop('territory', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('territory', None)
+        # Resource stocks of older versions (income comes from the territory)
+        self.__dict__.pop('food', None)
+        self.__dict__.pop('gold', None)
+
     def __repr__(self):
-        return f"Faction({self.faction_id}, {self.name}, {self.faction_type.display_name}, tiles={len(self.territory_mask)})"
+        return f"Faction({self.faction_id}, {self.name}, {self.faction_type.display_name}, tiles={self.territory_size})"
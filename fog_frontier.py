@@ -0,0 +1,248 @@
+"""
+Fog clusters of the regions being explored, for the explorers' targets.
+
+An explorer heads for the fog cluster (4-connected fogged tiles of its
+target region) that scores best: small clusters first, then close to the
+explorer, then close to the base. Instead of regrouping the region's fog
+for every waypoint, the clusters of a region are labeled once, when an
+explorer first asks, and then kept up to date tile by tile as the fog
+lifts:
+- a revealed tile leaves its cluster; if its fog neighbours may no longer
+  be connected, searches from each of them run in lockstep and every part
+  that closes off becomes a new cluster, so a split costs the size of the
+  smaller parts, not of the cluster
+- clusters sit in a heap by size (entries of clusters that changed are
+  skipped when popped), and a query only looks at clusters small enough to
+  still beat the best score found
+"""
+import heapq
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from labeling import label_components
+
+# Exploration target scoring weights, in order of priority
+SCORE_WEIGHT_CLUSTER_SIZE = 1000000  # Priority 1: Prefer small fog clusters
+SCORE_WEIGHT_DISTANCE_TO_UNIT = 100  # Priority 2: Prefer fog close to current position
+SCORE_WEIGHT_DISTANCE_TO_BASE = 1    # Priority 3: Prefer fog close to base (tiebreaker)
+
+
+class RegionFog:
+    """
+    Fog clusters of one region.
+
+    Attributes:
+        cluster_of: Flat tile index (y * W + x) -> cluster id, fogged tiles only
+        members: Cluster id -> its flat tile indices
+    """
+
+    def __init__(self, width: int, height: int, cluster_of: Dict[int, int], members: Dict[int, Set[int]]):
+        self.width = width
+        self.height = height
+        self.cluster_of = cluster_of
+        self.members = members
+        self._next_id = max(members, default=-1) + 1
+        self._heap: List[Tuple[int, int]] = [(len(tiles), cid) for cid, tiles in members.items()]
+        heapq.heapify(self._heap)
+        self._resized: Set[int] = set()
+
+    @classmethod
+    def build(cls, region_id: int, region_grid: np.ndarray, revealed: np.ndarray,
+              bbox: Optional[Tuple[int, int, int, int]]) -> "RegionFog":
+        """Label the fogged tiles of a region (bbox: its (xmin, ymin, xmax, ymax), None if empty)."""
+        height, width = region_grid.shape
+        cluster_of: Dict[int, int] = {}
+        members: Dict[int, Set[int]] = {}
+        if bbox is not None:
+            x0, y0, x1, y1 = bbox
+            fog = (region_grid[y0:y1 + 1, x0:x1 + 1] == region_id) & ~revealed[y0:y1 + 1, x0:x1 + 1]
+            components = label_components(fog, mask=fog)
+            window_width = x1 - x0 + 1
+            for label in range(components.count):
+                local = components.members(label)
+                flat = ((local // window_width + y0) * width + local % window_width + x0).tolist()
+                members[label] = set(flat)
+                cluster_of.update(dict.fromkeys(flat, label))
+        return cls(width, height, cluster_of, members)
+
+    def _neighbors(self, tile: int, cid: int) -> List[int]:
+        """4-neighbours of a tile that belong to cluster cid."""
+        width = self.width
+        x = tile % width
+        cluster_of = self.cluster_of
+        result = []
+        for n in (tile - width, tile + width):
+            if cluster_of.get(n) == cid:
+                result.append(n)
+        if x > 0 and cluster_of.get(tile - 1) == cid:
+            result.append(tile - 1)
+        if x < width - 1 and cluster_of.get(tile + 1) == cid:
+            result.append(tile + 1)
+        return result
+
+    def reveal(self, tile: int):
+        """Take a revealed tile out of its cluster (no-op if it is not fogged here)."""
+        cid = self.cluster_of.pop(tile, None)
+        if cid is None:
+            return
+        tiles = self.members[cid]
+        tiles.discard(tile)
+        if not tiles:
+            del self.members[cid]
+            return
+        self._resized.add(cid)
+        starts = self._neighbors(tile, cid)
+        if len(starts) > 1:
+            self._split(cid, starts)
+
+    def _split(self, cid: int, starts: List[int]):
+        """
+        Separate the parts of cluster cid that the fog neighbours `starts` of
+        a removed tile fall into. A search runs from each start, one tile
+        per search per round; searches that meet are merged, and a group of
+        searches that runs out of tiles is a closed-off part and becomes a
+        new cluster. Stops when one group is left, which keeps cid.
+        """
+        owner = {tile: i for i, tile in enumerate(starts)}
+        group = list(range(len(starts)))
+        queues = [deque([tile]) for tile in starts]
+        visited = [[tile] for tile in starts]
+
+        def find(i):
+            while group[i] != i:
+                group[i] = group[group[i]]
+                i = group[i]
+            return i
+
+        active = set(range(len(starts)))
+        while len({find(i) for i in active}) > 1:
+            for i in list(active):
+                queue = queues[i]
+                if queue:
+                    for n in self._neighbors(queue.popleft(), cid):
+                        j = owner.get(n)
+                        if j is None:
+                            owner[n] = i
+                            visited[i].append(n)
+                            queue.append(n)
+                        else:
+                            a, b = find(i), find(j)
+                            if a != b:
+                                group[max(a, b)] = min(a, b)
+                    continue
+                active.discard(i)
+                root = find(i)
+                others = {find(k) for k in active}
+                if root in others or not others:
+                    continue
+                # Closed off from the rest of the cluster
+                part = set()
+                for k in range(len(starts)):
+                    if find(k) == root:
+                        part.update(visited[k])
+                        visited[k] = []
+                new_id = self._next_id
+                self._next_id += 1
+                self.members[new_id] = part
+                self.members[cid] -= part
+                for tile in part:
+                    self.cluster_of[tile] = new_id
+                self._resized.add(new_id)
+
+    def best_target(self, unit_pos: Tuple[int, int], base_pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        Fog tile to explore next: in the cluster with the lowest score, its
+        tile closest to the unit (then to the base). None if no fog is left.
+        """
+        heap = self._heap
+        for cid in self._resized:
+            if cid in self.members:
+                heapq.heappush(heap, (len(self.members[cid]), cid))
+        self._resized = set()
+
+        width = self.width
+        cx, cy = unit_pos
+        bx, by = base_pos
+        best_score = None
+        best_target = None
+        taken = []
+        seen = set()
+        while heap:
+            size, cid = heap[0]
+            tiles = self.members.get(cid)
+            if tiles is None or len(tiles) != size or cid in seen:
+                heapq.heappop(heap)  # Stale entry
+                continue
+            if best_score is not None and size * SCORE_WEIGHT_CLUSTER_SIZE >= best_score:
+                break
+            taken.append(heapq.heappop(heap))
+            seen.add(cid)
+
+            flat = np.fromiter(tiles, dtype=np.int64, count=size)
+            xs = flat % width
+            ys = flat // width
+            d_unit = (xs - cx) ** 2 + (ys - cy) ** 2
+            d_base = (xs - bx) ** 2 + (ys - by) ** 2
+            i = int(np.lexsort((d_base, d_unit))[0])
+            score = (size * SCORE_WEIGHT_CLUSTER_SIZE +
+                     int(d_unit[i]) * SCORE_WEIGHT_DISTANCE_TO_UNIT +
+                     int(d_base[i]) * SCORE_WEIGHT_DISTANCE_TO_BASE)
+            if best_score is None or score < best_score:
+                best_score = score
+                best_target = (int(xs[i]), int(ys[i]))
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return best_target
+
+
+class FogFrontier:
+    """
+    RegionFog of every region an explorer has targeted, fed with the tiles
+    the fog reveals.
+
+    Args:
+        fog: FogOfWar of the world
+        region_grid: (H, W) region ids
+        region_index: RegionIndex (for region bounding boxes)
+    """
+
+    def __init__(self, fog, region_grid: np.ndarray, region_index):
+        self.fog = fog
+        self.region_grid = region_grid
+        self.region_index = region_index
+        self._width = region_grid.shape[1]
+        self._regions: Dict[int, RegionFog] = {}
+
+    def on_revealed(self, revealed):
+        """Remove newly revealed (x, y) tiles from their clusters (repeats are ignored)."""
+        if not self._regions:
+            return
+        width = self._width
+        region_at = self.region_index.region_at
+        regions = self._regions
+        for x, y in revealed:
+            region = regions.get(region_at(x, y))
+            if region is not None:
+                region.reveal(y * width + x)
+
+    def region(self, region_id: int) -> RegionFog:
+        """Fog clusters of a region, labeled from the fog on first use."""
+        region = self._regions.get(region_id)
+        if region is None:
+            region = RegionFog.build(region_id, self.region_grid, self.fog.mask(),
+                                     self.region_index.bbox(region_id))
+            self._regions[region_id] = region
+        return region
+
+    def best_target(self, region_id: int, unit_pos: Tuple[int, int],
+                    base_pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        Next exploration target in a region (see RegionFog.best_target), or
+        None when the region has no fog left.
+        """
+        region = self.region(region_id)
+        # Reveals of this tick are only handed over at its end
+        self.on_revealed(self.fog.revealed)
+        return region.best_target(unit_pos, base_pos)
@@ -0,0 +1,187 @@
+"""
+Fog of war.
+Owns the revealed/hidden state of every tile as a bit-packed array, reveals
+unit vision through precomputed circular stencils, and records the tile
+rectangles touched by each reveal so the fog surfaces can be patched in place
+instead of rebuilt.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Dirty rectangle in tiles: (x, y, w, h)
+Rect = Tuple[int, int, int, int]
+
+# vision_range -> ((dy, half_width), ...) rows of the circular stencil
+_STENCILS: Dict[int, Tuple[Tuple[int, int], ...]] = {}
+
+
+def vision_stencil(vision_range: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Circular vision stencil as horizontal spans, cached per range.
+    Covers the same tiles as dx * dx + dy * dy <= r * r.
+
+    Returns:
+        Tuple of (dy, half_width) rows; row dy spans dx in [-half_width, half_width]
+    """
+    stencil = _STENCILS.get(vision_range)
+    if stencil is None:
+        r = vision_range
+        stencil = tuple(
+            (dy, int((r * r - dy * dy) ** 0.5))
+            for dy in range(-r, r + 1)
+        )
+        _STENCILS[vision_range] = stencil
+    return stencil
+
+
+class FogOfWar:
+    """
+    Revealed tiles of the world, one bit per tile.
+
+    Bits are stored row by row in a bytearray (bit x & 7 of byte x >> 3, the
+    `bitorder="little"` layout of np.packbits). A NumPy view over the same
+    buffer serves the whole-grid queries, while the bytearray keeps single
+    tile checks cheap.
+
+    Every reveal that changes something appends the bounding rectangle of the
+    changed tiles to `dirty` and the tiles themselves to `revealed`; the main
+    loop drains both once per tick with take_dirty() and take_revealed().
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self._stride = (width + 7) >> 3
+        self._bits = bytearray(self._stride * height)
+        self._view = self._make_view()
+        self.dirty: List[Rect] = []
+        self.revealed: List[Tuple[int, int]] = []
+        # Stencil centres (x, y, range) already applied; fog only ever grows,
+        # so re-applying one can never reveal anything new
+        self._applied = set()
+
+    @classmethod
+    def from_mask(cls, revealed: np.ndarray) -> "FogOfWar":
+        """Build from a boolean (H, W) array, True = revealed."""
+        height, width = revealed.shape
+        fog = cls(width, height)
+        fog._view[:] = np.packbits(revealed.astype(bool), axis=1, bitorder="little")
+        return fog
+
+    def _make_view(self) -> np.ndarray:
+        return np.frombuffer(self._bits, dtype=np.uint8).reshape(self.height, self._stride)
+
+    def __getstate__(self):
+        return {"width": self.width, "height": self.height, "bits": bytes(self._bits)}
+
+    def __setstate__(self, state):
+        self.width = state["width"]
+        self.height = state["height"]
+        self._stride = (self.width + 7) >> 3
+        self._bits = bytearray(state["bits"])
+        self._view = self._make_view()
+        self.dirty = []
+        self.revealed = []
+        self._applied = set()
+
+    def is_revealed(self, x: int, y: int) -> bool:
+        """True if tile (x, y) is revealed."""
+        return bool(self._bits[y * self._stride + (x >> 3)] & (1 << (x & 7)))
+
+    def mask(self) -> np.ndarray:
+        """Boolean (H, W) array, True on revealed tiles."""
+        return self.rect_mask(0, 0, self.width, self.height)
+
+    def rect_mask(self, x: int, y: int, w: int, h: int) -> np.ndarray:
+        """Boolean (h, w) array of the revealed state inside one tile rectangle."""
+        rows = np.unpackbits(self._view[y:y + h], axis=1, count=self.width, bitorder="little")
+        return rows[:, x:x + w].astype(bool)
+
+    def reveal_around(self, cx: int, cy: int, vision_range: int) -> List[Tuple[int, int]]:
+        """
+        Reveal the circular vision stencil centred on (cx, cy).
+
+        Returns:
+            Newly revealed (x, y) tiles (empty if nothing changed)
+        """
+        key = (cx, cy, vision_range)
+        if key in self._applied:
+            return []
+        self._applied.add(key)
+
+        newly = []
+        for dy, half in vision_stencil(vision_range):
+            y = cy + dy
+            if 0 <= y < self.height:
+                newly.extend(self._reveal_row(y, max(0, cx - half), min(self.width - 1, cx + half)))
+        self._mark(newly)
+        return newly
+
+    def reveal_tiles(self, tiles: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        Reveal a list of (x, y) tiles.
+
+        Returns:
+            Newly revealed (x, y) tiles
+        """
+        bits = self._bits
+        stride = self._stride
+        newly = []
+        for x, y in tiles:
+            i = y * stride + (x >> 3)
+            bit = 1 << (x & 7)
+            if not bits[i] & bit:
+                bits[i] |= bit
+                newly.append((x, y))
+        self._mark(newly)
+        return newly
+
+    def _reveal_row(self, y: int, x0: int, x1: int) -> List[Tuple[int, int]]:
+        """Set the bits of tiles x0..x1 on row y; return the ones that were hidden."""
+        bits = self._bits
+        row = y * self._stride
+        newly = []
+        for x in range(x0, x1 + 1):
+            i = row + (x >> 3)
+            bit = 1 << (x & 7)
+            if not bits[i] & bit:
+                bits[i] |= bit
+                newly.append((x, y))
+        return newly
+
+    def _mark(self, newly: List[Tuple[int, int]]):
+        """Record newly revealed tiles and their bounding rectangle."""
+        if not newly:
+            return
+        xs = [t[0] for t in newly]
+        ys = [t[1] for t in newly]
+        x0, y0 = min(xs), min(ys)
+        self.dirty.append((x0, y0, max(xs) - x0 + 1, max(ys) - y0 + 1))
+        self.revealed.extend(newly)
+
+    def reveal_mask(self, tiles: np.ndarray) -> np.ndarray:
+        """
+        Reveal every tile of a boolean (H, W) mask.
+
+        Returns:
+            Boolean (H, W) array of the tiles that were hidden before
+        """
+        newly = tiles & ~self.mask()
+        if newly.any():
+            self._view |= np.packbits(newly, axis=1, bitorder="little")
+            ys, xs = np.nonzero(newly)
+            self._mark(list(zip(xs.tolist(), ys.tolist())))
+        return newly
+
+    def take_dirty(self) -> List[Rect]:
+        """Return and clear the rectangles changed since the last call."""
+        dirty = self.dirty
+        self.dirty = []
+        return dirty
+
+    def take_revealed(self) -> List[Tuple[int, int]]:
+        """Return and clear the tiles revealed since the last call."""
+        revealed = self.revealed
+        self.revealed = []
+        return revealed
@@ -0,0 +1,183 @@
+"""
+Frame profiler.
+Per-frame timers around the stages of the main loop (unit updates, conquest,
+fog reveal, rendering, ...), rolling percentiles for the on-screen overlay,
+and an optional per-frame trace dumped to CSV or JSON for offline analysis.
+
+Disabled by default; while disabled start() / stop() only check a flag, so
+the timers can stay in hot paths.
+
+Usage:
+    t = PROFILER.start()
+    unit.update(...)
+    PROFILER.stop("units", t)
+    ...
+    PROFILER.end_frame()
+"""
+import csv
+import json
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import config as C
+
+
+class FrameProfiler:
+    """
+    Stage timers of the main loop.
+
+    Attributes:
+        enabled: Timers run only while True (F3 in the main loop)
+        frame: Frames ended since the profiler was enabled
+        stages: Stage names in the order they were first timed
+        trace: Per-frame rows {"frame": n, "total": ms, "<stage>": ms, ...} while tracing, else None
+    """
+
+    def __init__(self, window: int = C.PROFILER_WINDOW):
+        self.enabled = False
+        self.frame = 0
+        self.stages: List[str] = []
+        self.trace: Optional[List[Dict[str, float]]] = None
+        self._window = window
+        self._current: Dict[str, float] = {}
+        self._history: Dict[str, deque] = {}
+        self._frame_start = 0.0
+
+    def toggle(self) -> bool:
+        """Enable / disable the timers; history starts over when enabled."""
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.frame = 0
+            self._current = {}
+            self._history = {}
+            self._frame_start = time.perf_counter()
+        return self.enabled
+
+    def start(self) -> float:
+        """Start a timer (0.0 while disabled)."""
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    def stop(self, stage: str, started: float):
+        """Add the time since `started` to `stage` for this frame."""
+        if not self.enabled or not started:
+            # Disabled, or enabled after the timer was started
+            return
+        elapsed = time.perf_counter() - started
+        current = self._current
+        if stage in current:
+            current[stage] += elapsed
+        else:
+            current[stage] = elapsed
+            if stage not in self._history:
+                self._history[stage] = deque(maxlen=self._window)
+                if stage not in self.stages:
+                    self.stages.append(stage)
+
+    def end_frame(self):
+        """Close the frame: record every stage (0 if not timed) and the frame total ("total")."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        current = self._current
+        current["total"] = now - self._frame_start
+        self._frame_start = now
+        if "total" not in self._history:
+            self._history["total"] = deque(maxlen=self._window)
+
+        row = {"frame": self.frame} if self.trace is not None else None
+        for stage in ["total"] + self.stages:
+            history = self._history.get(stage)
+            if history is None:
+                continue
+            ms = current.get(stage, 0.0) * 1000.0
+            history.append(ms)
+            if row is not None:
+                row[stage] = round(ms, 3)
+        if row is not None:
+            self.trace.append(row)
+        self._current = {}
+        self.frame += 1
+
+    def percentiles(self, stage: str, qs=(50, 95, 99)) -> List[float]:
+        """Rolling percentiles (ms) of one stage over the last PROFILER_WINDOW frames."""
+        history = self._history.get(stage)
+        if not history:
+            return [0.0 for _ in qs]
+        values = sorted(history)
+        last = len(values) - 1
+        return [values[min(last, int(round(q / 100.0 * last)))] for q in qs]
+
+    def mean(self, stage: str) -> float:
+        """Rolling mean (ms) of one stage."""
+        history = self._history.get(stage)
+        return sum(history) / len(history) if history else 0.0
+
+    def summary(self) -> List[Dict[str, float]]:
+        """Rolling mean / p50 / p95 / p99 / max (ms) of the frame and every stage."""
+        rows = []
+        for stage in ["total"] + self.stages:
+            if not self._history.get(stage):
+                continue
+            p50, p95, p99 = self.percentiles(stage)
+            rows.append({
+                "stage": stage,
+                "mean": self.mean(stage),
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+                "max": max(self._history[stage]),
+            })
+        return rows
+
+    def start_trace(self):
+        """Record every following frame until stop_trace (enables the timers)."""
+        if not self.enabled:
+            self.toggle()
+        self.trace = []
+
+    def stop_trace(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Stop recording and write the trace.
+
+        Args:
+            path: .csv or .json file; default PROFILER_TRACE_DIR/trace_<time>.<PROFILER_TRACE_FORMAT>
+
+        Returns:
+            Path written, or None if there was nothing to write
+        """
+        trace = self.trace
+        self.trace = None
+        if not trace:
+            return None
+        if path is None:
+            os.makedirs(C.PROFILER_TRACE_DIR, exist_ok=True)
+            name = time.strftime("trace_%Y%m%d_%H%M%S") + "." + C.PROFILER_TRACE_FORMAT
+            path = os.path.join(C.PROFILER_TRACE_DIR, name)
+        dump_trace(trace, path)
+        return path
+
+
+def dump_trace(rows: List[Dict[str, float]], path: str):
+    """Write per-frame rows to CSV or JSON (chosen by the file extension)."""
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"columns": columns, "frames": rows}, f)
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, restval=0)
+            writer.writeheader()
+            writer.writerows(rows)
+    print(f"Profiler trace written to {path} ({len(rows)} frames)")
+
+
+# Shared by the main loop and the renderers
+PROFILER = FrameProfiler()
@@ -1,16 +1,22 @@
-import pickle
-import os
 import random
+import numpy as np
 from typing import Optional, Tuple
 import config as C
+import grids
 import cache_manager
 import mapgen as mg
+import map_cache
 from state import GameState
+from fog_of_war import FogOfWar
+from region_index import RegionIndex
+from pathfinding import Pathfinder
+from territory import TerritoryMap
 from unit import Explorer, Colonist, Diplomat, Conquistador
 from resource_gen import generate_resource_nodes
+from spatial_index import SeedIndex
 
 
-def _spawn_ai_factions(state: GameState, biome_grid, region_grid):
+def _spawn_ai_factions(state: GameState, biome_grid, region_grid, rng: random.Random):
     """
     Spawn AI factions. Always spawns exactly one empire on the opposite side of the coast.
     
@@ -18,11 +24,12 @@ def _spawn_ai_factions(state: GameState, biome_grid, region_grid):
         state: Game state
         biome_grid: Biome grid
         region_grid: Region grid
+        rng: Random stream of the faction stage
     """
     from faction import Faction, FactionType
     
     # Always spawn exactly one empire
-    empire_regions = _select_empire_regions(state, biome_grid, region_grid)
+    empire_regions = _select_empire_regions(state, biome_grid, region_grid, rng)
     
     if empire_regions:
         faction_id = len(state.factions)
@@ -32,25 +39,21 @@ def _spawn_ai_factions(state: GameState, biome_grid, region_grid):
             faction_id=faction_id,
             name=C.FACTION_DEFAULT_NAMES[faction_id] if faction_id < len(C.FACTION_DEFAULT_NAMES) else f"帝国{faction_id}",
             faction_type=FactionType.EMPIRE,
-            color=C.FACTION_COLORS[faction_id] if faction_id < len(C.FACTION_COLORS) else (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255)),
+            color=C.FACTION_COLORS[faction_id] if faction_id < len(C.FACTION_COLORS) else (rng.randint(100, 255), rng.randint(100, 255), rng.randint(100, 255)),
             is_player=False
         )
         
-        # Assign territory (all tiles in the selected regions)
-        for region_id in empire_regions:
-            for y in range(C.BASE_GRID_HEIGHT):
-                for x in range(C.BASE_GRID_WIDTH):
-                    if region_grid[y][x] == region_id:
-                        empire_faction.territory_mask.add((x, y))
-            empire_faction.controlled_regions.add(region_id)
-        
         # Add to factions list
-        state.factions.append(empire_faction)
+        state.add_faction(empire_faction)
+        
+        # Assign territory (all tiles in the selected regions)
+        state.territory.claim_mask(faction_id, np.isin(region_grid, list(empire_regions)))
+        empire_faction.controlled_regions.update(empire_regions)
         
-        print(f"Spawned Empire: {empire_faction.name} with {len(empire_regions)} regions and {len(empire_faction.territory_mask)} tiles")
+        print(f"Spawned Empire: {empire_faction.name} with {len(empire_regions)} regions and {empire_faction.territory_size} tiles")
 
 
-def _select_empire_regions(state: GameState, biome_grid, region_grid):
+def _select_empire_regions(state: GameState, biome_grid, region_grid, rng: random.Random):
     """
     Select 15-20 compact regions near the map center for the empire.
     
@@ -58,6 +61,7 @@ def _select_empire_regions(state: GameState, biome_grid, region_grid):
         state: Game state
         biome_grid: Biome grid
         region_grid: Region grid
+        rng: Random stream of the faction stage
     
     Returns:
         List of region IDs for the empire
@@ -98,10 +102,10 @@ def _select_empire_regions(state: GameState, biome_grid, region_grid):
     
     # Select a seed region from the closest 20% of regions to center
     top_candidates = region_distances[:max(1, len(region_distances) // 5)]
-    seed_region_id = random.choice(top_candidates)[0]
+    seed_region_id = rng.choice(top_candidates)[0]
     
     # Use BFS to select 15-20 compact regions starting from seed
-    target_count = random.randint(15, 20)
+    target_count = rng.randint(15, 20)
     selected_regions = {seed_region_id}
     
     # Build adjacency map for regions
@@ -151,77 +155,75 @@ def _select_empire_regions(state: GameState, biome_grid, region_grid):
 
 
 
-def generate_world(state: GameState):
+def generate_world(state: GameState, progress=None):
+    """
+    Build a new world into `state`.
+    The world is fully determined by state.world_seed (drawn if None) and
+    the gen_*_freq parameters; with use_map_cache a world built before is
+    loaded from the map cache instead.
+
+    Args:
+        state: Game state to fill
+        progress: Optional callback called with each stage name from
+                  C.GENERATION_STAGES as it starts (may raise to abort)
+    """
     state.selected_region = None
-    
-    # Try to load debug map if enabled
-    if state.use_debug_map:
-        if load_map_state(state, "debug_map.pkl"):
-            print("Loaded debug map state.")
-            # Ensure zoom mode is set correctly after load
-            state.zoom_mode = True
-            state.zoom_region_id = state.player_region_id
-            
-            # Recalculate zoom origin
-            if state.player_region_mask:
-                xs = [p[0] for p in state.player_region_mask]
-                ys = [p[1] for p in state.player_region_mask]
-                cx = (min(xs) + max(xs)) // 2
-                cy = (min(ys) + max(ys)) // 2
-                
-                scale = C.ZOOM_SCALE
-                view_w = (C.SCREEN_WIDTH - C.INFO_PANEL_WIDTH) // (C.TILE_SIZE * scale)
-                view_h = C.SCREEN_HEIGHT // (C.TILE_SIZE * scale)
-                
-                ox = cx - view_w // 2
-                oy = cy - view_h // 2
-                
-                ox = max(0, min(C.BASE_GRID_WIDTH - view_w, ox))
-                oy = max(0, min(C.BASE_GRID_HEIGHT - view_h, oy))
-                
-                state.zoom_origin = (ox, oy)
+
+    # Every stage draws from its own stream of the world seed, so the same
+    # seed and noise parameters always give the same world
+    if state.world_seed is None:
+        state.world_seed = mg.new_world_seed()
+    seed = state.world_seed
+    key = map_cache.cache_key(seed, state.gen_elev_freq, state.gen_humid_freq)
+
+    if state.use_map_cache:
+        cached = map_cache.load(key)
+        if cached is not None:
+            state.__dict__.update(vars(cached))
+            cache_manager.invalidate_all(state)
+            state.pathfinder = Pathfinder(state.biome_grid, state.region_grid)
+            print(f"Loaded world {seed} from map cache.")
             return
 
     print("Generating new world...")
-    g, edge_side = mg.generate_biome_map(elev_freq=state.gen_elev_freq, humid_freq=state.gen_humid_freq)
-    px, py = mg.choose_player_start(g, edge_side)
-    state.player_region_mask = mg.build_player_region_mask(g, px, py, edge_side, 20, 30)
+    if progress:
+        progress("noise")
+    g, edge_side = mg.generate_biome_map(seed, elev_freq=state.gen_elev_freq, humid_freq=state.gen_humid_freq, progress=progress)
+    start_rng = mg.stage_rng(seed, "start")
+    px, py = mg.choose_player_start(g, edge_side, start_rng)
+    start_tiles = mg.build_player_region_mask(g, px, py, edge_side, start_rng, 20, 30)
     state.player_grid_x, state.player_grid_y = px, py
-    seeds = mg.pick_region_seeds(g, (px, py))
-    reg_grid, seeds = mg.assign_regions(g, seeds)
+    if progress:
+        progress("regions")
+    seeds = mg.pick_region_seeds(g, (px, py), mg.stage_rng(seed, "regions"))
+    reg_grid, seeds = mg.assign_regions(g, seeds, mg.noise_seeds(seed)["voronoi"], progress=progress)
+
+    player_mask = np.zeros((C.BASE_GRID_HEIGHT, C.BASE_GRID_WIDTH), dtype=bool)
+    if start_tiles:
+        mask_xs, mask_ys = zip(*start_tiles)
+        player_mask[list(mask_ys), list(mask_xs)] = True
 
     # プレイヤー領域以外のID0を修正
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            if reg_grid[y][x] == 0 and (x, y) not in state.player_region_mask:
-                best_id = None
-                best_dist = 1e9
-                for idx, (sx, sy) in enumerate(seeds[1:], start=1):
-                    dx = sx - x
-                    dy = sy - y
-                    d = dx * dx + dy * dy
-                    if d < best_dist:
-                        best_dist = d
-                        best_id = idx
-                reg_grid[y][x] = best_id
-
-    for (mx, my) in state.player_region_mask:
-        reg_grid[my][mx] = 0
+    stray_ys, stray_xs = np.nonzero((reg_grid == 0) & ~player_mask)
+    if stray_xs.size and len(seeds) > 1:
+        index = SeedIndex(seeds[1:], area=C.BASE_GRID_WIDTH * C.BASE_GRID_HEIGHT)
+        reg_grid[stray_ys, stray_xs] = index.nearest(stray_xs, stray_ys) + 1
+
+    reg_grid[player_mask] = 0
 
     # Fix seeds that are now inside player region
     # After overriding player mask, some region seeds might be inside player region
     # Move them to their region's centroid
+    seed_index = None
     for idx in range(1, len(seeds)):  # Skip player seed (idx=0)
         sx, sy = seeds[idx]
         
         # Check if seed is in player mask
-        if (sx, sy) in state.player_region_mask:
-            # Find all tiles of this region (excluding player mask)
-            region_tiles = []
-            for y in range(C.BASE_GRID_HEIGHT):
-                for x in range(C.BASE_GRID_WIDTH):
-                    if reg_grid[y][x] == idx and (x, y) not in state.player_region_mask:
-                        region_tiles.append((x, y))
+        if player_mask[sy, sx]:
+            # Find all tiles of this region (the player mask is all region 0 by now)
+            if seed_index is None:
+                seed_index = RegionIndex(None, reg_grid)
+            region_tiles = seed_index.tiles(idx)
             
             if region_tiles:
                 # Use find_valid_seed to get best position (centroid or nearest)
@@ -238,8 +240,10 @@ def generate_world(state: GameState):
 
     state.biome_grid = g
     state.region_seeds = seeds
-    state.region_grid = reg_grid
+    state.region_grid = grids.region_array(reg_grid)
     state.region_info = info
+    # Tile index without fog; rebuilt with revealed counts once the fog exists
+    state.region_index = RegionIndex(g, state.region_grid)
     state.player_region_id = 0
     state.coast_edge = edge_side
     
@@ -250,6 +254,9 @@ def generate_world(state: GameState):
     # Initialize faction system
     from faction import Faction, FactionType
     
+    if progress:
+        progress("factions")
+
     # Create player faction
     player_faction = Faction(
         faction_id=0,
@@ -259,36 +266,33 @@ def generate_world(state: GameState):
         is_player=True
     )
     
-    # Transfer existing territory to player faction
-    player_faction.territory_mask = state.player_region_mask.copy()
-    player_faction.controlled_regions.add(state.player_region_id)
-    player_faction.food = state.food
-    player_faction.gold = state.gold
-    
-    # Initialize factions list
-    state.factions = [player_faction]
+    # Initialize factions list and tile owners
+    state.territory = TerritoryMap(C.BASE_GRID_WIDTH, C.BASE_GRID_HEIGHT)
+    state.factions = []
     state.player_faction_id = 0
+    state.add_faction(player_faction)
+
+    # Give the start region to the player faction
+    state.territory.claim_mask(player_faction.faction_id, player_mask)
+    player_faction.controlled_regions.add(state.player_region_id)
     
     # Spawn AI factions in random regions
-    _spawn_ai_factions(state, g, reg_grid)
+    _spawn_ai_factions(state, g, state.region_grid, mg.stage_rng(seed, "factions"))
     
     # Start in zoom mode centered on player region
     state.zoom_mode = True
     state.zoom_region_id = 0
 
-    if state.player_region_mask:
-        xs = [p[0] for p in state.player_region_mask]
-        ys = [p[1] for p in state.player_region_mask]
-        state.player_region_center = ((min(xs) + max(xs)) // 2, (min(ys) + max(ys)) // 2)
+    bbox = state.territory.bbox(player_faction.faction_id)
+    if bbox:
+        min_x, min_y, max_x, max_y = bbox
+        state.player_region_center = ((min_x + max_x) // 2, (min_y + max_y) // 2)
     else:
         state.player_region_center = (state.player_grid_x, state.player_grid_y)
 
     # Calculate zoom origin to center on player region
-    if state.player_region_mask:
-        xs = [p[0] for p in state.player_region_mask]
-        ys = [p[1] for p in state.player_region_mask]
-        cx = (min(xs) + max(xs)) // 2
-        cy = (min(ys) + max(ys)) // 2
+    if bbox:
+        cx, cy = state.player_region_center
         
         scale = C.ZOOM_SCALE
         view_w = (C.SCREEN_WIDTH - C.INFO_PANEL_WIDTH) // (C.TILE_SIZE * scale)
@@ -301,62 +305,54 @@ def generate_world(state: GameState):
         oy = max(0, min(C.BASE_GRID_HEIGHT - view_h, oy))
         
         state.zoom_origin = (ox, oy)
-        state.zoom_bounds = (min(xs), min(ys), max(xs), max(ys))
+        state.zoom_bounds = bbox
     else:
         state.zoom_origin = (0, 0)
         state.zoom_bounds = (0, 0, 0, 0)
     
     cache_manager.invalidate_all(state)
     
-    # Initialize fog grid (False = hidden)
-    state.fog_grid = [[False for _ in range(C.BASE_GRID_WIDTH)] for _ in range(C.BASE_GRID_HEIGHT)]
-    
-    # Reveal SEA and 1 tile around it
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            if g[y][x] == "SEA":
-                # Reveal this SEA tile and 1 tile in all directions
-                for dy in range(-1, 2):
-                    for dx in range(-1, 2):
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                            state.fog_grid[ny][nx] = True
+    # Initialize fog (False = hidden), revealing SEA and 1 tile around it
+    sea = g == grids.SEA
+    near_sea = sea.copy()
+    near_sea[:, 1:] |= sea[:, :-1]
+    near_sea[:, :-1] |= sea[:, 1:]
+    revealed = near_sea.copy()
+    revealed[1:, :] |= near_sea[:-1, :]
+    revealed[:-1, :] |= near_sea[1:, :]
     
     # Reveal player start region
-    if state.player_region_mask:
-        for (mx, my) in state.player_region_mask:
-            state.fog_grid[my][mx] = True
-            # Reveal neighbors too for smoother look
-            for dx in (-1, 0, 1):
-                for dy in (-1, 0, 1):
-                    nx, ny = mx + dx, my + dy
-                    if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                        state.fog_grid[ny][nx] = True
+    if start_tiles:
+        # Reveal neighbors too for smoother look
+        start_mask = player_mask
+        near_start = start_mask.copy()
+        near_start[:, 1:] |= start_mask[:, :-1]
+        near_start[:, :-1] |= start_mask[:, 1:]
+        revealed |= near_start
+        revealed[1:, :] |= near_start[:-1, :]
+        revealed[:-1, :] |= near_start[1:, :]
     else:
         # Fallback if no mask
         cx, cy = state.player_region_center
-        for dy in range(-5, 6):
-            for dx in range(-5, 6):
-                nx, ny = cx + dx, cy + dy
-                if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                    state.fog_grid[ny][nx] = True
+        revealed[max(0, cy - 5):cy + 6, max(0, cx - 5):cx + 6] = True
+    state.fog = FogOfWar.from_mask(revealed)
 
     # Spawn initial units at player start (4 units at different positions)
     state.units = []
     cx, cy = state.player_region_center
     
     # Find 4 different positions in player region
-    player_tiles = list(state.player_region_mask)
+    player_tiles = sorted(start_tiles)
     if len(player_tiles) >= 4:
         # Use random positions from player region
-        positions = random.sample(player_tiles, 4)
+        positions = mg.stage_rng(seed, "units").sample(player_tiles, 4)
     else:
         # Fallback: use center with small offsets
         positions = [
             (cx, cy),
-            (cx + 1, cy) if (cx + 1, cy) in state.player_region_mask else (cx, cy),
-            (cx, cy + 1) if (cx, cy + 1) in state.player_region_mask else (cx, cy),
-            (cx + 1, cy + 1) if (cx + 1, cy + 1) in state.player_region_mask else (cx, cy),
+            (cx + 1, cy) if (cx + 1, cy) in start_tiles else (cx, cy),
+            (cx, cy + 1) if (cx, cy + 1) in start_tiles else (cx, cy),
+            (cx + 1, cy + 1) if (cx + 1, cy + 1) in start_tiles else (cx, cy),
         ]
     
     # Create units
@@ -369,146 +365,32 @@ def generate_world(state: GameState):
     
     # Reveal fog around all initial units
     for unit in state.units:
-        for (tx, ty) in unit.get_vision_tiles():
-            state.fog_grid[ty][tx] = True
+        state.fog.reveal_around(int(unit.x), int(unit.y), unit.vision_range)
+    state.fog.take_dirty()
+    state.rebuild_indexes()
         
     state.selected_region = state.player_region_id
     
     # Generate resource nodes
-    state.resource_nodes = generate_resource_nodes(state.biome_grid, state.region_grid, state.region_seeds)
+    if progress:
+        progress("resources")
+    state.resource_nodes = generate_resource_nodes(state.biome_grid, state.region_grid, state.region_seeds,
+                                                   mg.stage_rng(seed, "resources"))
     # Build O(1) resource map
     state.resource_map = { (n.x, n.y): n for n in state.resource_nodes }
     
-    # Calculate initial player resources
-    calculate_player_resources(state)
+    # Income ledgers of every faction from the new nodes
+    state.rebuild_income()
     
     # Check for fully explored regions (including player region)
     check_all_regions_explored(state)
+
+    # Unit path planner, built here on the generation thread instead of at
+    # the first order
+    state.pathfinder = Pathfinder(state.biome_grid, state.region_grid)
     
-    # Always save newly generated map as debug map for future use
-    save_map_state(state, "debug_map.pkl")
-
-
-def save_map_state(state: GameState, filename: str):
-    """Save the current map state to a file for debug purposes"""
-    data = {
-        "biome_grid": state.biome_grid,
-        "region_seeds": state.region_seeds,
-        "region_grid": state.region_grid,
-        "region_info": state.region_info,
-        "coast_edge": state.coast_edge,
-        "player_region_id": state.player_region_id,
-        "player_region_mask": state.player_region_mask,
-        "player_region_center": state.player_region_center,
-        "player_grid_x": state.player_grid_x,
-        "player_grid_y": state.player_grid_y,
-        "adjacent_regions_cache": state.adjacent_regions_cache
-    }
-    try:
-        with open(filename, "wb") as f:
-            pickle.dump(data, f)
-        print(f"Debug map saved to {filename}")
-    except Exception as e:
-        print(f"Failed to save debug map: {e}")
-
-
-def load_map_state(state: GameState, filename: str) -> bool:
-    """Load map state from a file. Returns True if successful."""
-    if not os.path.exists(filename):
-        return False
-        
-    try:
-        with open(filename, "rb") as f:
-            data = pickle.load(f)
-            
-        state.biome_grid = data["biome_grid"]
-        state.region_seeds = data["region_seeds"]
-        state.region_grid = data["region_grid"]
-        state.region_info = data["region_info"]
-        state.coast_edge = data["coast_edge"]
-        state.player_region_id = data["player_region_id"]
-        state.player_region_mask = data["player_region_mask"]
-        state.player_region_center = data["player_region_center"]
-        state.player_grid_x = data["player_grid_x"]
-        state.player_grid_y = data["player_grid_y"]
-        state.adjacent_regions_cache = data.get("adjacent_regions_cache") # Might be missing in old saves
-        
-        # Reset explored status since fog is reset
-        if state.region_info:
-            for r_info in state.region_info:
-                r_info["explored"] = False
-        
-        # Reset other state
-        state.selected_region = state.player_region_id
-        state.highlight_frames_remaining = 0
-        state.zoom_mode = True
-        state.zoom_region_id = 0
-        
-        # Calculate zoom origin
-        if state.player_region_mask:
-            xs = [p[0] for p in state.player_region_mask]
-            ys = [p[1] for p in state.player_region_mask]
-            cx = (min(xs) + max(xs)) // 2
-            cy = (min(ys) + max(ys)) // 2
-            
-            scale = C.ZOOM_SCALE
-            view_w = (C.SCREEN_WIDTH - C.INFO_PANEL_WIDTH) // (C.TILE_SIZE * scale)
-            view_h = C.SCREEN_HEIGHT // (C.TILE_SIZE * scale)
-            
-            ox = cx - view_w // 2
-            oy = cy - view_h // 2
-            
-            ox = max(0, min(C.BASE_GRID_WIDTH - view_w, ox))
-            oy = max(0, min(C.BASE_GRID_HEIGHT - view_h, oy))
-            
-            state.zoom_origin = (ox, oy)
-            state.zoom_bounds = (min(xs), min(ys), max(xs), max(ys))
-        else:
-            state.zoom_origin = (0, 0)
-            state.zoom_bounds = (0, 0, 0, 0)
-            
-        cache_manager.invalidate_all(state)
-        
-        # Reset fog
-        state.fog_grid = [[False for _ in range(C.BASE_GRID_WIDTH)] for _ in range(C.BASE_GRID_HEIGHT)]
-        
-        # Reveal SEA and 1 tile around it
-        for y in range(C.BASE_GRID_HEIGHT):
-            for x in range(C.BASE_GRID_WIDTH):
-                if state.biome_grid[y][x] == "SEA":
-                    for dy in range(-1, 2):
-                        for dx in range(-1, 2):
-                            nx, ny = x + dx, y + dy
-                            if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                                state.fog_grid[ny][nx] = True
-        
-        # Reveal player region
-        if state.player_region_mask:
-            for (mx, my) in state.player_region_mask:
-                state.fog_grid[my][mx] = True
-                for dx in (-1, 0, 1):
-                    for dy in (-1, 0, 1):
-                        nx, ny = mx + dx, my + dy
-                        if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                            state.fog_grid[ny][nx] = True
-                            
-        # Spawn explorer
-        state.units = []
-        cx, cy = state.player_region_center
-        explorer = Explorer(x=float(cx), y=float(cy))
-        state.units.append(explorer)
-        
-        for (tx, ty) in explorer.get_vision_tiles():
-            state.fog_grid[ty][tx] = True
-            
-        # Check for fully explored regions
-        check_all_regions_explored(state)
-            
-        print(f"Debug map loaded from {filename}")
-        return True
-    except Exception as e:
-        print(f"Failed to load debug map: {e}")
-        return False
+    if state.use_map_cache:
+        map_cache.store(key, state)
 
 
 def build_adjacent_regions_cache(state: GameState):
@@ -516,13 +398,11 @@ def build_adjacent_regions_cache(state: GameState):
     adjacent = set()
     adjacent.add(state.player_region_id)  # Player region itself is considered "adjacent"
     
-    for px, py in state.player_region_mask:
-        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-            nx, ny = px + dx, py + dy
-            if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                neighbor_rid = state.region_grid[ny][nx]
-                if neighbor_rid != -1 and neighbor_rid != state.player_region_id:
-                    adjacent.add(neighbor_rid)
+    player_mask = state.player_region_mask
+    if player_mask is not None:
+        # Regions of every tile next to a territory tile
+        neighbor_rids = np.unique(state.region_grid[state.territory.neighbor_mask(state.player_faction_id)])
+        adjacent.update(int(rid) for rid in neighbor_rids if rid != -1)
     
     # Check if player region is an island (only adjacent to water regions)
     # If so, add the nearest land region
@@ -545,11 +425,10 @@ def build_adjacent_regions_cache(state: GameState):
         nearest_distance = float('inf')
         
         # Calculate center of player region
-        if state.player_region_mask:
-            player_xs = [p[0] for p in state.player_region_mask]
-            player_ys = [p[1] for p in state.player_region_mask]
-            player_cx = sum(player_xs) / len(player_xs)
-            player_cy = sum(player_ys) / len(player_ys)
+        if state.territory is not None and state.territory.count(state.player_faction_id):
+            player_ys, player_xs = np.nonzero(player_mask)
+            player_cx = float(player_xs.mean())
+            player_cy = float(player_ys.mean())
             
             # Check all regions
             for rid, info in enumerate(state.region_info):
@@ -590,27 +469,6 @@ def is_adjacent_to_player_region(state: GameState, target_rid: int) -> bool:
     return target_rid in state.adjacent_regions_cache
 
 
-def calculate_player_resources(state: GameState):
-    """
-    Calculate player's food and gold from resource nodes in their territory.
-    Food = sum of development from FISH, FARM, ANIMAL nodes
-    Gold = sum of development from GOLD, SILVER nodes
-    """
-    food = 0
-    gold = 0
-    
-    for node in state.resource_nodes:
-        # Check if node is in player territory
-        if (node.x, node.y) in state.player_region_mask:
-            if node.type in ("FISH", "FARM", "ANIMAL"):
-                food += node.development
-            elif node.type in ("GOLD", "SILVER"):
-                gold += node.development
-    
-    state.food = food
-    state.gold = gold
-
-
 def get_region_center(state: GameState, region_id: int) -> Optional[Tuple[int, int]]:
     """Get the center point of a region (uses region seed)"""
     if not state.region_seeds or region_id >= len(state.region_seeds):
@@ -622,27 +480,32 @@ def get_region_center(state: GameState, region_id: int) -> Optional[Tuple[int, i
 
 def check_all_regions_explored(state: GameState):
     """Check all regions and mark them as explored if all their tiles are revealed."""
-    if not state.region_info or not state.fog_grid or not state.region_grid:
+    if not state.region_info or state.region_index is None:
         return
 
-    # Reset explored status
-    for r_info in state.region_info:
-        r_info["explored"] = False
-        r_info["_revealed_count"] = 0 # Temporary counter
-
-    # Count revealed tiles
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            rid = state.region_grid[y][x]
-            if rid is not None and rid >= 0 and rid < len(state.region_info):
-                if state.fog_grid[y][x]:
-                    state.region_info[rid]["_revealed_count"] = state.region_info[rid].get("_revealed_count", 0) + 1
-
-    # Check against total size
-    for r_info in state.region_info:
-        if r_info["size"] > 0 and r_info.get("_revealed_count", 0) == r_info["size"]:
-            r_info["explored"] = True
-        
-        # Clean up temporary counter
-        if "_revealed_count" in r_info:
-            del r_info["_revealed_count"]
+    for rid, r_info in enumerate(state.region_info):
+        r_info["explored"] = state.region_index.is_explored(rid)
+
+
+def order_exploration(units, region_id: int):
+    """Send explorers to explore a region (they pick fog targets themselves)."""
+    for unit in units:
+        unit.target_region_id = region_id
+        unit.target_x = None  # Reset current target to force recalculation
+        unit.target_y = None
+
+
+def order_conquest(state: GameState, units, region_id: int, region_center: Tuple[int, int]):
+    """Send conquistadors to a region's center and start tracking its territory expansion."""
+    for unit in units:
+        unit.conquering_region_id = region_id
+        unit.target_x = float(region_center[0])
+        unit.target_y = float(region_center[1])
+        unit.target_region_id = None  # Stop exploration if any
+
+    # Initialize territory expansion tracking
+    if region_id not in state.territory_expansion_regions:
+        state.territory_expansion_regions[region_id] = {
+            "tiles": set(),
+            "progress": 0
+        }
@@ -0,0 +1,64 @@
+"""
+Compact integer-coded world grids.
+
+The biome grid is a (H, W) uint8 array of biome codes and the region grid a
+(H, W) int16 array of region ids (-1 = no region). Both are row-major NumPy
+arrays indexed as grid[y, x].
+
+Biome codes are the positions of the biome names in C.BIOME_COLORS, so the
+lookup tables below (indexed by code) always match the palette.
+"""
+from typing import Iterable, List
+
+import numpy as np
+
+import config as C
+
+BIOME_DTYPE = np.uint8
+REGION_DTYPE = np.int16
+
+# code -> biome name, and the reverse
+BIOMES = tuple(C.BIOME_COLORS)
+BIOME_CODES = {name: code for code, name in enumerate(BIOMES)}
+
+SEA = BIOME_CODES["SEA"]
+LAKE = BIOME_CODES["LAKE"]
+
+# Lookup tables indexed by biome code
+IS_WATER = np.array([name in ("SEA", "LAKE") for name in BIOMES], dtype=bool)
+BIOME_PALETTE = np.array([C.BIOME_COLORS[name] for name in BIOMES], dtype=np.uint8)
+
+
+def biome_name(code) -> str:
+    """Biome name of one code."""
+    return BIOMES[int(code)]
+
+
+def biome_codes(names: Iterable[str]) -> List[int]:
+    """Codes for a list of biome names (e.g. the biomes of a resource type)."""
+    return [BIOME_CODES[name] for name in names]
+
+
+def encode_biomes(names) -> np.ndarray:
+    """Nested lists (or an array) of biome names -> uint8 code grid."""
+    return np.array([[BIOME_CODES[b] for b in row] for row in names], dtype=BIOME_DTYPE)
+
+
+def decode_biomes(biome_grid: np.ndarray) -> List[List[str]]:
+    """uint8 code grid -> nested lists of biome names."""
+    return np.asarray(BIOMES, dtype=object)[biome_grid].tolist()
+
+
+def region_array(region_grid) -> np.ndarray:
+    """Nested lists (or any int array) of region ids -> int16 region grid."""
+    return np.asarray(region_grid, dtype=REGION_DTYPE)
+
+
+def water_mask(biome_grid: np.ndarray) -> np.ndarray:
+    """Boolean (H, W) array, True on SEA / LAKE tiles."""
+    return IS_WATER[biome_grid]
+
+
+def is_water(biome_grid: np.ndarray, x: int, y: int) -> bool:
+    """True if tile (x, y) is SEA or LAKE."""
+    return bool(IS_WATER[biome_grid[y, x]])
@@ -0,0 +1,281 @@
+"""
+Headless simulation runner and tick-throughput benchmark.
+
+Loads a save slot or generates a world, advances it N days with scripted
+unit orders, and reports ticks per second, allocations and per-subsystem
+timing. No window is opened (SDL's dummy video driver is used), so it runs
+on a CI box.
+
+Orders come from a JSON script, a list of
+    {"day": 3, "unit": "explorer", "order": "explore", "region": 12}
+    {"day": 5, "unit": 3, "order": "conquer", "region": 7}
+    {"day": 1, "unit": "colonist", "order": "move", "to": [40, 25]}
+where "unit" is a unit type (every unit of that type) or an index into
+state.units. Without a script, idle explorers and conquistadors are sent
+to the nearest region they can explore / conquer at the start of each day.
+
+Usage:
+    python headless.py [--seed N | --slot N] [--days N] [--script FILE]
+                       [--trace FILE] [--no-stages] [--tracemalloc]
+                       [--no-ai] [--ai-pool]
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import config as C
+import simulation
+from ai import AIScheduler
+from frame_profiler import PROFILER
+from game_system import generate_world, get_region_center, order_conquest, order_exploration
+from state import GameState
+
+
+def load_world(args) -> GameState:
+    """Load the save slot or generate the world selected on the command line."""
+    if args.slot is not None:
+        import save_manager
+        state = save_manager.load_game(args.slot)
+        if state is None:
+            sys.exit(f"Save slot {args.slot} could not be loaded")
+        return state
+
+    state = GameState()
+    state.world_seed = args.seed
+    state.use_map_cache = not args.no_map_cache
+    generate_world(state)
+    return state
+
+
+def _units_for(state, selector):
+    """Units addressed by an order: an index into state.units or a unit type."""
+    if isinstance(selector, int):
+        return [state.units[selector]] if 0 <= selector < len(state.units) else []
+    return [u for u in state.units if u.unit_type == selector]
+
+
+def apply_order(state, order) -> bool:
+    """
+    Carry out one scripted order.
+
+    Returns:
+        True if the order could be given
+    """
+    units = _units_for(state, order.get("unit"))
+    kind = order.get("order")
+    if not units:
+        return False
+    if kind == "explore":
+        order_exploration([u for u in units if u.unit_type == "explorer"], int(order["region"]))
+    elif kind == "conquer":
+        center = get_region_center(state, int(order["region"]))
+        if center is None:
+            return False
+        order_conquest(state, [u for u in units if u.unit_type == "conquistador"], int(order["region"]), center)
+    elif kind == "move":
+        tx, ty = order["to"]
+        for unit in units:
+            unit.set_target(float(tx), float(ty))
+    else:
+        return False
+    return True
+
+
+def _nearest_region(state, unit, candidates):
+    """Candidate region whose center is closest to the unit (None if none)."""
+    best = None
+    best_dist = None
+    for rid in candidates:
+        center = get_region_center(state, rid)
+        if center is None:
+            continue
+        dist = (center[0] - unit.x) ** 2 + (center[1] - unit.y) ** 2
+        if best_dist is None or dist < best_dist:
+            best, best_dist = rid, dist
+    return best
+
+
+def auto_orders(state) -> int:
+    """
+    Give idle explorers the nearest explorable region and idle conquistadors
+    the nearest explored region not conquered yet.
+
+    Returns:
+        Number of orders given
+    """
+    info = state.region_info or []
+    land = state.region_index.land_sizes
+    explored = [i for i, r in enumerate(info) if r.get("explored", False)]
+    explorable = {n for rid in explored for n in info[rid].get("neighbors", ())
+                  if n < len(info) and not info[n].get("explored", False) and land[n] > 0}
+    conquerable = [rid for rid in explored
+                   if rid != state.player_region_id and land[rid] > 0
+                   and rid not in state.territory_expansion_regions]
+
+    given = 0
+    for unit in state.units:
+        if unit.target_x is not None:
+            continue
+        if unit.unit_type == "explorer" and unit.target_region_id is None:
+            rid = _nearest_region(state, unit, explorable)
+            if rid is not None:
+                order_exploration([unit], rid)
+                explorable.discard(rid)
+                given += 1
+        elif unit.unit_type == "conquistador" and unit.conquering_region_id is None:
+            rid = _nearest_region(state, unit, conquerable)
+            if rid is not None:
+                order_conquest(state, [unit], rid, get_region_center(state, rid))
+                conquerable.remove(rid)
+                given += 1
+    return given
+
+
+def run(state, days, script, answer="no", ai=None):
+    """
+    Advance the world `days` days. Each day is one PROFILER frame, so the
+    stage timings are per day.
+
+    Args:
+        state: GameState to simulate
+        days: Days to run
+        script: Scripted orders, or None for automatic orders
+        answer: "yes" / "no" answer given to every confirmation dialog
+        ai: AIScheduler run once per day, or None to leave the AI factions idle
+
+    Returns:
+        (ticks run, orders given, seconds spent)
+    """
+    orders = sorted(script or [], key=lambda o: o.get("day", 1))
+    next_order = 0
+    given = 0
+    ticks = 0
+    started = time.perf_counter()
+    for _ in range(days):
+        t = PROFILER.start()
+        if script is None:
+            given += auto_orders(state)
+        else:
+            while next_order < len(orders) and orders[next_order].get("day", 1) <= state.day:
+                given += apply_order(state, orders[next_order])
+                next_order += 1
+        PROFILER.stop("orders", t)
+
+        day = state.day
+        while state.day == day:
+            simulation.tick(state)
+            ticks += 1
+            if state.confirm_dialog:
+                state.confirm_dialog["on_yes" if answer == "yes" else "on_no"]()
+                state.confirm_dialog = None
+
+        if ai is not None:
+            t = PROFILER.start()
+            ai.update(state)
+            PROFILER.stop("ai", t)
+
+        # Nothing draws the map here: drop the fog rectangles and map damage
+        if state.fog is not None:
+            state.fog.take_dirty()
+        state.map_damage = set()
+        PROFILER.end_frame()
+    return ticks, given, time.perf_counter() - started
+
+
+def _world_summary(state):
+    info = state.region_info or []
+    explored = sum(1 for r in info if r.get("explored", False))
+    revealed = int(state.fog.mask().sum()) if state.fog is not None else 0
+    total = C.BASE_GRID_WIDTH * C.BASE_GRID_HEIGHT
+    player = state.factions[state.player_faction_id] if state.factions else None
+    territory = player.territory_size if player is not None else 0
+    ai_territory = sum(f.territory_size for f in state.factions if not f.is_player)
+    return (f"day {state.day}, explored regions {explored}/{len(info)}, "
+            f"revealed {revealed / total * 100:.1f}%, player territory {territory} tiles, "
+            f"AI territory {ai_territory} tiles")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", type=int, default=42, help="world seed to generate (default 42)")
+    parser.add_argument("--slot", type=int, default=None, help="load this save slot instead of generating")
+    parser.add_argument("--no-map-cache", action="store_true", help="always generate, never use the map cache")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--script", default=None, help="JSON file of scripted orders")
+    parser.add_argument("--answer", choices=("yes", "no"), default="no", help="answer to confirmation dialogs")
+    parser.add_argument("--no-ai", action="store_true", help="leave the AI factions idle")
+    parser.add_argument("--ai-pool", action="store_true",
+                        help="plan heavy AI searches in worker processes (results arrive on later days)")
+    parser.add_argument("--trace", default=None, help="write per-day stage timings to a .csv / .json file")
+    parser.add_argument("--no-stages", action="store_true",
+                        help="skip the per-stage timers (their overhead is included in ticks/s otherwise)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="trace allocation sites (slows the run down; ticks/s is not comparable)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    state = load_world(args)
+    print(f"world: {'slot ' + str(args.slot) if args.slot is not None else 'seed ' + str(state.world_seed)}"
+          f" ready in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    print(f"start: {_world_summary(state)}")
+
+    script = None
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+
+    if not args.no_stages:
+        PROFILER.toggle()
+        if args.trace:
+            PROFILER.start_trace()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    gc.collect()
+    gc_before = [s["collections"] for s in gc.get_stats()]
+    blocks_before = sys.getallocatedblocks()
+
+    # No frame budget here: every decision due runs the day it is due
+    ai = None if args.no_ai else AIScheduler(budget_ms=None, use_pool=args.ai_pool)
+    ticks, given, seconds = run(state, args.days, script, args.answer, ai)
+    if ai is not None:
+        ai.shutdown()
+
+    blocks_after = sys.getallocatedblocks()
+    gc_after = [s["collections"] for s in gc.get_stats()]
+    snapshot = tracemalloc.take_snapshot() if args.tracemalloc else None
+    peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    if args.tracemalloc:
+        tracemalloc.stop()
+
+    print(f"end:   {_world_summary(state)}")
+    print(f"ran {args.days} days / {ticks} ticks in {seconds:.2f} s: {ticks / seconds:,.0f} ticks/s"
+          f" ({seconds / max(1, args.days) * 1000:.1f} ms/day), {given} orders")
+    print(f"allocated blocks: {blocks_after - blocks_before:+,}, "
+          f"gc collections (gen0/1/2): {'/'.join(str(a - b) for a, b in zip(gc_after, gc_before))}")
+    if snapshot is not None:
+        print(f"tracemalloc peak: {peak / 1024:,.0f} KiB, top allocation sites:")
+        for stat in snapshot.statistics("lineno")[:10]:
+            print(f"  {stat}")
+
+    if args.no_stages:
+        return
+    print(f"{'per day (ms)':<14}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}"
+          f"  (last {min(args.days, C.PROFILER_WINDOW)} days)")
+    for row in PROFILER.summary():
+        print(f"{row['stage']:<14}{row['mean']:>9.2f}{row['p50']:>9.2f}{row['p95']:>9.2f}{row['max']:>9.2f}")
+
+    if args.trace:
+        PROFILER.stop_trace(args.trace)
+
+
+if __name__ == "__main__":
+    main()
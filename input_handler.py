@@ -1,8 +1,9 @@
 import pygame
 import time
 import config as C
+import grids
 from state import GameState
-from game_system import build_adjacent_regions_cache, get_region_center
+from game_system import build_adjacent_regions_cache, get_region_center, order_conquest, order_exploration
 
 def handle_zoom_click(state: GameState, mx: int, my: int, button: int):
     # Handle Unit List Button Clicks
@@ -43,7 +44,7 @@ def handle_zoom_click(state: GameState, mx: int, my: int, button: int):
         if view_x0 <= gx <= view_x1 and view_y0 <= gy <= view_y1:
             # Right click
             if button == 3:
-                target_rid = state.region_grid[gy][gx]
+                target_rid = int(state.region_grid[gy, gx])
                 
                 # Check if conquistador is selected and region is explored
                 selected_conquistadors = [u for u in state.units if u.selected and u.unit_type == "conquistador"]
@@ -53,18 +54,7 @@ def handle_zoom_click(state: GameState, mx: int, my: int, button: int):
                         region_center = get_region_center(state, target_rid)
                         if region_center:
                             def start_conquest():
-                                for unit in selected_conquistadors:
-                                    unit.conquering_region_id = target_rid
-                                    unit.target_x = float(region_center[0])
-                                    unit.target_y = float(region_center[1])
-                                    unit.target_region_id = None  # Stop exploration if any
-                                
-                                # Initialize territory expansion tracking
-                                if target_rid not in state.territory_expansion_regions:
-                                    state.territory_expansion_regions[target_rid] = {
-                                        "tiles": set(),
-                                        "progress": 0
-                                    }
+                                order_conquest(state, selected_conquistadors, target_rid, region_center)
                             
                             def cancel_conquest():
                                 pass
@@ -77,7 +67,7 @@ def handle_zoom_click(state: GameState, mx: int, my: int, button: int):
                         return
                 
                 # Check biome first - cannot explore SEA or LAKE
-                if state.biome_grid[gy][gx] in ("SEA", "LAKE"):
+                if grids.is_water(state.biome_grid, gx, gy):
                     return
                 
                 # Cannot explore if already explored
@@ -92,20 +82,13 @@ def handle_zoom_click(state: GameState, mx: int, my: int, button: int):
                 # Debug Exploration (No unit selected)
                 if not any(u.selected for u in state.units):
                     def force_explore():
-                        # Reveal all tiles in region
-                        for y in range(C.BASE_GRID_HEIGHT):
-                            for x in range(C.BASE_GRID_WIDTH):
-                                if state.region_grid[y][x] == target_rid:
-                                    state.fog_grid[y][x] = True
+                        # Reveal all tiles in region (fog surfaces are patched next tick)
+                        state.fog.reveal_tiles(state.region_index.tiles(target_rid))
                         
                         # Mark as explored
                         if state.region_info and target_rid < len(state.region_info):
                             state.region_info[target_rid]["explored"] = True
                         
-                        # Update surfaces
-                        state.fog_surface = None
-                        state.zoom_fog_layer = None
-                        
                         # Add to territory expansion if needed? No, just explore.
                     
                     def cancel_explore():
@@ -133,10 +116,7 @@ def handle_zoom_click(state: GameState, mx: int, my: int, button: int):
                 
                 if can_explore:
                     def start_exploration():
-                        for unit in selected_units:
-                            unit.target_region_id = target_rid
-                            unit.target_x = None
-                            unit.target_y = None
+                        order_exploration(selected_units, target_rid)
                     
                     def cancel_exploration():
                         pass
@@ -171,11 +151,11 @@ def handle_zoom_click(state: GameState, mx: int, my: int, button: int):
             if state.region_seeds:
                 for idx, (sx, sy) in enumerate(state.region_seeds):
                     # Check visibility (fog)
-                    if not state.debug_fog_off and state.fog_grid and not state.fog_grid[sy][sx]:
+                    if not state.debug_fog_off and state.fog is not None and not state.fog.is_revealed(sx, sy):
                         continue
                     
                     # Skip SEA and LAKE
-                    if state.biome_grid[sy][sx] in ("SEA", "LAKE"):
+                    if grids.is_water(state.biome_grid, sx, sy):
                         continue
 
                     if sx == gx and sy == gy:
@@ -237,13 +217,15 @@ def handle_world_click(state: GameState, mx: int, my: int, back_button_rect: pyg
         # Reset units
         state.units = []
         
-        # Reset resources
-        state.food = 0
-        state.gold = 0
+        # Reset resources and territory (food / gold income follows from the territory)
         state.resource_nodes = []
+        state.territory = None
+        state.factions = []
         
         # Reset fog
-        state.fog_grid = None
+        state.fog = None
+        state.region_index = None
+        state.lake_index = None
         state.fog_surface = None
         state.debug_fog_off = False
         
@@ -253,8 +235,7 @@ def handle_world_click(state: GameState, mx: int, my: int, back_button_rect: pyg
         
         # Reset caches
         state.map_surface = None
-        state.zoom_full_map_cache = None
-        state.zoom_fog_layer = None
+        state.zoom_chunks = None
         state.adjacent_regions_cache = None
         
         return
@@ -269,7 +250,7 @@ def handle_world_click(state: GameState, mx: int, my: int, back_button_rect: pyg
     if 0 <= gx < C.BASE_GRID_WIDTH and 0 <= gy < C.BASE_GRID_HEIGHT:
         # Right click = automated exploration or conquest
         if button == 3:  # Right mouse button
-            target_rid = state.region_grid[gy][gx]
+            target_rid = int(state.region_grid[gy, gx])
             
             # Check if conquistador is selected and region is explored
             selected_conquistadors = [u for u in state.units if u.selected and u.unit_type == "conquistador"]
@@ -279,18 +260,7 @@ def handle_world_click(state: GameState, mx: int, my: int, back_button_rect: pyg
                     region_center = get_region_center(state, target_rid)
                     if region_center:
                         def start_conquest():
-                            for unit in selected_conquistadors:
-                                unit.conquering_region_id = target_rid
-                                unit.target_x = float(region_center[0])
-                                unit.target_y = float(region_center[1])
-                                unit.target_region_id = None  # Stop exploration if any
-                            
-                            # Initialize territory expansion tracking
-                            if target_rid not in state.territory_expansion_regions:
-                                state.territory_expansion_regions[target_rid] = {
-                                    "tiles": set(),
-                                    "progress": 0
-                                }
+                            order_conquest(state, selected_conquistadors, target_rid, region_center)
                         
                         def cancel_conquest():
                             pass
@@ -314,19 +284,12 @@ def handle_world_click(state: GameState, mx: int, my: int, back_button_rect: pyg
             # Debug Exploration (No unit selected)
             if not any(u.selected for u in state.units):
                 def force_explore():
-                    # Reveal all tiles in region
-                    for y in range(C.BASE_GRID_HEIGHT):
-                        for x in range(C.BASE_GRID_WIDTH):
-                            if state.region_grid[y][x] == target_rid:
-                                state.fog_grid[y][x] = True
+                    # Reveal all tiles in region (fog surfaces are patched next tick)
+                    state.fog.reveal_tiles(state.region_index.tiles(target_rid))
                     
                     # Mark as explored
                     if state.region_info and target_rid < len(state.region_info):
                         state.region_info[target_rid]["explored"] = True
-                    
-                    # Update surfaces
-                    state.fog_surface = None
-                    state.zoom_fog_layer = None
                 
                 def cancel_explore():
                     pass
@@ -355,10 +318,7 @@ def handle_world_click(state: GameState, mx: int, my: int, back_button_rect: pyg
                 return
                 
             def start_exploration():
-                for unit in selected_units:
-                    unit.target_region_id = target_rid
-                    unit.target_x = None # Reset current target to force recalculation
-                    unit.target_y = None
+                order_exploration(selected_units, target_rid)
             
             def cancel_exploration():
                 pass
@@ -394,7 +354,7 @@ def handle_world_click(state: GameState, mx: int, my: int, back_button_rect: pyg
             
             # Double-click detection for zoom
             current_time = time.time()
-            rid = state.region_grid[gy][gx]
+            rid = int(state.region_grid[gy, gx])
             
             # Check if this is a double-click on the same position
             is_double_click = False
@@ -413,17 +373,10 @@ def handle_world_click(state: GameState, mx: int, my: int, back_button_rect: pyg
                 # Zoom into the region (no fog check needed)
                 state.zoom_mode = True
                 state.zoom_region_id = rid
-                xs = []
-                ys = []
-                for yy in range(C.BASE_GRID_HEIGHT):
-                    for xx in range(C.BASE_GRID_WIDTH):
-                        if state.region_grid[yy][xx] == rid:
-                            xs.append(xx)
-                            ys.append(yy)
-                if xs and ys:
-                    xmin, xmax = min(xs), max(xs)
-                    ymin, ymax = min(ys), max(ys)
-                    state.zoom_bounds = (xmin, ymin, xmax, ymax)
+                bbox = state.region_index.bbox(rid)
+                if bbox is not None:
+                    xmin, ymin, xmax, ymax = bbox
+                    state.zoom_bounds = bbox
                     
                     # Center on the region seed (generation start point)
                     if state.region_seeds and rid < len(state.region_seeds):
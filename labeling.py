@@ -0,0 +1,128 @@
+"""
+Connected-component labeling kernel shared by the map generation passes.
+Labels 4-connected runs of equal grid values in one vectorized union-find
+sweep and reports component ids, sizes and bounding boxes.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class Components:
+    """
+    Result of label_components.
+
+    Attributes:
+        labels: (H, W) int array, component id per tile or -1 outside the mask
+        count: Number of components
+        sizes: Tile count per component
+        bboxes: (count, 4) array of (xmin, ymin, xmax, ymax) per component
+        values: Grid value of each component
+
+    Component ids follow raster order of each component's first tile.
+    """
+
+    def __init__(self, labels, sizes, bboxes, values, order, starts):
+        self.labels = labels
+        self.count = len(sizes)
+        self.sizes = sizes
+        self.bboxes = bboxes
+        self.values = values
+        self._order = order
+        self._starts = starts
+
+    def members(self, label: int) -> np.ndarray:
+        """Flat (y * W + x) tile indices of one component, in raster order."""
+        start = self._starts[label]
+        end = self._starts[label + 1] if label + 1 < self.count else len(self._order)
+        return self._order[start:end]
+
+    def tiles(self, label: int) -> List[Tuple[int, int]]:
+        """(x, y) tiles of one component, in raster order."""
+        width = self.labels.shape[1]
+        flat = self.members(label)
+        return list(zip((flat % width).tolist(), (flat // width).tolist()))
+
+    def touches_border(self) -> np.ndarray:
+        """Boolean per component: any tile on the outer edge of the grid."""
+        height, width = self.labels.shape
+        b = self.bboxes
+        return (b[:, 0] == 0) | (b[:, 1] == 0) | (b[:, 2] == width - 1) | (b[:, 3] == height - 1)
+
+
+def _union_find(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Vectorized union-find (min-hooking + pointer jumping). Root = min index."""
+    parent = np.arange(n, dtype=np.int64)
+    while a.size:
+        pa = parent[a]
+        pb = parent[b]
+        live = pa != pb
+        if not live.any():
+            break
+        a, b, pa, pb = a[live], b[live], pa[live], pb[live]
+        np.minimum.at(parent, np.maximum(pa, pb), np.minimum(pa, pb))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    return parent
+
+
+def label_components(grid: np.ndarray, mask: Optional[np.ndarray] = None) -> Components:
+    """
+    Label 4-connected components of equal values in `grid`.
+
+    Args:
+        grid: 2D array; neighbours join when their values are equal
+        mask: Optional boolean array; tiles outside it are never labeled
+
+    Returns:
+        Components
+    """
+    grid = np.asarray(grid)
+    height, width = grid.shape
+    n = height * width
+    if mask is None:
+        mask = np.ones(grid.shape, dtype=bool)
+
+    idx = np.arange(n, dtype=np.int64).reshape(height, width)
+    h_join = mask[:, :-1] & mask[:, 1:] & (grid[:, :-1] == grid[:, 1:])
+    v_join = mask[:-1, :] & mask[1:, :] & (grid[:-1, :] == grid[1:, :])
+    a = np.concatenate((idx[:, :-1][h_join], idx[:-1, :][v_join]))
+    b = np.concatenate((idx[:, 1:][h_join], idx[1:, :][v_join]))
+    parent = _union_find(n, a, b)
+
+    positions = np.flatnonzero(mask)
+    roots, inverse = np.unique(parent[positions], return_inverse=True)
+    labels = np.full(n, -1, dtype=np.int64)
+    labels[positions] = inverse
+    labels = labels.reshape(height, width)
+
+    sizes = np.bincount(inverse, minlength=len(roots))
+    order = positions[np.argsort(inverse, kind="stable")]
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+    if len(roots):
+        xs = order % width
+        ys = order // width
+        bboxes = np.stack((
+            np.minimum.reduceat(xs, starts),
+            np.minimum.reduceat(ys, starts),
+            np.maximum.reduceat(xs, starts),
+            np.maximum.reduceat(ys, starts),
+        ), axis=1)
+    else:
+        bboxes = np.empty((0, 4), dtype=np.int64)
+    values = grid.ravel()[roots]
+
+    return Components(labels, sizes, bboxes, values, order, starts)
+
+
+def neighbor_mask(mask: np.ndarray) -> np.ndarray:
+    """Tiles 4-adjacent to any True tile of `mask` (excluding the tiles themselves)."""
+    out = np.zeros_like(mask)
+    out[1:, :] |= mask[:-1, :]
+    out[:-1, :] |= mask[1:, :]
+    out[:, 1:] |= mask[:, :-1]
+    out[:, :-1] |= mask[:, 1:]
+    return out & ~mask
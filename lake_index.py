@@ -0,0 +1,107 @@
+"""
+Lake perimeter index for auto-exploration.
+A lake (the LAKE tiles of one region) is auto-explored once every tile on its
+perimeter is revealed. The perimeters are worked out once per world, and each
+lake keeps a count of perimeter tiles still hidden, so a reveal only touches
+the lakes bordering the revealed tiles.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+import grids
+
+
+class LakeIndex:
+    """
+    Perimeters and hidden-perimeter counters of every lake.
+
+    Attributes:
+        tiles: region id -> (x, y) lake tiles of that region
+        hidden: region id -> perimeter tiles not revealed yet (lakes with a perimeter only)
+        ready: Lakes whose perimeter was already fully revealed at build time
+    """
+
+    def __init__(self, width: int, tiles: Dict[int, List[Tuple[int, int]]],
+                 perimeter_of: Dict[int, Tuple[int, ...]], hidden: Dict[int, int]):
+        self._width = width
+        self.tiles = tiles
+        # flat tile index (y * W + x) -> lakes whose perimeter contains the tile
+        self._perimeter_of = perimeter_of
+        self.hidden = hidden
+        self.ready = [rid for rid, count in hidden.items() if count == 0]
+
+    @classmethod
+    def build(cls, biome_grid: np.ndarray, region_grid: np.ndarray, revealed: np.ndarray) -> "LakeIndex":
+        """
+        Index the lakes of a world.
+
+        Args:
+            biome_grid: (H, W) biome code grid
+            region_grid: (H, W) region id grid
+            revealed: (H, W) boolean array of revealed tiles
+
+        Returns:
+            LakeIndex with counters matching `revealed`
+        """
+        height, width = biome_grid.shape
+        lake = (biome_grid == grids.LAKE) & (region_grid >= 0)
+        lake_ys, lake_xs = np.nonzero(lake)
+        lake_rids = region_grid[lake_ys, lake_xs].astype(np.int64)
+
+        tiles: Dict[int, List[Tuple[int, int]]] = {}
+        for x, y, rid in zip(lake_xs.tolist(), lake_ys.tolist(), lake_rids.tolist()):
+            tiles.setdefault(rid, []).append((x, y))
+
+        # Perimeter: 4-neighbours of a lake's tiles that are not part of that lake
+        # (-1 marks tiles outside every lake)
+        lake_of = np.where(lake, region_grid, -1).astype(np.int64)
+        pair_flat = []
+        pair_rid = []
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nx = lake_xs + dx
+            ny = lake_ys + dy
+            inside = (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+            nx, ny, rids = nx[inside], ny[inside], lake_rids[inside]
+            outside_lake = lake_of[ny, nx] != rids
+            pair_flat.append(ny[outside_lake] * width + nx[outside_lake])
+            pair_rid.append(rids[outside_lake])
+        pairs = np.unique(np.stack((np.concatenate(pair_flat), np.concatenate(pair_rid)), axis=1), axis=0)
+
+        perimeter_of: Dict[int, Tuple[int, ...]] = {}
+        hidden: Dict[int, int] = {}
+        revealed_flat = revealed.ravel().tolist()
+        for flat, rid in pairs.tolist():
+            perimeter_of[flat] = perimeter_of.get(flat, ()) + (rid,)
+            hidden[rid] = hidden.get(rid, 0) + (not revealed_flat[flat])
+
+        return cls(width, tiles, perimeter_of, hidden)
+
+    def take_ready(self) -> List[int]:
+        """Return and clear the lakes that were complete at build time."""
+        ready = self.ready
+        self.ready = []
+        return ready
+
+    def on_revealed(self, revealed: Iterable[Tuple[int, int]]) -> List[int]:
+        """
+        Count newly revealed tiles against the lake perimeters.
+
+        Args:
+            revealed: (x, y) tiles that just became revealed (each at most once)
+
+        Returns:
+            Lakes whose whole perimeter became revealed, in completion order
+        """
+        completed = []
+        perimeter_of = self._perimeter_of
+        hidden = self.hidden
+        width = self._width
+        for x, y in revealed:
+            lakes = perimeter_of.get(y * width + x)
+            if lakes:
+                for rid in lakes:
+                    hidden[rid] -= 1
+                    if hidden[rid] == 0:
+                        completed.append(rid)
+        return completed
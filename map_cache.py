@@ -0,0 +1,94 @@
+"""
+On-disk cache of generated worlds.
+A finished world is stored under a key hashed from everything that decides
+its content (world seed, noise frequencies, grid size, generator version),
+so starting the same world again loads it instead of regenerating.
+"""
+import hashlib
+import os
+import pickle
+from typing import Optional
+
+import config as C
+import mapgen as mg
+
+
+def cache_key(world_seed: int, elev_freq: float, humid_freq: float) -> str:
+    """Content key of a world. Floats use repr() so any change gives a new key."""
+    parts = (
+        mg.GENERATOR_VERSION,
+        C.BASE_GRID_WIDTH,
+        C.BASE_GRID_HEIGHT,
+        int(world_seed),
+        repr(float(elev_freq)),
+        repr(float(humid_freq)),
+    )
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(C.MAP_CACHE_DIR, f"{key}.pkl")
+
+
+def load(key: str) -> Optional[object]:
+    """
+    Load a cached world.
+
+    Args:
+        key: Key from cache_key
+
+    Returns:
+        The cached GameState, or None on a miss or an unreadable entry
+    """
+    path = _cache_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            world = pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring broken map cache entry {path}: {e}")
+        return None
+    # Mark as recently used so pruning keeps it
+    os.utime(path)
+    return world
+
+
+def store(key: str, state) -> bool:
+    """
+    Write a freshly generated world to the cache and prune old entries.
+    The file is written under a temporary name and renamed into place, so a
+    crash never leaves a half-written entry behind.
+
+    Returns:
+        True if successful
+    """
+    os.makedirs(C.MAP_CACHE_DIR, exist_ok=True)
+    path = _cache_path(key)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Failed to write map cache: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    _prune()
+    return True
+
+
+def _prune():
+    """Drop the least recently used entries beyond C.MAP_CACHE_MAX_ENTRIES."""
+    entries = [
+        os.path.join(C.MAP_CACHE_DIR, name)
+        for name in os.listdir(C.MAP_CACHE_DIR)
+        if name.endswith(".pkl")
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[C.MAP_CACHE_MAX_ENTRIES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,22 +1,43 @@
-import math
 import random
 from typing import List, Tuple, Dict
+import numpy as np
 import config as C
+import noise_engine as ne
+import grids
+from spatial_index import SeedIndex
+from labeling import label_components, neighbor_mask
 
-# Noise seeds
-noise_seed_elev = random.randrange(1_000_000)
-noise_seed_humid = random.randrange(1_000_000)
-noise_seed_voronoi = random.randrange(1_000_000)
-noise_seed_boundary = random.randrange(1_000_000)
+# Bump whenever generation output for the same inputs changes
+# (invalidates the on-disk map cache)
+GENERATOR_VERSION = 2
 
-# domain warp seeds
-warp_seed_x = random.randrange(1_000_000)
-warp_seed_y = random.randrange(1_000_000)
+# Noise seeds drawn from a world seed, in draw order
+NOISE_SEED_NAMES = ("elev", "humid", "boundary", "warp_x", "warp_y", "voronoi")
+
+
+def new_world_seed() -> int:
+    """Draw a fresh world seed."""
+    return random.randrange(1, 1_000_000_000)
+
+
+def stage_rng(world_seed: int, stage: str) -> random.Random:
+    """
+    Independent random stream for one generation stage.
+
+    Each stage gets its own stream, so changing how many numbers one stage
+    draws does not shift the output of the others.
+    """
+    return random.Random(f"{world_seed}/{stage}")
+
+
+def noise_seeds(world_seed: int) -> Dict[str, int]:
+    """Noise lattice seeds of a world (see NOISE_SEED_NAMES)."""
+    rng = stage_rng(world_seed, "noise")
+    return {name: rng.randrange(1_000_000) for name in NOISE_SEED_NAMES}
 
 
 def _hash_val(seed: int, ix: int, iy: int) -> float:
-    rnd = random.Random(seed + ix * 374761393 + iy * 668265263)
-    return rnd.random()
+    return ne.hash_val(seed, ix, iy)
 
 
 def _smoothstep(t: float) -> float:
@@ -79,89 +100,83 @@ def classify_biome(elev: float, humid: float, jitter: float = 0.0) -> str:
     return "GRASSLAND"
 
 
-def generate_biome_map(elev_freq=C.elev_freq, humid_freq=C.humid_freq):
-    # Generate new seeds for each map generation
-    noise_seed_elev = random.randrange(1_000_000)
-    noise_seed_humid = random.randrange(1_000_000)
-    noise_seed_boundary = random.randrange(1_000_000)
-    warp_seed_x = random.randrange(1_000_000)
-    warp_seed_y = random.randrange(1_000_000)
+def classify_biome_grid(elev: np.ndarray, humid: np.ndarray, jitter: np.ndarray) -> np.ndarray:
+    """Vectorized classify_biome. Returns an array of biome names."""
+    conditions = [
+        elev < 0.32,
+        elev > 0.85,
+        elev > 0.70,
+        (humid > 0.78 + jitter) & (elev < 0.55),
+        humid > 0.62,
+        humid > 0.45,
+        humid < 0.30,
+    ]
+    choices = ["LAKE", "ALPINE", "MOUNTAIN", "SWAMP", "FOREST", "GRASSLAND", "ARID"]
+    return np.select(conditions, choices, default="GRASSLAND").astype(object)
+
+
+def generate_biome_map(world_seed: int, elev_freq=C.elev_freq, humid_freq=C.humid_freq, progress=None):
+    """
+    Build the biome grid of a world.
+
+    Returns:
+        (biome_grid, edge_side): uint8 biome code grid (see grids) and the
+        map edge forced to sea
+    """
+    # All randomness comes from per-stage streams of the world seed
+    seeds = noise_seeds(world_seed)
+    noise_seed_elev = seeds["elev"]
+    noise_seed_humid = seeds["humid"]
+    noise_seed_boundary = seeds["boundary"]
+    warp_seed_x = seeds["warp_x"]
+    warp_seed_y = seeds["warp_y"]
+    sea_rng = stage_rng(world_seed, "sea")
+    coast_rng = stage_rng(world_seed, "coast")
+
+    # Whole-grid noise pass (see noise_engine)
+    xs, ys = ne.grid_coords(C.BASE_GRID_WIDTH, C.BASE_GRID_HEIGHT)
+    wx = ne.value_noise_grid(warp_seed_x, xs * C.warp_freq, ys * C.warp_freq) * C.warp_amp
+    wy = ne.value_noise_grid(warp_seed_y, xs * C.warp_freq, ys * C.warp_freq) * C.warp_amp
+    sx = xs + wx
+    sy = ys + wy
+    e = ne.fbm_grid(noise_seed_elev, sx, sy, elev_freq, octaves=4, gain=0.55)
+    h = ne.fbm_grid(noise_seed_humid, sx + 1000, sy - 500, humid_freq, octaves=3, gain=0.6)
+    swamp_jitter = (ne.value_noise_grid(noise_seed_boundary, xs * 0.25, ys * 0.25) - 0.5) * 0.15
+    biomes = classify_biome_grid(e, h, swamp_jitter)
+
+    if progress:
+        progress("sea")
 
-    biome_grid: List[List[str]] = []
-    for y in range(C.BASE_GRID_HEIGHT):
-        row_b = []
-        for x in range(C.BASE_GRID_WIDTH):
-            wx = value_noise(warp_seed_x, x * C.warp_freq, y * C.warp_freq) * C.warp_amp
-            wy = value_noise(warp_seed_y, x * C.warp_freq, y * C.warp_freq) * C.warp_amp
-            sx = x + wx
-            sy = y + wy
-            e = fbm(noise_seed_elev, sx, sy, elev_freq, octaves=4, gain=0.55)
-            h = fbm(noise_seed_humid, sx + 1000, sy - 500, humid_freq, octaves=3, gain=0.6)
-            swamp_jitter = (value_noise(noise_seed_boundary, x * 0.25, y * 0.25) - 0.5) * 0.15
-            row_b.append(classify_biome(e, h, swamp_jitter))
-        biome_grid.append(row_b)
-    
     # Store boundary seed for sea generation use
     # Force one edge to SEA with variable width and jaggedness
-    edge_side = random.choice(["top", "bottom", "left", "right"])
-    sea_width = random.randint(15, 45)
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            if edge_side == "top":
-                dist = y
-            elif edge_side == "bottom":
-                dist = C.BASE_GRID_HEIGHT - 1 - y
-            elif edge_side == "left":
-                dist = x
-            else:
-                dist = C.BASE_GRID_WIDTH - 1 - x
-            n1 = (value_noise(noise_seed_boundary, x * C.SEA_JITTER_FREQ, y * C.SEA_JITTER_FREQ) - 0.5) * C.SEA_JITTER_AMP
-            n2 = (value_noise(noise_seed_boundary + 999, x * C.SEA_JITTER_FREQ * 0.4, y * C.SEA_JITTER_FREQ * 0.4) - 0.5) * (C.SEA_JITTER_AMP * 0.6)
-            jitter = int(n1 + n2)
-            if dist <= sea_width + jitter:
-                biome_grid[y][x] = "SEA"
-
-    # Merge lakes touching sea into sea (iterate until stable)
-    changed = True
-    while changed:
-        changed = False
-        for y in range(C.BASE_GRID_HEIGHT):
-            for x in range(C.BASE_GRID_WIDTH):
-                if biome_grid[y][x] != "LAKE":
-                    continue
-                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                        if biome_grid[ny][nx] == "SEA":
-                            biome_grid[y][x] = "SEA"
-                            changed = True
-                            break
+    edge_side = sea_rng.choice(["top", "bottom", "left", "right"])
+    sea_width = sea_rng.randint(15, 45)
+    if edge_side == "top":
+        dist = ys
+    elif edge_side == "bottom":
+        dist = C.BASE_GRID_HEIGHT - 1 - ys
+    elif edge_side == "left":
+        dist = xs
+    else:
+        dist = C.BASE_GRID_WIDTH - 1 - xs
+    n1 = (ne.value_noise_grid(noise_seed_boundary, xs * C.SEA_JITTER_FREQ, ys * C.SEA_JITTER_FREQ) - 0.5) * C.SEA_JITTER_AMP
+    n2 = (ne.value_noise_grid(noise_seed_boundary + 999, xs * C.SEA_JITTER_FREQ * 0.4, ys * C.SEA_JITTER_FREQ * 0.4) - 0.5) * (C.SEA_JITTER_AMP * 0.6)
+    jitter = np.trunc(n1 + n2)
+    biomes[dist <= sea_width + jitter] = "SEA"
+
+    # Merge lakes touching sea into sea (whole lake components at once)
+    lake = biomes == "LAKE"
+    lakes = label_components(lake, mask=lake)
+    touching = np.unique(lakes.labels[lake & neighbor_mask(biomes == "SEA")])
+    biomes[np.isin(lakes.labels, touching)] = "SEA"
 
     # Convert isolated SEA components (not touching border) to LAKE
-    visited = [[False for _ in range(C.BASE_GRID_WIDTH)] for _ in range(C.BASE_GRID_HEIGHT)]
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            if visited[y][x] or biome_grid[y][x] != "SEA":
-                continue
-            stack = [(x, y)]
-            comp = []
-            touches_border = False
-            while stack:
-                cx, cy = stack.pop()
-                if visited[cy][cx] or biome_grid[cy][cx] != "SEA":
-                    continue
-                visited[cy][cx] = True
-                comp.append((cx, cy))
-                if cx == 0 or cy == 0 or cx == C.BASE_GRID_WIDTH - 1 or cy == C.BASE_GRID_HEIGHT - 1:
-                    touches_border = True
-                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                    nx, ny = cx + dx, cy + dy
-                    if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                        if not visited[ny][nx] and biome_grid[ny][nx] == "SEA":
-                            stack.append((nx, ny))
-            if not touches_border:
-                for cx, cy in comp:
-                    biome_grid[cy][cx] = "LAKE"
+    sea = biomes == "SEA"
+    seas = label_components(sea, mask=sea)
+    inland = np.flatnonzero(~seas.touches_border())
+    biomes[np.isin(seas.labels, inland)] = "LAKE"
+
+    biome_grid: List[List[str]] = biomes.tolist()
 
     def is_water(nx, ny):
         return 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT and biome_grid[ny][nx] in ("SEA", "LAKE")
@@ -189,7 +204,7 @@ def generate_biome_map(elev_freq=C.elev_freq, humid_freq=C.humid_freq):
             nx, ny = bx + dx, by + dy
             if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
                 if biome_grid[ny][nx] not in ("SEA", "LAKE", "BEACH"):
-                    if random.random() < 0.3:
+                    if coast_rng.random() < 0.3:
                         biome_grid[ny][nx] = "BEACH"
 
     # ensure orthogonal beaches
@@ -219,13 +234,13 @@ def generate_biome_map(elev_freq=C.elev_freq, humid_freq=C.humid_freq):
             if biome_grid[y][x] == "BEACH":
                 if is_water(x - 1, y) or is_water(x + 1, y) or is_water(x, y - 1) or is_water(x, y + 1):
                     coastal_land.append((x, y))
-    random.shuffle(coastal_land)
+    coast_rng.shuffle(coastal_land)
     patch_count = min(8, len(coastal_land) // 20)
     for _ in range(patch_count):
         if not coastal_land:
             break
         sx, sy = coastal_land.pop()
-        target = random.randint(4, 10)
+        target = coast_rng.randint(4, 10)
         stack = [(sx, sy)]
         visited_patch = set()
         while stack and target > 0:
@@ -257,7 +272,9 @@ def generate_biome_map(elev_freq=C.elev_freq, humid_freq=C.humid_freq):
                     if biome_grid[ny][nx] not in ("SEA", "LAKE"):
                         neighbors.append(biome_grid[ny][nx])
             if neighbors:
-                majority = max(set(neighbors), key=neighbors.count)
+                # Ties go to the first neighbor in scan order (a set would
+                # make the pick depend on string hash randomization)
+                majority = max(neighbors, key=neighbors.count)
                 smoothed[y][x] = majority
     
     # Volcano generation - must have exactly 1 volcano per map
@@ -313,36 +330,47 @@ def generate_biome_map(elev_freq=C.elev_freq, humid_freq=C.humid_freq):
                 # If it's near water, we should probably turn water into Alpine to ensure the condition.
                 smoothed[ny][nx] = "ALPINE"
     
-    return smoothed, edge_side
+    return grids.encode_biomes(smoothed), edge_side
+
+
+def _most_common_neighbor(regions: np.ndarray, flat_tiles: np.ndarray, exclude: int) -> int:
+    """Most frequent region id 4-adjacent to the given tiles (ignoring -1 and `exclude`)."""
+    height, width = regions.shape
+    tx = flat_tiles % width
+    ty = flat_tiles // width
+    found = []
+    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        nx, ny = tx + dx, ty + dy
+        ok = (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+        n_rid = regions[ny[ok], nx[ok]]
+        found.append(n_rid[(n_rid != -1) & (n_rid != exclude)])
+    found = np.concatenate(found)
+    if not found.size:
+        return -1
+    return int(np.argmax(np.bincount(found)))
 
 
 def find_coastal_land(biome_grid):
-    candidates = []
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            if biome_grid[y][x] in ("SEA", "LAKE"):
-                continue
-            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                    if biome_grid[ny][nx] == "SEA":
-                        candidates.append((x, y))
-                        break
-    return candidates
+    """Land tiles 4-adjacent to SEA, in raster order."""
+    coastal = ~grids.water_mask(biome_grid) & neighbor_mask(biome_grid == grids.SEA)
+    ys, xs = np.nonzero(coastal)
+    return list(zip(xs.tolist(), ys.tolist()))
 
 
-def choose_player_start(biome_grid, edge_side):
+def choose_player_start(biome_grid, edge_side, rng: random.Random):
     coastal = find_coastal_land(biome_grid)
     if coastal:
-        return random.choice(coastal)
-    land = [(x, y) for y in range(C.BASE_GRID_HEIGHT) for x in range(C.BASE_GRID_WIDTH) if biome_grid[y][x] not in ("SEA", "LAKE")]
+        return rng.choice(coastal)
+    ys, xs = np.nonzero(~grids.water_mask(biome_grid))
+    land = list(zip(xs.tolist(), ys.tolist()))
     if land:
-        return random.choice(land)
+        return rng.choice(land)
     return C.BASE_GRID_WIDTH // 2, C.BASE_GRID_HEIGHT // 2
 
 
-def build_player_region_mask(biome_grid, start_x, start_y, edge_side, target_min=20, target_max=30):
-    target = random.randint(target_min, target_max)
+def build_player_region_mask(biome_grid, start_x, start_y, edge_side, rng: random.Random, target_min=20, target_max=30):
+    target = rng.randint(target_min, target_max)
+    water = grids.water_mask(biome_grid)
     visited = set()
     queue = [(start_x, start_y)]
     mask = set()
@@ -352,33 +380,33 @@ def build_player_region_mask(biome_grid, start_x, start_y, edge_side, target_min
         if (x, y) in visited:
             continue
         visited.add((x, y))
-        if biome_grid[y][x] in ("SEA", "LAKE"):
+        if water[y, x]:
             continue
         mask.add((x, y))
         for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
             nx, ny = x + dx, y + dy
             if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                if (nx, ny) not in visited and biome_grid[ny][nx] not in ("SEA", "LAKE"):
+                if (nx, ny) not in visited and not water[ny, nx]:
                     queue.append((nx, ny))
                 if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                    if biome_grid[ny][nx] not in ("SEA", "LAKE"):
+                    if not water[ny, nx]:
                         neighbors.append((nx, ny))
     while len(mask) < target and neighbors:
-        nx, ny = neighbors.pop(random.randrange(len(neighbors)))
-        if (nx, ny) not in mask and biome_grid[ny][nx] not in ("SEA", "LAKE"):
+        nx, ny = neighbors.pop(rng.randrange(len(neighbors)))
+        if (nx, ny) not in mask and not water[ny, nx]:
             mask.add((nx, ny))
     if len(mask) < target:
         extra = []
         for y in range(C.BASE_GRID_HEIGHT):
             for x in range(C.BASE_GRID_WIDTH):
-                if biome_grid[y][x] in ("SEA", "LAKE") or (x, y) in mask:
+                if water[y, x] or (x, y) in mask:
                     continue
                 for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1)):
                     nx, ny = x + dx, y + dy
                     if (nx, ny) in mask:
                         extra.append((x, y))
                         break
-        random.shuffle(extra)
+        rng.shuffle(extra)
         for x, y in extra:
             if len(mask) >= target:
                 break
@@ -389,29 +417,30 @@ def build_player_region_mask(biome_grid, start_x, start_y, edge_side, target_min
             for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
                 nx, ny = mx + dx, my + dy
                 if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                    if biome_grid[ny][nx] == "SEA":
+                    if biome_grid[ny, nx] == grids.SEA:
                         return True
         return False
 
     if not has_coast(mask):
         coastal = find_coastal_land(biome_grid)
         if coastal:
-            sx, sy = random.choice(coastal)
-            return build_player_region_mask(biome_grid, sx, sy, edge_side, target_min, target_max)
+            sx, sy = rng.choice(coastal)
+            return build_player_region_mask(biome_grid, sx, sy, edge_side, rng, target_min, target_max)
     return mask
 
 
-def pick_region_seeds(biome_grid, player_seed):
+def pick_region_seeds(biome_grid, player_seed, rng: random.Random):
     seeds = []
-    seed_count = random.randint(C.REGION_SEED_MIN, C.REGION_SEED_MAX)
+    water = grids.water_mask(biome_grid)
+    seed_count = rng.randint(C.REGION_SEED_MIN, C.REGION_SEED_MAX)
     seeds.append(player_seed)
     seen = {player_seed}
     attempts = seed_count * 30
     while len(seeds) < seed_count and attempts > 0:
         attempts -= 1
-        x = random.randrange(C.BASE_GRID_WIDTH)
-        y = random.randrange(C.BASE_GRID_HEIGHT)
-        if biome_grid[y][x] in ("SEA", "LAKE") or (x, y) in seen:
+        x = rng.randrange(C.BASE_GRID_WIDTH)
+        y = rng.randrange(C.BASE_GRID_HEIGHT)
+        if water[y, x] or (x, y) in seen:
             continue
         too_close = False
         for sx, sy in seeds:
@@ -425,33 +454,24 @@ def pick_region_seeds(biome_grid, player_seed):
     return seeds
 
 
-def assign_regions(biome_grid, seeds):
-    region_grid = [[-1 for _ in range(C.BASE_GRID_WIDTH)] for _ in range(C.BASE_GRID_HEIGHT)]
-    
-    # Voronoi generation
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            if biome_grid[y][x] in ("SEA", "LAKE"):
-                continue
-            best_id = None
-            best_dist = 1e9
-            noise_jitter = value_noise(noise_seed_voronoi, x * C.voronoi_freq, y * C.voronoi_freq) * C.REGION_NOISE_WEIGHT
-            for idx, (sx, sy) in enumerate(seeds):
-                dx = sx - x
-                dy = sy - y
-                d = math.sqrt(dx * dx + dy * dy) + noise_jitter
-                if d < best_dist:
-                    best_dist = d
-                    best_id = idx
-            region_grid[y][x] = best_id
+def assign_regions(biome_grid, seeds, noise_seed_voronoi: int, progress=None):
+    # Voronoi generation (nearest seed via bucketed SeedIndex)
+    water = grids.water_mask(biome_grid)
+    land_ys, land_xs = np.nonzero(~water)
+    noise_jitter = ne.value_noise_grid(noise_seed_voronoi, land_xs * C.voronoi_freq, land_ys * C.voronoi_freq) * C.REGION_NOISE_WEIGHT
+    index = SeedIndex(seeds, area=C.BASE_GRID_WIDTH * C.BASE_GRID_HEIGHT)
+    region_arr = np.full((C.BASE_GRID_HEIGHT, C.BASE_GRID_WIDTH), -1, dtype=np.int64)
+    region_arr[land_ys, land_xs] = index.nearest(land_xs, land_ys, noise_jitter)
+    region_grid = region_arr.tolist()
             
     # Smoothing (but protect seed positions)
     smoothed = [row[:] for row in region_grid]
     seed_positions = set(seeds)  # Create set of seed positions for fast lookup
+    is_water = water.tolist()  # Plain lists are faster for per-tile access
     
     for y in range(C.BASE_GRID_HEIGHT):
         for x in range(C.BASE_GRID_WIDTH):
-            if biome_grid[y][x] in ("SEA", "LAKE"):
+            if is_water[y][x]:
                 continue
             
             # Skip seed positions - don't smooth them
@@ -462,12 +482,15 @@ def assign_regions(biome_grid, seeds):
             for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
                 nx, ny = x + dx, y + dy
                 if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                    if biome_grid[ny][nx] not in ("SEA", "LAKE"):
+                    if not is_water[ny][nx]:
                         neighbors.append(region_grid[ny][nx])
             if neighbors:
                 majority = max(set(neighbors), key=neighbors.count)
                 smoothed[y][x] = majority
     
+    if progress:
+        progress("merge")
+
     # Post-process to fix disjoint regions
     smoothed, seeds = process_disjoint_regions(smoothed, biome_grid, seeds)
     
@@ -482,138 +505,80 @@ def merge_small_isolated_regions(region_grid, biome_grid, seeds):
     Merge small regions (<= 49 tiles) into the nearest land region.
     Player region (ID=0) is never merged.
     """
-    height = len(region_grid)
-    width = len(region_grid[0])
     threshold = 49
-    
-    # 1. Identify regions and their properties
-    region_stats = {} # rid -> {tiles: [], neighbors: set()}
-    
-    for y in range(height):
-        for x in range(width):
-            rid = region_grid[y][x]
-            if rid == -1: continue
-            
-            if rid not in region_stats:
-                region_stats[rid] = {"tiles": [], "neighbors": set()}
-            
-            region_stats[rid]["tiles"].append((x, y))
-            
-            # Check neighbors
-            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < width and 0 <= ny < height:
-                    n_rid = region_grid[ny][nx]
-                    if n_rid != -1 and n_rid != rid:
-                        region_stats[rid]["neighbors"].add(n_rid)
-    
+    regions = np.array(region_grid, dtype=np.int64)
+    comps = label_components(regions, mask=regions != -1)
+
+    # 1. Identify regions and their properties (first-appearance order)
+    region_tiles = {}
+    for label in range(comps.count):
+        region_tiles.setdefault(int(comps.values[label]), []).append(comps.members(label))
+    region_tiles = {rid: np.concatenate(parts) for rid, parts in region_tiles.items()}
+    region_sizes = {rid: len(tiles) for rid, tiles in region_tiles.items()}
+
+    region_neighbors = {rid: set() for rid in region_tiles}
+    for a, b in ((regions[:, :-1], regions[:, 1:]), (regions[:-1, :], regions[1:, :])):
+        edge = (a != -1) & (b != -1) & (a != b)
+        for ra, rb in set(zip(a[edge].tolist(), b[edge].tolist())):
+            region_neighbors[ra].add(rb)
+            region_neighbors[rb].add(ra)
+
     # 2. Find candidates for merging (all small regions except player region)
-    merge_candidates = []
-    for rid, stats in region_stats.items():
-        if rid == 0:  # Skip player region
-            continue
-        if len(stats["tiles"]) <= threshold:
-            merge_candidates.append(rid)
-    
-    # Track which regions were merged (to remove their seeds later)
-    merged_regions = set()
-    
+    merge_candidates = [rid for rid, size in region_sizes.items() if rid != 0 and size <= threshold]
+
+    # Track which regions were merged and into what
+    merged_into = {}
+
+    def resolve(rid):
+        while rid in merged_into:
+            rid = merged_into[rid]
+        return rid
+
     # 3. Merge candidates
     for rid in merge_candidates:
-        # First try to merge with direct neighbors
-        neighbors = region_stats[rid]["neighbors"]
+        # First try to merge with direct neighbors (the largest one)
+        target = -1
+        neighbors = sorted(region_neighbors[rid])
         if neighbors:
-            # Choose the largest neighbor
-            best_neighbor = None
-            best_size = 0
-            for n_rid in neighbors:
-                if n_rid in region_stats:
-                    size = len(region_stats[n_rid]["tiles"])
-                    if size > best_size:
-                        best_size = size
-                        best_neighbor = n_rid
-            
-            if best_neighbor is not None:
-                # Merge into best neighbor
-                for tx, ty in region_stats[rid]["tiles"]:
-                    region_grid[ty][tx] = best_neighbor
-                merged_regions.add(rid)
-                continue
-        
-        # If no direct neighbors, find nearest land tile of another region using BFS
-        queue = list(region_stats[rid]["tiles"])
-        visited = set(queue)
-        found = False
-        nearest_rid = -1
-        
-        idx = 0
-        while idx < len(queue):
-            cx, cy = queue[idx]
-            idx += 1
-            
-            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                nx, ny = cx + dx, cy + dy
-                if 0 <= nx < width and 0 <= ny < height:
-                    if (nx, ny) in visited:
-                        continue
-                    
-                    visited.add((nx, ny))
-                    target_rid = region_grid[ny][nx]
-                    
-                    if target_rid != -1 and target_rid != rid:
-                        # Found nearest land!
-                        nearest_rid = target_rid
-                        found = True
-                        break
-                    
-                    queue.append((nx, ny))
-            if found:
-                break
-        
-        if found and nearest_rid != -1:
-            # Merge
-            for tx, ty in region_stats[rid]["tiles"]:
-                region_grid[ty][tx] = nearest_rid
-            merged_regions.add(rid)
-    
+            target = max(neighbors, key=lambda n_rid: region_sizes[n_rid])
+        else:
+            # No direct neighbors: grow outwards until another region is reached
+            reached = np.zeros(regions.shape, dtype=bool)
+            reached.flat[region_tiles[rid]] = True
+            while True:
+                ring = neighbor_mask(reached)
+                if not ring.any():
+                    break
+                hits = ring & (regions != -1) & (regions != rid)
+                if hits.any():
+                    target = int(regions[hits][0])
+                    break
+                reached |= ring
+
+        if target == -1:
+            continue
+        target = resolve(target)
+        if target == rid:
+            continue
+        regions.flat[region_tiles[rid]] = target
+        merged_into[rid] = target
+
     # 4. Clean up seeds: remove seeds of merged regions
-    # Build new seeds list, excluding merged regions
-    new_seeds = []
-    for idx, seed in enumerate(seeds):
-        if idx not in merged_regions:
-            new_seeds.append(seed)
-    
+    new_seeds = [seed for idx, seed in enumerate(seeds) if idx not in merged_into]
+
     # 5. Remap region IDs to be contiguous (0, 1, 2, ...)
-    # This is necessary because we removed some region IDs
-    old_to_new = {}
+    remap = np.arange(max(len(seeds), int(regions.max()) + 1), dtype=np.int64)
     next_id = 0
-    
-    # First pass: create mapping for remaining regions
-    for idx, seed in enumerate(seeds):
-        if idx not in merged_regions:
-            old_to_new[idx] = next_id
+    for idx in range(len(seeds)):
+        if idx not in merged_into:
+            remap[idx] = next_id
             next_id += 1
-    
-    # Second pass: remap merged regions to their target
-    for rid in merged_regions:
-        # Find what this region was merged into
-        if rid < len(seeds) and region_stats.get(rid):
-            # Get any tile from the merged region to see what it became
-            tiles = region_stats[rid]["tiles"]
-            if tiles:
-                tx, ty = tiles[0]
-                target_rid = region_grid[ty][tx]
-                if target_rid in old_to_new:
-                    old_to_new[rid] = old_to_new[target_rid]
-    
-    # Third pass: update region_grid with new IDs
-    for y in range(height):
-        for x in range(width):
-            old_rid = region_grid[y][x]
-            if old_rid != -1 and old_rid in old_to_new:
-                region_grid[y][x] = old_to_new[old_rid]
-                
-    return region_grid, new_seeds
+    for rid in merged_into:
+        remap[rid] = remap[resolve(rid)]
+    owned = regions != -1
+    regions[owned] = remap[regions[owned]]
+
+    return regions, new_seeds
 
 
 
@@ -624,190 +589,85 @@ def process_disjoint_regions(region_grid, biome_grid, seeds):
     - Small components (< threshold) are merged into neighbors.
     - Large components (>= threshold) get a new ID.
     """
-    height = len(region_grid)
-    width = len(region_grid[0])
     threshold = 10 # Minimum size to be a separate region
-    
-    # We need to handle IDs dynamically as we add new ones
-    # First, let's map current IDs to their cells
-    # But strictly speaking, we should iterate over the grid to find connected components
-    
-    visited = [[False for _ in range(width)] for _ in range(height)]
-    new_region_grid = [row[:] for row in region_grid]
-    
-    # We will process region by region? No, just find all components
-    components = [] # List of (rid, [(x, y), ...])
-    
-    for y in range(height):
-        for x in range(width):
-            if biome_grid[y][x] in ("SEA", "LAKE") or visited[y][x]:
-                continue
-            
-            rid = region_grid[y][x]
-            if rid == -1: continue
-            
-            # BFS to find component
-            comp = []
-            queue = [(x, y)]
-            visited[y][x] = True
-            comp.append((x, y))
-            
-            idx = 0
-            while idx < len(queue):
-                cx, cy = queue[idx]
-                idx += 1
-                
-                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                    nx, ny = cx + dx, cy + dy
-                    if 0 <= nx < width and 0 <= ny < height:
-                        if not visited[ny][nx] and region_grid[ny][nx] == rid:
-                            visited[ny][nx] = True
-                            queue.append((nx, ny))
-                            comp.append((nx, ny))
-            
-            components.append((rid, comp))
-            
+
+    regions = np.array(region_grid, dtype=np.int64)
+    comps = label_components(regions, mask=~grids.water_mask(biome_grid) & (regions != -1))
+    new_regions = regions.copy()
+
     # Group components by original RID
     regions_comps = {}
-    for rid, comp in components:
-        if rid not in regions_comps:
-            regions_comps[rid] = []
-        regions_comps[rid].append(comp)
-        
+    for label in range(comps.count):
+        regions_comps.setdefault(int(comps.values[label]), []).append(label)
+
     next_id = len(seeds)
-    
-    for rid, comps in regions_comps.items():
-        # Sort by size, descending
-        comps.sort(key=len, reverse=True)
-        
-        # Largest component keeps the ID
-        # (We don't need to do anything for the first one as new_region_grid already has rid)
-        
-        # Process other components
-        for i in range(1, len(comps)):
-            comp = comps[i]
-            if len(comp) >= threshold:
-                # Assign new ID
-                new_id = next_id
-                next_id += 1
-                
-                # Calculate new seed using helper function
-                sx, sy = find_valid_seed(comp)
-                seeds.append((sx, sy))
-                
-                for cx, cy in comp:
-                    new_region_grid[cy][cx] = new_id
-            else:
-                # Merge into neighbor
-                # Find most frequent neighbor ID
-                neighbor_ids = []
-                for cx, cy in comp:
-                    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                        nx, ny = cx + dx, cy + dy
-                        if 0 <= nx < width and 0 <= ny < height:
-                            n_rid = new_region_grid[ny][nx] # Use new grid to chain merges? Or old?
-                            # Use new_region_grid to allow merging into already processed regions?
-                            # But risky if we merge into something that is about to change.
-                            # Let's use region_grid for neighbor lookup, but exclude own rid
-                            n_rid_old = region_grid[ny][nx]
-                            if n_rid_old != -1 and n_rid_old != rid:
-                                neighbor_ids.append(n_rid_old)
-                
-                if neighbor_ids:
-                    target_rid = max(set(neighbor_ids), key=neighbor_ids.count)
-                    for cx, cy in comp:
-                        new_region_grid[cy][cx] = target_rid
-                else:
-                    # No neighbors? (Isolated small island)
-                    # Keep original ID or make new? Let's make new to be safe, or keep original.
-                    # If we keep original, it remains a disjoint part (which we wanted to avoid).
-                    # But if it's an island, maybe it's fine?
-                    # The user said "disjointed regions ... separated by water".
-                    # If it's an island, it IS separated by water.
-                    # Maybe "disjointed" meant "part of Red region is here, and another part is way over there".
-                    # So if it's an island, it should probably be a NEW region.
-                    new_id = next_id
-                    next_id += 1
-                    sx, sy = find_valid_seed(comp)
-                    seeds.append((sx, sy))
-                    for cx, cy in comp:
-                        new_region_grid[cy][cx] = new_id
-
-    return new_region_grid, seeds
 
+    for rid, labels in regions_comps.items():
+        # Sort by size, descending; the largest component keeps the ID
+        labels.sort(key=lambda label: comps.sizes[label], reverse=True)
+
+        for label in labels[1:]:
+            members = comps.members(label)
+            if comps.sizes[label] < threshold:
+                # Merge into the most frequent neighbor (looked up in the original grid)
+                target_rid = _most_common_neighbor(regions, members, rid)
+                if target_rid != -1:
+                    new_regions.flat[members] = target_rid
+                    continue
 
-def summarize_regions(biome_grid, region_grid, seeds):
-    region_info = []
-    counts = []
-    for _ in range(len(seeds)):
-        region_info.append({"biome": None, "resources": {}, "dangers": {}, "size": 0, "seed": None, "distribution": {}, "neighbors": set()})
-        counts.append({})
+            # Large component, or a small island with no neighbors: new region
+            new_regions.flat[members] = next_id
+            next_id += 1
+            seeds.append(find_valid_seed(comps.tiles(label)))
 
-    for idx, seed in enumerate(seeds):
-        region_info[idx]["seed"] = seed
+    return new_regions, seeds
 
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            rid = region_grid[y][x]
-            if rid is None or rid < 0 or rid >= len(region_info):
-                continue
-            b = biome_grid[y][x]
-            region_info[rid]["size"] += 1
-            counts[rid][b] = counts[rid].get(b, 0) + 1
-            
-            # Check neighbors for adjacency graph
-            # Check right and bottom to avoid duplicates (and boundary checks)
-            for dx, dy in ((1, 0), (0, 1)):
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                    n_rid = region_grid[ny][nx]
-                    if n_rid != -1 and n_rid != rid:
-                        region_info[rid]["neighbors"].add(n_rid)
-                        region_info[n_rid]["neighbors"].add(rid)
+
+def summarize_regions(biome_grid, region_grid, seeds):
+    region_count = len(seeds)
+    region_info = []
+    for idx in range(region_count):
+        region_info.append({"biome": None, "resources": {}, "dangers": {}, "size": 0, "seed": seeds[idx], "distribution": {}, "neighbors": set()})
+
+    regions = np.asarray(region_grid, dtype=np.int64)
+    owned = (regions >= 0) & (regions < region_count)
+    rids = regions[owned]
+    sizes = np.bincount(rids, minlength=region_count)
+    # Tile count per (region, biome code)
+    counts = np.bincount(rids * len(grids.BIOMES) + biome_grid[owned], minlength=region_count * len(grids.BIOMES))
+    counts = counts.reshape(region_count, len(grids.BIOMES))
+
+    # Adjacency graph from right / bottom neighbour pairs
+    for a, b in ((regions[:, :-1], regions[:, 1:]), (regions[:-1, :], regions[1:, :])):
+        edge = (a >= 0) & (a < region_count) & (b != -1) & (a != b)
+        for ra, rb in set(zip(a[edge].tolist(), b[edge].tolist())):
+            region_info[ra]["neighbors"].add(rb)
+            region_info[rb]["neighbors"].add(ra)
 
     for rid, info in enumerate(region_info):
-        dist = {}
-        for biome_name, ct in counts[rid].items():
-            if info["size"] > 0:
-                dist[biome_name] = round(ct / info["size"] * 100)
-        info["distribution"] = dist
+        size = int(sizes[rid])
+        info["size"] = size
+        if size > 0:
+            info["distribution"] = {
+                grids.BIOMES[code]: round(int(ct) / size * 100)
+                for code, ct in enumerate(counts[rid]) if ct
+            }
     return region_info
 
 
 def add_water_regions(biome_grid, region_grid, seeds):
     next_id = len(seeds)
-    visited = [[False for _ in range(C.BASE_GRID_WIDTH)] for _ in range(C.BASE_GRID_HEIGHT)]
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            if visited[y][x] or region_grid[y][x] != -1:
-                continue
-            if biome_grid[y][x] not in ("SEA", "LAKE"):
-                continue
-            stack = [(x, y)]
-            comp = []
-            while stack:
-                cx, cy = stack.pop()
-                if visited[cy][cx] or region_grid[cy][cx] != -1:
-                    continue
-                if biome_grid[cy][cx] not in ("SEA", "LAKE"):
-                    continue
-                visited[cy][cx] = True
-                comp.append((cx, cy))
-                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                    nx, ny = cx + dx, cy + dy
-                    if 0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT:
-                        if not visited[ny][nx]:
-                            stack.append((nx, ny))
-            if comp:
-                for cx, cy in comp:
-                    region_grid[cy][cx] = next_id
-                sx, sy = find_valid_seed(comp)
-                seeds.append((sx, sy))
-                next_id += 1
-    return region_grid, seeds
-
-
-def jitter_point(x: float, y: float):
+    regions = np.array(region_grid, dtype=np.int64)
+    water = grids.water_mask(biome_grid) & (regions == -1)
+    comps = label_components(water, mask=water)
+    for label in range(comps.count):
+        regions.flat[comps.members(label)] = next_id
+        seeds.append(find_valid_seed(comps.tiles(label)))
+        next_id += 1
+    return regions, seeds
+
+
+def jitter_point(x: float, y: float, noise_seed_boundary: int):
     jx = (value_noise(noise_seed_boundary, x * C.BOUNDARY_NOISE_FREQ, y * C.BOUNDARY_NOISE_FREQ) - 0.5) * C.BOUNDARY_NOISE_WEIGHT
     jy = (value_noise(noise_seed_boundary + 12345, x * C.BOUNDARY_NOISE_FREQ, y * C.BOUNDARY_NOISE_FREQ) - 0.5) * C.BOUNDARY_NOISE_WEIGHT
     return x + jx, y + jy
@@ -0,0 +1,92 @@
+"""
+Batched noise engine for map generation.
+Evaluates value noise and fBm over whole coordinate arrays at once with NumPy.
+
+The lattice hash is a pure 32-bit integer hash, so the scalar helpers in
+mapgen (value_noise / fbm) and the grid versions here return identical values
+for the same seed and coordinates.
+"""
+import numpy as np
+
+# Lattice hash constants (shared by scalar and grid paths)
+HASH_PRIME_X = 374761393
+HASH_PRIME_Y = 668265263
+_MIX_1 = 0x7FEB352D
+_MIX_2 = 0x846CA68B
+_MASK32 = 0xFFFFFFFF
+_INV_2_32 = 1.0 / 4294967296.0
+
+
+def hash_val(seed: int, ix: int, iy: int) -> float:
+    """Hash one lattice corner to a float in [0, 1)."""
+    h = (seed + ix * HASH_PRIME_X + iy * HASH_PRIME_Y) & _MASK32
+    h ^= h >> 16
+    h = (h * _MIX_1) & _MASK32
+    h ^= h >> 15
+    h = (h * _MIX_2) & _MASK32
+    h ^= h >> 16
+    return h * _INV_2_32
+
+
+def hash_grid(seed: int, ix: np.ndarray, iy: np.ndarray) -> np.ndarray:
+    """Vectorized hash_val over integer lattice coordinate arrays."""
+    ux = (ix & _MASK32).astype(np.uint32)
+    uy = (iy & _MASK32).astype(np.uint32)
+    h = np.uint32(seed & _MASK32) + ux * np.uint32(HASH_PRIME_X) + uy * np.uint32(HASH_PRIME_Y)
+    h ^= h >> np.uint32(16)
+    h *= np.uint32(_MIX_1)
+    h ^= h >> np.uint32(15)
+    h *= np.uint32(_MIX_2)
+    h ^= h >> np.uint32(16)
+    return h.astype(np.float64) * _INV_2_32
+
+
+def _smoothstep(t: np.ndarray) -> np.ndarray:
+    return t * t * (3 - 2 * t)
+
+
+def value_noise_grid(seed: int, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Value noise for every (x, y) pair in the input arrays.
+    Lattice corners use truncation (int()) to match the scalar value_noise.
+    """
+    fx0 = np.trunc(x)
+    fy0 = np.trunc(y)
+    sx = _smoothstep(x - fx0)
+    sy = _smoothstep(y - fy0)
+
+    x0 = fx0.astype(np.int64)
+    y0 = fy0.astype(np.int64)
+    x1 = x0 + 1
+    y1 = y0 + 1
+
+    n00 = hash_grid(seed, x0, y0)
+    n10 = hash_grid(seed, x1, y0)
+    n01 = hash_grid(seed, x0, y1)
+    n11 = hash_grid(seed, x1, y1)
+
+    ix0 = n00 + (n10 - n00) * sx
+    ix1 = n01 + (n11 - n01) * sx
+    return ix0 + (ix1 - ix0) * sy
+
+
+def fbm_grid(seed: int, x: np.ndarray, y: np.ndarray, freq: float, octaves=3, lacunarity=2.0, gain=0.5) -> np.ndarray:
+    """Fractal sum of value_noise_grid, normalized and clamped to [0, 1]."""
+    amp = 1.0
+    total = np.zeros(np.shape(x), dtype=np.float64)
+    max_total = 0.0
+    fx = x * freq
+    fy = y * freq
+    for _ in range(octaves):
+        total += value_noise_grid(seed, fx, fy) * amp
+        max_total += amp
+        amp *= gain
+        fx = fx * lacunarity
+        fy = fy * lacunarity
+    return np.clip(total / max_total, 0.0, 1.0)
+
+
+def grid_coords(width: int, height: int):
+    """Return float (xs, ys) coordinate arrays of shape (height, width)."""
+    ys, xs = np.mgrid[0:height, 0:width]
+    return xs.astype(np.float64), ys.astype(np.float64)
@@ -0,0 +1,621 @@
+"""
+Unit pathfinding over the biome grid.
+
+Every biome has a movement cost (C.BIOME_MOVE_COSTS, SEA / LAKE cannot be
+entered). Paths are 8-connected and never cut the corner of an impassable
+tile.
+
+Goals on another land mass are rejected at once (land masses are labeled
+when the planner is built). Short trips first try a plain A* over the
+tiles, limited to PATH_LOCAL_MAX_NODES expansions. A trip within one
+region that needs more runs an A* kept inside the region, with no limit:
+the region bounds it. Trips between regions use a region-level
+abstraction in the style of HPA*, built once per world:
+- entrances: tile pairs across the border of two neighbouring regions,
+  one per PATH_ENTRANCE_SPACING border tiles
+- one distance field per entrance over its own region, all computed at
+  once with vectorized sweeps (the fields of different regions are
+  disjoint, so the k-th entrance of every region shares one layer)
+- an abstract graph of the entrances whose edges are those distances, and
+  the cost between every two entrances over it (Floyd-Warshall)
+Such a query picks the cheapest (start region entrance, goal region
+entrance) pair from that table and follows the abstract edges between
+them; the tile path is read back by walking down the entrance fields, so
+it costs neither a tile search nor a graph search. If the two tiles are
+connected only through a stretch of border without an entrance, an
+unlimited tile A* finds the path.
+
+When several units are sent to the same goal, a flow field towards it
+(the cost of every entrance to the goal) is kept and shared: each further
+order picks the best entrance of its own region, and the tile path from
+an entrance to the goal is stitched once and reused by later orders.
+
+Finished paths are cached by (start, goal). Everything is derived from the
+biome and region grids and is rebuilt only when they are replaced; tile
+ownership does not change movement costs. The fields and the entrance
+table are stored with the world (see tables()), so a loaded game does not
+compute them again.
+"""
+import heapq
+import math
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config as C
+import grids
+from labeling import label_components
+
+SQRT2 = math.sqrt(2.0)
+# Step cost of a move that is not allowed. Finite so the sweeps can use
+# cumulative sums; distances at or above UNREACHABLE mean "no path".
+BLOCKED = 1e6
+UNREACHABLE = BLOCKED / 2
+MAX_SWEEPS = 64
+
+# Movement cost per biome code (inf = impassable)
+MOVE_COST = np.array([np.inf if C.BIOME_MOVE_COSTS[name] is None else C.BIOME_MOVE_COSTS[name]
+                      for name in grids.BIOMES], dtype=np.float64)
+MIN_COST = float(MOVE_COST[np.isfinite(MOVE_COST)].min())
+
+# Arrays of Pathfinder.tables()
+TABLE_NAMES = ("path_nodes", "path_fields", "path_parents", "path_costs")
+
+# (dx, dy, length) of the 8 moves
+MOVES = ((1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+         (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2))
+
+
+def _octile(ax: int, ay: int, bx: int, by: int) -> float:
+    dx = abs(ax - bx)
+    dy = abs(ay - by)
+    return max(dx, dy) + (SQRT2 - 1.0) * min(dx, dy)
+
+
+def _step_costs(cost: np.ndarray, region_grid: np.ndarray):
+    """
+    Costs of the moves between neighbouring tiles of the same region, as
+    h (H, W-1): (x, y)-(x+1, y), v (H-1, W): (x, y)-(x, y+1),
+    d1 (H-1, W-1): (x, y)-(x+1, y+1) and d2 (H-1, W-1): (x+1, y)-(x, y+1).
+    A move costs the mean of its two tiles' costs times its length.
+    """
+    passable = np.isfinite(cost)
+    c = np.where(passable, cost, 0.0)
+
+    def step(a, b, pa, pb, ra, rb, length, extra=None):
+        ok = pa & pb & (ra == rb)
+        if extra is not None:
+            ok &= extra
+        return np.where(ok, (a + b) * (0.5 * length), BLOCKED)
+
+    h = step(c[:, :-1], c[:, 1:], passable[:, :-1], passable[:, 1:],
+             region_grid[:, :-1], region_grid[:, 1:], 1.0)
+    v = step(c[:-1, :], c[1:, :], passable[:-1, :], passable[1:, :],
+             region_grid[:-1, :], region_grid[1:, :], 1.0)
+    # Diagonals also need both corner tiles passable
+    corners = passable[:-1, 1:] & passable[1:, :-1]
+    d1 = step(c[:-1, :-1], c[1:, 1:], passable[:-1, :-1], passable[1:, 1:],
+              region_grid[:-1, :-1], region_grid[1:, 1:], SQRT2, corners)
+    corners = passable[:-1, :-1] & passable[1:, 1:]
+    d2 = step(c[:-1, 1:], c[1:, :-1], passable[:-1, 1:], passable[1:, :-1],
+              region_grid[:-1, 1:], region_grid[1:, :-1], SQRT2, corners)
+    return h, v, d1, d2
+
+
+def _scan_row(row: np.ndarray, cum: np.ndarray) -> np.ndarray:
+    """Relax a (L, W) row along itself both ways (cum: cumulative move costs from x = 0)."""
+    row = np.minimum(row, np.minimum.accumulate(row - cum, axis=1) + cum)
+    row = np.minimum(row, np.minimum.accumulate((row + cum)[:, ::-1], axis=1)[:, ::-1] - cum)
+    # Only reached through a blocked move
+    row[row >= UNREACHABLE] = np.inf
+    return row
+
+
+def distance_fields(sources: np.ndarray, h, v, d1, d2) -> np.ndarray:
+    """
+    Shortest move cost from the source tiles of each layer to every tile.
+
+    Rows are relaxed top to bottom and back (each row also along itself)
+    until nothing changes; every layer is swept at once. A row is relaxed
+    from a neighbouring row only if that row changed since.
+
+    Args:
+        sources: (L, H, W) bool, the tiles of distance 0 of each layer
+        h, v, d1, d2: Move costs from _step_costs
+
+    Returns:
+        (L, H, W) float64 distances, inf where unreachable
+    """
+    # Rows of all layers side by side: (H, L, W)
+    dist = np.where(sources, 0.0, np.inf).transpose(1, 0, 2).copy()
+    height = dist.shape[0]
+    zero = np.zeros((h.shape[0], 1))
+    cums = np.concatenate((zero, np.cumsum(h, axis=1)), axis=1)
+    for y in range(height):
+        dist[y] = _scan_row(dist[y], cums[y])
+
+    # Pass counter of each row's last change, and of its last relaxation
+    # from the row above / below
+    changed = [0] * height
+    from_above = [-1] * height
+    from_below = [-1] * height
+    step = 0
+    for _ in range(MAX_SWEEPS):
+        step += 1
+        last_change = max(changed)
+        for y in range(1, height):
+            if changed[y - 1] < from_above[y]:
+                continue
+            from_above[y] = step
+            prev = dist[y - 1]
+            row = np.minimum(dist[y], prev + v[y - 1])
+            row[:, 1:] = np.minimum(row[:, 1:], prev[:, :-1] + d1[y - 1])
+            row[:, :-1] = np.minimum(row[:, :-1], prev[:, 1:] + d2[y - 1])
+            row = _scan_row(row, cums[y])
+            if not np.array_equal(row, dist[y]):
+                dist[y] = row
+                changed[y] = step
+        step += 1
+        for y in range(height - 2, -1, -1):
+            if changed[y + 1] < from_below[y]:
+                continue
+            from_below[y] = step
+            prev = dist[y + 1]
+            row = np.minimum(dist[y], prev + v[y])
+            row[:, :-1] = np.minimum(row[:, :-1], prev[:, 1:] + d1[y])
+            row[:, 1:] = np.minimum(row[:, 1:], prev[:, :-1] + d2[y])
+            row = _scan_row(row, cums[y])
+            if not np.array_equal(row, dist[y]):
+                dist[y] = row
+                changed[y] = step
+        if max(changed) == last_change:
+            break
+    return dist.transpose(1, 0, 2)
+
+
+def _downhill(dist: np.ndarray, h, v, d1, d2) -> np.ndarray:
+    """
+    For every tile of each layer, the move one step closer to the layer's
+    sources along a shortest path, as an index into _downhill_offsets; -1 at
+    the sources and on unreachable tiles.
+    """
+    best = np.full(dist.shape, np.inf)
+    parent = np.full(dist.shape, -1, dtype=np.int8)
+
+    def consider(dst, src, step, code):
+        # dst / src: slices of the (H, W) plane; step: move costs between them
+        cand = dist[(slice(None),) + src] + step
+        best_dst = best[(slice(None),) + dst]
+        better = cand < best_dst
+        np.copyto(best_dst, cand, where=better)
+        parent[(slice(None),) + dst][better] = code
+
+    all_, head, tail = slice(None), slice(None, -1), slice(1, None)
+    consider((all_, head), (all_, tail), h, 0)
+    consider((all_, tail), (all_, head), h, 1)
+    consider((head, all_), (tail, all_), v, 2)
+    consider((tail, all_), (head, all_), v, 3)
+    consider((head, head), (tail, tail), d1, 4)
+    consider((tail, tail), (head, head), d1, 5)
+    consider((head, tail), (tail, head), d2, 6)
+    consider((tail, head), (head, tail), d2, 7)
+    parent[(dist == 0) | ~np.isfinite(dist)] = -1
+    return parent
+
+
+def _downhill_offsets(width: int) -> List[int]:
+    """Flat index step of each _downhill move code."""
+    return [1, -1, width, -width, width + 1, -width - 1, width - 1, 1 - width]
+
+
+def _move_masks(cost: np.ndarray, region_grid: np.ndarray) -> List[int]:
+    """
+    Moves of the tile A*: for every tile (flat index), a bit mask of the
+    MOVES it may take without leaving its region (bit k set = move k allowed).
+    """
+    h, v, d1, d2 = _step_costs(cost, region_grid)
+    masks = np.zeros(cost.shape, dtype=np.uint8)
+    all_, head, tail = slice(None), slice(None, -1), slice(1, None)
+    # (tiles the move starts from, its step costs) in MOVES order
+    for k, (src, step) in enumerate((((all_, head), h), ((all_, tail), h), ((head, all_), v), ((tail, all_), v),
+                                     ((head, head), d1), ((tail, head), d2), ((head, tail), d2),
+                                     ((tail, tail), d1))):
+        masks[src] |= np.where(step < UNREACHABLE, 1 << k, 0).astype(np.uint8)
+    return masks.ravel().tolist()
+
+
+def _all_pairs(costs: np.ndarray) -> np.ndarray:
+    """Shortest distances between all nodes of a dense (n, n) edge cost matrix (inf = no edge), in place (Floyd-Warshall)."""
+    via = np.empty_like(costs)
+    for k in range(len(costs)):
+        np.add(costs[:, k, None], costs[k], out=via)
+        np.minimum(costs, via, out=costs)
+    return costs
+
+
+class Pathfinder:
+    """
+    Path planner of one world.
+
+    Args:
+        biome_grid: (H, W) biome codes
+        region_grid: (H, W) region ids
+        tables: Arrays from tables() of a planner of the same world; the
+            distance fields and entrance costs are taken from them instead
+            of being computed again (ignored if they do not match)
+    """
+
+    def __init__(self, biome_grid: np.ndarray, region_grid: np.ndarray,
+                 tables: Optional[Dict[str, np.ndarray]] = None):
+        self.biome_grid = biome_grid
+        self.region_grid = region_grid
+        self.height, self.width = region_grid.shape
+        self.cost = MOVE_COST[biome_grid]
+        self._cost = self.cost.ravel().tolist()
+        self._regions = region_grid.ravel().tolist()
+        self._offsets = _downhill_offsets(self.width)
+        self._masks = _move_masks(self.cost, np.zeros(region_grid.shape, dtype=np.int8))
+        self._region_masks = _move_masks(self.cost, region_grid)
+        # Allowed moves of each mask: (flat index step, dx, dy, half length)
+        self._mask_moves = [tuple((dx + dy * self.width, dx, dy, length * 0.5)
+                                  for bit, (dx, dy, length) in enumerate(MOVES) if mask >> bit & 1)
+                            for mask in range(256)]
+        # Land mass of every tile: tiles of different ones have no path
+        # (a diagonal move needs both corner tiles, so 4-connected is enough)
+        passable = np.isfinite(self.cost)
+        self._land = label_components(passable.view(np.uint8), passable).labels.ravel().tolist()
+
+        self._paths: "OrderedDict[Tuple[int, int], Optional[List[Tuple[int, int]]]]" = OrderedDict()
+        self._flow_fields: "OrderedDict[int, Tuple[np.ndarray, List[float], Dict[int, float], Dict[int, List[int]]]]" \
+            = OrderedDict()
+        self._goal_requests: Counter = Counter()
+        self._build_abstraction(tables)
+
+    # ---- abstraction ----
+
+    def _build_abstraction(self, tables: Optional[Dict[str, np.ndarray]]):
+        width = self.width
+        regions = self.region_grid
+        passable = np.isfinite(self.cost)
+        flat_cost = self.cost.ravel()
+
+        # Border crossings between two regions, as flat tile index pairs
+        pairs = []
+        for a_sl, b_sl, offset in (((slice(None), slice(None, -1)), (slice(None), slice(1, None)), 1),
+                                   ((slice(None, -1), slice(None)), (slice(1, None), slice(None)), width)):
+            ok = (regions[a_sl] != regions[b_sl]) & passable[a_sl] & passable[b_sl]
+            ys, xs = np.nonzero(ok)
+            a = ys * width + xs
+            pairs.append(np.stack((a, a + offset), axis=1))
+        pairs = np.concatenate(pairs)
+
+        flat_regions = regions.ravel()
+        ra = flat_regions[pairs[:, 0]].astype(np.int64)
+        rb = flat_regions[pairs[:, 1]].astype(np.int64)
+        keys = np.minimum(ra, rb) * (int(flat_regions.max()) + 1) + np.maximum(ra, rb)
+        order = np.lexsort((pairs[:, 0], keys))
+        pairs, keys = pairs[order], keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+
+        # Entrances spread evenly along each border
+        inter: Dict[int, List[Tuple[int, float]]] = {}
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            n = end - start
+            k = 1 + (n - 1) // C.PATH_ENTRANCE_SPACING
+            for i in range(k):
+                a, b = pairs[start + (2 * i + 1) * n // (2 * k)].tolist()
+                step = (float(flat_cost[a]) + float(flat_cost[b])) * 0.5
+                inter.setdefault(a, []).append((b, step))
+                inter.setdefault(b, []).append((a, step))
+
+        # Entrances by index; layer of each: its index among the entrances of its region
+        self._nodes = sorted(inter)
+        index = {node: i for i, node in enumerate(self._nodes)}
+        self._layer: Dict[int, int] = {}
+        region_nodes: Dict[int, List[int]] = {}
+        for node in self._nodes:
+            nodes = region_nodes.setdefault(self._regions[node], [])
+            self._layer[node] = len(nodes)
+            nodes.append(node)
+        # Region -> (entrance indices, their layers)
+        self._region_entrances: Dict[int, Tuple[np.ndarray, np.ndarray]] = {
+            region: (np.array([index[node] for node in nodes]), np.arange(len(nodes)))
+            for region, nodes in region_nodes.items()
+        }
+
+        layers = max((len(nodes) for nodes in region_nodes.values()), default=0)
+        count = len(self._nodes)
+        if tables is not None and np.array_equal(tables["path_nodes"], self._nodes) \
+                and tables["path_fields"].shape == (layers, self.height * width) \
+                and tables["path_costs"].shape == (count, count):
+            self.fields = tables["path_fields"]
+            self.parents = tables["path_parents"]
+            self.costs = tables["path_costs"]
+        else:
+            self.fields = self.parents = self.costs = None
+
+        if self.fields is None:
+            sources = np.zeros((layers, self.height, width), dtype=bool)
+            for node, layer in self._layer.items():
+                sources[layer, node // width, node % width] = True
+            steps = _step_costs(self.cost, regions)
+            fields = distance_fields(sources, *steps)
+            self.parents = _downhill(fields, *steps).reshape(layers, -1)
+            self.fields = fields.astype(np.float32).reshape(layers, -1)
+
+        # Abstract graph: entrances of a region joined by their field
+        # distances, leaving out edges no shorter than a detour through a
+        # third entrance of the region
+        self._links: List[List[Tuple[int, float]]] = [
+            [(index[other], step) for other, step in inter[node]] for node in self._nodes]
+        for ids, layer_ids in self._region_entrances.values():
+            n = len(ids)
+            dist = self.fields[np.ix_(layer_ids, [self._nodes[i] for i in ids.tolist()])].astype(np.float64)
+            # via[i, k, j]: i -> k -> j, with k = i or k = j left out
+            via = dist[:, :, None] + dist[None, :, :]
+            own = np.arange(n)
+            via[own, own, :] = np.inf
+            via[:, own, own] = np.inf
+            keep = np.isfinite(dist) & (via.min(axis=1, initial=np.inf) > dist + 1e-9)
+            for i, a in enumerate(ids.tolist()):
+                self._links[a] += [(int(ids[j]), float(dist[i, j])) for j in np.flatnonzero(keep[i]).tolist()
+                                   if j != i]
+
+        # Cost between every two entrances, so a long query never searches
+        if self.costs is None:
+            costs = np.full((count, count), np.inf, dtype=np.float32)
+            np.fill_diagonal(costs, 0.0)
+            for a, links in enumerate(self._links):
+                for b, step in links:
+                    costs[a, b] = min(costs[a, b], step)
+            self.costs = _all_pairs(costs)
+
+    def tables(self) -> Dict[str, np.ndarray]:
+        """Precomputed arrays to store with the world and pass back to the constructor."""
+        return dict(zip(TABLE_NAMES, (np.array(self._nodes, dtype=np.int32), self.fields, self.parents,
+                                      self.costs)))
+
+    def _descend(self, node: int, tile: int) -> List[int]:
+        """Tiles from `tile` (excluded) down the field of `node` to the entrance itself."""
+        parents = self.parents[self._layer[node]]
+        offsets = self._offsets
+        path = []
+        while tile != node:
+            code = int(parents[tile])
+            if code < 0:
+                break
+            tile += offsets[code]
+            path.append(tile)
+        return path
+
+    # ---- searches ----
+
+    def _astar(self, start: int, goal: int, max_nodes: Optional[int] = None,
+               in_region: bool = False) -> Optional[List[int]]:
+        """
+        Tile A* from start to goal; None if not found within max_nodes
+        expansions (unlimited if None), or without leaving the start's
+        region if in_region.
+        """
+        width = self.width
+        cost, mask_moves = self._cost, self._mask_moves
+        masks = self._region_masks if in_region else self._masks
+        gx, gy = goal % width, goal // width
+        g_score = {start: 0.0}
+        parent = {start: -1}
+        open_heap = [(_octile(start % width, start // width, gx, gy) * MIN_COST, 0.0, start)]
+        expanded = 0
+        while open_heap:
+            _, g, tile = heapq.heappop(open_heap)
+            if tile == goal:
+                path = []
+                while tile != start:
+                    path.append(tile)
+                    tile = parent[tile]
+                path.reverse()
+                return path
+            if g > g_score[tile]:
+                continue
+            expanded += 1
+            if max_nodes is not None and expanded > max_nodes:
+                return None
+            x, y = tile % width, tile // width
+            for offset, dx, dy, half in mask_moves[masks[tile]]:
+                n = tile + offset
+                ng = g + (cost[tile] + cost[n]) * half
+                if ng < g_score.get(n, UNREACHABLE):
+                    g_score[n] = ng
+                    parent[n] = tile
+                    ex = abs(x + dx - gx)
+                    ey = abs(y + dy - gy)
+                    estimate = (ex + (SQRT2 - 1.0) * ey if ex > ey else ey + (SQRT2 - 1.0) * ex) * MIN_COST
+                    heapq.heappush(open_heap, (ng + estimate, ng, n))
+        return None
+
+    def _abstract_route(self, start: int, goal: int) -> Optional[List[int]]:
+        """
+        Entrances from the start's region to the goal's: the pair with the
+        least total cost by the entrance cost table, joined by following the
+        abstract edges whose far end is closest to the last entrance.
+        """
+        start_entrances = self._region_entrances.get(self._regions[start])
+        goal_entrances = self._region_entrances.get(self._regions[goal])
+        if start_entrances is None or goal_entrances is None:
+            return None
+        start_ids, start_layers = start_entrances
+        goal_ids, goal_layers = goal_entrances
+        total = (self.fields[start_layers, start][:, None] + self.costs[np.ix_(start_ids, goal_ids)]
+                 + self.fields[goal_layers, goal][None, :])
+        i, j = divmod(int(np.argmin(total)), len(goal_ids))
+        if not total[i, j] < UNREACHABLE:
+            return None
+
+        node, last = int(start_ids[i]), int(goal_ids[j])
+        remaining = self.costs[:, last].tolist()
+        route = [self._nodes[node]]
+        while node != last:
+            node = min(self._links[node], key=lambda link: link[1] + remaining[link[0]])[0]
+            route.append(self._nodes[node])
+        return route
+
+    def _flow_field(self, goal: int) -> Tuple[np.ndarray, List[float], Dict[int, float], Dict[int, List[int]]]:
+        """
+        Shared state of the orders to one goal: the cost from every entrance
+        to the goal (array and list), the cost of walking straight to the
+        goal from each entrance of its region, and the tile paths from
+        entrances to the goal found so far.
+        """
+        field = self._flow_fields.get(goal)
+        if field is not None:
+            self._flow_fields.move_to_end(goal)
+            return field
+        to_goal = np.full(len(self._nodes), np.inf)
+        exits: Dict[int, float] = {}
+        goal_entrances = self._region_entrances.get(self._regions[goal])
+        if goal_entrances is not None:
+            ids, layers = goal_entrances
+            exit_costs = self.fields[layers, goal].astype(np.float64)
+            to_goal = (self.costs[:, ids] + exit_costs[None, :]).min(axis=1)
+            exits = dict(zip(ids.tolist(), exit_costs.tolist()))
+        field = (to_goal, to_goal.tolist(), exits, {})
+        self._flow_fields[goal] = field
+        if len(self._flow_fields) > C.PATH_FLOW_FIELD_CACHE:
+            self._flow_fields.popitem(last=False)
+        return field
+
+    def _flow_tiles(self, start: int, goal: int) -> Optional[List[int]]:
+        """
+        Tile path to a goal from its flow field: down to the best entrance of
+        the start's region, then the entrance's tiles to the goal, which are
+        worked out once and kept for the next orders to the same goal.
+        """
+        start_entrances = self._region_entrances.get(self._regions[start])
+        if start_entrances is None:
+            return None
+        to_goal, remaining, exits, suffixes = self._flow_field(goal)
+        ids, layers = start_entrances
+        total = self.fields[layers, start] + to_goal[ids]
+        i = int(np.argmin(total))
+        if not total[i] < UNREACHABLE:
+            return None
+        first = node = int(ids[i])
+
+        # Entrances up to one whose tiles are known, or the one to leave for the goal from
+        route = []
+        tail = suffixes.get(node)
+        while tail is None:
+            route.append(node)
+            if exits.get(node, np.inf) <= remaining[node]:
+                break
+            node = min(self._links[node], key=lambda link: link[1] + remaining[link[0]])[0]
+            tail = suffixes.get(node)
+        if tail is None:
+            node = route.pop()
+            tail = []
+            if goal != self._nodes[node]:
+                # Up the entrance's field from the goal, reversed
+                tail = self._descend(self._nodes[node], goal)
+                tail.reverse()
+                tail = tail[1:] + [goal]
+            suffixes[node] = tail
+        for prev in reversed(route):
+            a, b = self._nodes[prev], self._nodes[node]
+            tail = (self._descend(b, a) if self._regions[a] == self._regions[b] else [b]) + tail
+            suffixes[prev] = tail
+            node = prev
+        return self._descend(self._nodes[first], start) + tail
+
+    def _route_tiles(self, start: int, goal: int, route: List[int]) -> List[int]:
+        """Tile path through a route of entrances, walked down their fields."""
+        path = self._descend(route[0], start)
+        for a, b in zip(route, route[1:]):
+            if self._regions[a] == self._regions[b]:
+                # Down b's field from a
+                path += self._descend(b, a)
+            else:
+                path.append(b)
+        if goal != route[-1]:
+            # Up the last entrance's field from the goal, reversed
+            tail = self._descend(route[-1], goal)
+            tail.reverse()
+            path += tail[1:] + [goal]
+        return path
+
+    # ---- public ----
+
+    def cost_at(self, x: int, y: int) -> float:
+        """Movement cost of tile (x, y) (inf if it cannot be entered)."""
+        return self._cost[y * self.width + x]
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """
+        Least-cost path between two tiles.
+
+        Returns:
+            Waypoint tiles after start up to goal, with straight runs merged
+            (an empty list if start == goal), or None if either tile cannot
+            be entered or no path exists
+        """
+        sx, sy = start
+        gx, gy = goal
+        width = self.width
+        if not (0 <= sx < width and 0 <= sy < self.height and 0 <= gx < width and 0 <= gy < self.height):
+            return None
+        s = sy * width + sx
+        g = gy * width + gx
+        if self._cost[s] == np.inf or self._cost[g] == np.inf:
+            return None
+        if s == g:
+            return []
+
+        key = (s, g)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            return self._paths[key]
+
+        tiles = None
+        if self._land[s] == self._land[g]:
+            same_region = self._regions[s] == self._regions[g]
+            if _octile(sx, sy, gx, gy) <= C.PATH_LOCAL_TILES:
+                tiles = self._astar(s, g, C.PATH_LOCAL_MAX_NODES)
+            if tiles is None and same_region:
+                # However far it has to search, the region bounds it
+                tiles = self._astar(s, g, in_region=True)
+            if tiles is None:
+                self._goal_requests[g] += 1
+                if g in self._flow_fields or self._goal_requests[g] >= C.PATH_FLOW_FIELD_UNITS:
+                    tiles = self._flow_tiles(s, g)
+                else:
+                    route = self._abstract_route(s, g)
+                    if route is not None:
+                        tiles = self._route_tiles(s, g, route)
+                if len(self._goal_requests) > 4 * C.PATH_CACHE_SIZE:
+                    self._goal_requests.clear()
+            if tiles is None:
+                # Connected only through a border stretch without an entrance
+                tiles = self._astar(s, g)
+
+        path = None if tiles is None else _merge_straight(tiles, width, s)
+        self._paths[key] = path
+        if len(self._paths) > C.PATH_CACHE_SIZE:
+            self._paths.popitem(last=False)
+        return path
+
+
+def _merge_straight(tiles: List[int], width: int, start: int) -> List[Tuple[int, int]]:
+    """(x, y) waypoints of a tile path, keeping only the tiles where the direction changes."""
+    waypoints = []
+    px, py = start % width, start // width
+    prev_dir = None
+    for tile in tiles:
+        x, y = tile % width, tile // width
+        direction = (x - px, y - py)
+        if direction == prev_dir:
+            waypoints[-1] = (x, y)
+        else:
+            waypoints.append((x, y))
+        prev_dir = direction
+        px, py = x, y
+    return waypoints
@@ -0,0 +1,147 @@
+"""
+Per-region tile index.
+Built once per world from the region grid: the tiles, bounding box, land /
+water split and perimeter of every region, plus live revealed-tile counts fed
+from the fog, so per-region queries never rescan the grid.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import grids
+
+
+class RegionIndex:
+    """
+    Tile index of every region (ids 0 .. count - 1; tiles with -1 are skipped).
+
+    Attributes:
+        count: Number of region ids covered
+        sizes: Tile count per region
+        land_sizes: Land tile count per region
+        water_sizes: SEA / LAKE tile count per region
+        bboxes: (count, 4) array of (xmin, ymin, xmax, ymax); (-1, -1, -1, -1) if empty
+        revealed: Revealed tile count per region (list, updated by on_revealed)
+    """
+
+    def __init__(self, biome_grid: Optional[np.ndarray], region_grid: np.ndarray,
+                 revealed: Optional[np.ndarray] = None):
+        height, width = region_grid.shape
+        self._width = width
+        flat_rids = region_grid.ravel().astype(np.int64)
+        positions = np.flatnonzero(flat_rids >= 0)
+        rids = flat_rids[positions]
+        self.count = int(rids.max()) + 1 if rids.size else 0
+
+        # Tile positions grouped by region, raster order within each region
+        self._order = positions[np.argsort(rids, kind="stable")]
+        self.sizes = np.bincount(rids, minlength=self.count)
+        self._starts = np.concatenate(([0], np.cumsum(self.sizes)[:-1])).astype(np.int64)
+
+        xs = positions % width
+        ys = positions // width
+        xmin = np.full(self.count, width, dtype=np.int64)
+        ymin = np.full(self.count, height, dtype=np.int64)
+        xmax = np.full(self.count, -1, dtype=np.int64)
+        ymax = np.full(self.count, -1, dtype=np.int64)
+        np.minimum.at(xmin, rids, xs)
+        np.minimum.at(ymin, rids, ys)
+        np.maximum.at(xmax, rids, xs)
+        np.maximum.at(ymax, rids, ys)
+        self.bboxes = np.stack((xmin, ymin, xmax, ymax), axis=1)
+        self.bboxes[self.sizes == 0] = -1
+
+        if biome_grid is not None:
+            water = grids.water_mask(biome_grid).ravel()[positions]
+            self.water_sizes = np.bincount(rids[water], minlength=self.count)
+        else:
+            self.water_sizes = np.zeros(self.count, dtype=np.int64)
+        self.land_sizes = self.sizes - self.water_sizes
+
+        if revealed is not None:
+            seen = revealed.ravel()[positions]
+            self.revealed = np.bincount(rids[seen], minlength=self.count).tolist()
+        else:
+            self.revealed = [0] * self.count
+
+        # Plain lists are faster for per-tile access
+        self._rid_of = flat_rids.tolist()
+        self._region_grid = region_grid
+        self._tiles: Dict[int, List[Tuple[int, int]]] = {}
+        self._perimeters: Dict[int, List[Tuple[int, int]]] = {}
+
+    def region_at(self, x: int, y: int) -> int:
+        """Region id of tile (x, y), -1 if none."""
+        return self._rid_of[y * self._width + x]
+
+    def flat(self, region_id: int) -> np.ndarray:
+        """Flat (y * W + x) tile indices of one region, in raster order."""
+        if not 0 <= region_id < self.count:
+            return self._order[:0]
+        start = self._starts[region_id]
+        return self._order[start:start + self.sizes[region_id]]
+
+    def coords(self, region_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(ys, xs) arrays of one region's tiles, like np.nonzero of its mask."""
+        flat = self.flat(region_id)
+        return flat // self._width, flat % self._width
+
+    def tiles(self, region_id: int) -> List[Tuple[int, int]]:
+        """(x, y) tiles of one region in raster order (cached; do not modify)."""
+        tiles = self._tiles.get(region_id)
+        if tiles is None:
+            ys, xs = self.coords(region_id)
+            tiles = list(zip(xs.tolist(), ys.tolist()))
+            self._tiles[region_id] = tiles
+        return tiles
+
+    def bbox(self, region_id: int) -> Optional[Tuple[int, int, int, int]]:
+        """(xmin, ymin, xmax, ymax) of one region, or None if it has no tiles."""
+        if not 0 <= region_id < self.count or self.sizes[region_id] == 0:
+            return None
+        return tuple(int(v) for v in self.bboxes[region_id])
+
+    def perimeter(self, region_id: int) -> List[Tuple[int, int]]:
+        """(x, y) tiles outside the region that are 4-adjacent to it (cached)."""
+        perimeter = self._perimeters.get(region_id)
+        if perimeter is None:
+            perimeter = []
+            box = self.bbox(region_id)
+            if box is not None:
+                height, width = self._region_grid.shape
+                x0, y0 = max(0, box[0] - 1), max(0, box[1] - 1)
+                x1, y1 = min(width, box[2] + 2), min(height, box[3] + 2)
+                inside = self._region_grid[y0:y1, x0:x1] == region_id
+                near = np.zeros_like(inside)
+                near[1:, :] |= inside[:-1, :]
+                near[:-1, :] |= inside[1:, :]
+                near[:, 1:] |= inside[:, :-1]
+                near[:, :-1] |= inside[:, 1:]
+                ys, xs = np.nonzero(near & ~inside)
+                perimeter = list(zip((xs + x0).tolist(), (ys + y0).tolist()))
+            self._perimeters[region_id] = perimeter
+        return perimeter
+
+    def on_revealed(self, revealed: Iterable[Tuple[int, int]]):
+        """Count newly revealed (x, y) tiles (each at most once) into their regions."""
+        counts = self.revealed
+        rid_of = self._rid_of
+        width = self._width
+        for x, y in revealed:
+            rid = rid_of[y * width + x]
+            if rid >= 0:
+                counts[rid] += 1
+
+    def hidden_count(self, region_id: int) -> int:
+        """Tiles of the region still under fog."""
+        if not 0 <= region_id < self.count:
+            return 0
+        return int(self.sizes[region_id]) - self.revealed[region_id]
+
+    def has_fog(self, region_id: int) -> bool:
+        """True if any tile of the region is still under fog."""
+        return self.hidden_count(region_id) > 0
+
+    def is_explored(self, region_id: int) -> bool:
+        """True if the region has tiles and all of them are revealed."""
+        return bool(0 <= region_id < self.count and self.sizes[region_id] > 0 and not self.has_fog(region_id))
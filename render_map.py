@@ -1,106 +1,286 @@
 import math
+import numpy as np
 import pygame
 import config as C
+import grids
+from zoom_chunks import ZoomChunk, ZoomChunkCache
+from frame_profiler import PROFILER
 from render_ui import render_panel, render_top_bar, render_unit_list
 
+# Largest number of pixels painted in one pass of _paint_map (bounds temporary arrays)
+_PAINT_BAND_PIXELS = 1 << 20
+
+
+def _blend(dst, color, alpha):
+    """Alpha-blend `color` over uint8 pixels the way pygame blits SRCALPHA surfaces."""
+    d = dst.astype(np.int32)
+    return (d + (((np.asarray(color, dtype=np.int32) - d) * alpha + np.asarray(color, dtype=np.int32)) >> 8)).astype(np.uint8)
+
+
+def _pack(rgb):
+    """(..., 3) uint8 colors as one little-endian uint32 per pixel (the "RGBX" byte layout)."""
+    rgb = np.asarray(rgb, dtype=np.uint32)
+    return (rgb[..., 0] | (rgb[..., 1] << 8) | (rgb[..., 2] << 16)).astype("<u4")
+
+
+def _owner_grid(state, rx0, ry0, rx1, ry1):
+    """Owning faction index per tile of a rectangle (-1 = none), a view of the territory map."""
+    if state.territory is None:
+        return np.full((ry1 - ry0, rx1 - rx0), -1, dtype=np.int8)
+    return state.territory.owner[ry0:ry1, rx0:rx1]
+
+
+def _border_pixels(shape, origin, tile_px, ring, edges, vertical, width):
+    """
+    Pixels covered by border lines on a set of tile edges, clipped to a block
+    of `shape` (rows, cols) at map pixel `origin`. A line of width w at
+    coordinate c covers c - (w - 1) // 2 .. c + w // 2 and includes its end
+    point.
+
+    Args:
+        ring: Tile (x, y) of element [0, 0] of `edges`
+        edges: (h, w) bool, True where a tile has a border on its right edge
+            (vertical=True) or bottom edge (vertical=False)
+
+    Returns:
+        (pixels, edge): flat pixel indices into the block, and the flat
+        `edges` index of the edge each pixel belongs to
+    """
+    rows, cols = shape
+    lo = (width - 1) // 2
+    along = np.arange(tile_px + 1)
+    across = np.arange(-lo, width // 2 + 1)
+    edge = np.flatnonzero(edges)
+    tx = (edge % edges.shape[1] + ring[0]) * tile_px - origin[0]
+    ty = (edge // edges.shape[1] + ring[1]) * tile_px - origin[1]
+    # Pixel offsets of one line from its edge's tile corner
+    if vertical:
+        tx += tile_px
+        dx, dy = np.broadcast_arrays(across[None, :], along[:, None])
+    else:
+        ty += tile_px
+        dx, dy = np.broadcast_arrays(along[None, :], across[:, None])
+    dx = dx.ravel()
+    dy = dy.ravel()
+    # Lines that lie in the block in full need no clipping
+    full = (tx + dx[0] >= 0) & (tx + dx[-1] < cols) & (ty + dy[0] >= 0) & (ty + dy[-1] < rows)
+    pixels = ((ty[full] * cols + tx[full])[:, None] + (dy * cols + dx)[None, :]).ravel()
+    owner = np.repeat(edge[full], len(dx))
+    if not full.all():
+        part = ~full
+        xs = tx[part][:, None] + dx[None, :]
+        ys = ty[part][:, None] + dy[None, :]
+        inside = (xs >= 0) & (xs < cols) & (ys >= 0) & (ys < rows)
+        pixels = np.concatenate([pixels, (ys * cols + xs)[inside]])
+        owner = np.concatenate([owner, np.broadcast_to(edge[part][:, None], xs.shape)[inside]])
+    return pixels, owner
+
+
+def _paint_borders(img, origin, tile_px, ring, layers):
+    """
+    Draw border lines into a pixel block, one layer over the other (within a
+    layer, bottom edges over right edges).
+
+    Args:
+        img: (rows, cols) packed pixel block (see _pack), modified in place
+        origin: Map pixel (x, y) of the block's top-left pixel
+        tile_px: Tile size in pixels
+        ring: Tile (x, y) of element [0, 0] of the arrays below
+        layers: [(right_edges, bottom_edges, right_colors, bottom_colors, width), ...]
+            with (h, w) bool edge arrays and (h, w) packed colors
+    """
+    flat = img.reshape(-1)
+    for right, bottom, right_colors, bottom_colors, width in layers:
+        for edges, edge_colors, vertical in ((right, right_colors, True), (bottom, bottom_colors, False)):
+            pixels, edge = _border_pixels(img.shape, origin, tile_px, ring, edges, vertical, width)
+            flat[pixels] = edge_colors.reshape(-1)[edge]
+
+
+def _paint_map(surf, state, x0, y0, x1, y1, zoom, surf_origin=(0, 0)):
+    """
+    Paint tiles [x0, x1) x [y0, y1) of a map cache: biome colors, region
+    boundaries, faction overlays and faction borders.
+
+    The block is composed as an array of packed pixels (colors looked up per
+    tile from tables by owner and biome, scaled up to pixels, border lines
+    from neighbour differences written with one vectorised assignment per
+    layer) and blitted in one go. Borders of the ring of tiles around the
+    rectangle are included, so repainting part of a cache gives the same
+    pixels as rendering the whole map.
+
+    Args:
+        surf: Target surface (state.map_surface or a zoom chunk)
+        state: GameState
+        x0, y0, x1, y1: Tile rectangle, end exclusive
+        zoom: True for the zoom cache (ZOOM_SCALE, grid lines, thick borders)
+        surf_origin: Tile drawn at the surface's top-left pixel
+    """
+    tile_px = C.TILE_SIZE * C.ZOOM_SCALE if zoom else C.TILE_SIZE
+    band = max(1, _PAINT_BAND_PIXELS // ((x1 - x0) * tile_px * tile_px))
+    for by0 in range(y0, y1, band):
+        _paint_band(surf, state, x0, by0, x1, min(y1, by0 + band), zoom, tile_px, surf_origin)
+
+
+def _overlaid(colors, faction_colors):
+    """
+    Packed colors with each faction's overlay (semi-transparent) blended in.
+
+    Returns:
+        (len(faction_colors) + 1, ...) table indexed by owner + 1; row 0 is
+        the unowned color
+    """
+    colors = np.asarray(colors, dtype=np.uint8)
+    overlay = faction_colors.reshape((-1,) + (1,) * (colors.ndim - 1) + (3,))
+    return _pack(np.concatenate([colors[None], _blend(colors[None], overlay, 80)]))
+
+
+def _paint_band(surf, state, x0, y0, x1, y1, zoom, tile_px, surf_origin):
+    """One pass of _paint_map over a band of tile rows."""
+    # Tiles whose borders can reach into the rectangle
+    rx0 = max(0, x0 - 1)
+    ry0 = max(0, y0 - 1)
+    rx1 = min(C.BASE_GRID_WIDTH, x1 + 1)
+    ry1 = min(C.BASE_GRID_HEIGHT, y1 + 1)
+    regions = state.region_grid[ry0:ry1, rx0:rx1]
+    factions = state.factions or []
+    owners = _owner_grid(state, rx0, ry0, rx1, ry1)
+    inner = (slice(y0 - ry0, y1 - ry0), slice(x0 - rx0, x1 - rx0))
+
+    # Edges between a tile and its right / bottom neighbour inside the ring
+    region_right = np.zeros(regions.shape, dtype=bool)
+    region_bottom = np.zeros(regions.shape, dtype=bool)
+    region_right[:, :-1] = regions[:, :-1] != regions[:, 1:]
+    region_bottom[:-1, :] = regions[:-1, :] != regions[1:, :]
+    faction_right = np.zeros(owners.shape, dtype=bool)
+    faction_bottom = np.zeros(owners.shape, dtype=bool)
+    faction_right[:, :-1] = owners[:, :-1] != owners[:, 1:]
+    faction_bottom[:-1, :] = owners[:-1, :] != owners[1:, :]
+
+    # Faction border color: this tile's faction, else the neighbour's
+    faction_colors = np.array([f.color for f in factions] or [(0, 0, 0)], dtype=np.uint8)
+    border_colors = _pack(faction_colors)
+    right_owner = owners.copy()
+    right_owner[:, :-1] = np.where(owners[:, :-1] >= 0, owners[:, :-1], owners[:, 1:])
+    bottom_owner = owners.copy()
+    bottom_owner[:-1, :] = np.where(owners[:-1, :] >= 0, owners[:-1, :], owners[1:, :])
+    faction_right_colors = border_colors[np.maximum(right_owner, 0)]
+    faction_bottom_colors = border_colors[np.maximum(bottom_owner, 0)]
+
+    ring = (rx0, ry0)
+    origin = (x0 * tile_px, y0 * tile_px)
+    tile_row = owners[inner].astype(np.intp) + 1
+    biomes = state.biome_grid[y0:y1, x0:x1]
+
+    # Tile colors, with the faction overlay blended per tile before
+    # nearest-neighbour upscaling
+    tiles = _overlaid(grids.BIOME_PALETTE, faction_colors)[tile_row, biomes]
+    img = tiles.repeat(tile_px, axis=0).repeat(tile_px, axis=1)
+    if zoom:
+        # Grid lines with 50% transparency on each tile's last column / row,
+        # under the overlay
+        grid_palette = _blend(grids.BIOME_PALETTE, (160, 160, 160), 128)
+        grid = _overlaid(grid_palette, faction_colors)[tile_row, biomes]
+        img[tile_px - 1::tile_px, :] = grid.repeat(tile_px, axis=1)
+        img[:, tile_px - 1::tile_px] = grid.repeat(tile_px, axis=0)
+        region_color = C.ZOOM_REGION_BORDER_COLOR
+    else:
+        # Region boundaries are drawn under the overlay of the tile each pixel is in
+        region_color = C.REGION_BORDER_COLOR
+        line_colors = _overlaid(region_color, faction_colors)[tile_row]
+        flat = img.reshape(-1)
+        cols = img.shape[1]
+        for edges, vertical in ((region_right, True), (region_bottom, False)):
+            pixels, _ = _border_pixels(img.shape, origin, tile_px, ring, edges, vertical, 1)
+            flat[pixels] = line_colors[pixels // cols // tile_px, pixels % cols // tile_px]
+
+    # Borders: zoom draws each tile's region border then its faction border
+    layers = []
+    if zoom:
+        region_colors = np.broadcast_to(_pack(region_color), regions.shape)
+        layers.append((region_right, region_bottom, region_colors, region_colors, 4))
+    layers.append((faction_right, faction_bottom, faction_right_colors, faction_bottom_colors, 6 if zoom else 3))
+    _paint_borders(img, origin, tile_px, ring, layers)
+
+    block = pygame.image.frombuffer(img, (img.shape[1], img.shape[0]), "RGBX")
+    surf.blit(block, ((x0 - surf_origin[0]) * tile_px, (y0 - surf_origin[1]) * tile_px))
+
+
 def pre_render_map(state):
     """
     Render the entire map to a surface and store it in state.map_surface.
     """
-    if not state.biome_grid or not state.region_grid:
+    if state.biome_grid is None or state.region_grid is None:
         return
 
     width = C.BASE_GRID_WIDTH * C.TILE_SIZE
     height = C.BASE_GRID_HEIGHT * C.TILE_SIZE
     surf = pygame.Surface((width, height))
-    
-    # Draw tiles
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            b = state.biome_grid[y][x]
-            color = C.BIOME_COLORS.get(b, C.GREY)
-            
-            rect = pygame.Rect(x * C.TILE_SIZE, y * C.TILE_SIZE, C.TILE_SIZE, C.TILE_SIZE)
-            pygame.draw.rect(surf, color, rect)
-
-    # Draw region boundaries
-    boundary_color = C.REGION_BORDER_COLOR
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            rid = state.region_grid[y][x]
-            if x + 1 < C.BASE_GRID_WIDTH:
-                rid_r = state.region_grid[y][x + 1]
-                if rid != rid_r:
-                    x0 = (x + 1) * C.TILE_SIZE
-                    y0 = y * C.TILE_SIZE
-                    pygame.draw.line(surf, boundary_color, (x0, y0), (x0, y0 + C.TILE_SIZE), 1)
-            if y + 1 < C.BASE_GRID_HEIGHT:
-                rid_d = state.region_grid[y + 1][x]
-                if rid != rid_d:
-                    x0 = x * C.TILE_SIZE
-                    y0 = (y + 1) * C.TILE_SIZE
-                    pygame.draw.line(surf, boundary_color, (x0, y0), (x0 + C.TILE_SIZE, y0), 1)
-    
-    # Draw faction territories (semi-transparent overlays)
-    if state.factions:
-        overlay_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-        for faction in state.factions:
-            if faction.territory_mask:
-                # Create faction-specific overlay color (add alpha to faction color)
-                overlay_color = faction.color + (80,)  # RGB + Alpha
-                for (x, y) in faction.territory_mask:
-                    rect = pygame.Rect(x * C.TILE_SIZE, y * C.TILE_SIZE, C.TILE_SIZE, C.TILE_SIZE)
-                    overlay_surface.fill(overlay_color, rect)
-        surf.blit(overlay_surface, (0, 0))
-    
-    # Draw faction borders (thicker, colored)
-    faction_border_width = 3
-    
-    # Build a faction ownership map for quick lookup
-    faction_map = {}
-    if state.factions:
-        for faction in state.factions:
-            for (x, y) in faction.territory_mask:
-                faction_map[(x, y)] = faction
-    
-    for y in range(C.BASE_GRID_HEIGHT):
-        for x in range(C.BASE_GRID_WIDTH):
-            current_faction = faction_map.get((x, y))
-            
-            # Check right neighbor
-            if x + 1 < C.BASE_GRID_WIDTH:
-                right_faction = faction_map.get((x + 1, y))
-                
-                # Draw border if factions are different
-                if current_faction != right_faction and (current_faction or right_faction):
-                    # Use the color of the faction that owns this tile
-                    border_color = current_faction.color if current_faction else right_faction.color
-                    x0 = (x + 1) * C.TILE_SIZE
-                    y0 = y * C.TILE_SIZE
-                    pygame.draw.line(surf, border_color, (x0, y0), (x0, y0 + C.TILE_SIZE), faction_border_width)
-            
-            # Check bottom neighbor
-            if y + 1 < C.BASE_GRID_HEIGHT:
-                bottom_faction = faction_map.get((x, y + 1))
-                
-                # Draw border if factions are different
-                if current_faction != bottom_faction and (current_faction or bottom_faction):
-                    # Use the color of the faction that owns this tile
-                    border_color = current_faction.color if current_faction else bottom_faction.color
-                    x0 = x * C.TILE_SIZE
-                    y0 = (y + 1) * C.TILE_SIZE
-                    pygame.draw.line(surf, border_color, (x0, y0), (x0 + C.TILE_SIZE, y0), faction_border_width)
-    
-    
+    _paint_map(surf, state, 0, 0, C.BASE_GRID_WIDTH, C.BASE_GRID_HEIGHT, zoom=False)
     state.map_surface = surf
 
 
+def _damage_rects(tiles):
+    """Merge damaged tiles, each grown by its border neighbours, into tile rectangles."""
+    bounds = pygame.Rect(0, 0, C.BASE_GRID_WIDTH, C.BASE_GRID_HEIGHT)
+    rects = []
+    for x, y in sorted(tiles):
+        rect = pygame.Rect(x - 1, y - 1, 3, 3)
+        hit = rect.collidelist(rects)
+        while hit != -1:
+            rect.union_ip(rects.pop(hit))
+            hit = rect.collidelist(rects)
+        rects.append(rect)
+    return [r.clip(bounds) for r in rects]
+
+
+def repaint_damage(state):
+    """
+    Repaint the world map cache and the cached zoom chunks around the tiles
+    recorded by cache_manager.damage_tiles. Caches and chunks that are not
+    built yet are skipped; they are rendered in full when first needed.
+    """
+    if not state.map_damage:
+        return
+    tiles = state.map_damage
+    state.map_damage = set()
+    if state.biome_grid is None or state.region_grid is None:
+        return
+    if state.map_surface is None and state.zoom_chunks is None:
+        return
+
+    for rect in _damage_rects(tiles):
+        if state.map_surface is not None:
+            _paint_map(state.map_surface, state, rect.left, rect.top, rect.right, rect.bottom, zoom=False)
+        if state.zoom_chunks is not None:
+            for chunk in state.zoom_chunks.overlapping(rect.left, rect.top, rect.right, rect.bottom):
+                part = rect.clip(pygame.Rect(chunk.x, chunk.y, chunk.w, chunk.h))
+                _paint_map(chunk.map, state, part.left, part.top, part.right, part.bottom,
+                           zoom=True, surf_origin=(chunk.x, chunk.y))
+
+
+def _write_fog_alpha(surface, x, y, revealed, tile_px):
+    """
+    Write the fog alpha of a tile rectangle straight into a fog surface.
+
+    Args:
+        surface: SRCALPHA fog surface (black, alpha 255 = hidden)
+        x, y: Top-left tile of the rectangle
+        revealed: Boolean (h, w) array of revealed tiles in the rectangle
+        tile_px: Size of one tile on the surface in pixels
+    """
+    alpha = np.where(revealed, 0, 255).astype(np.uint8).T
+    alpha = alpha.repeat(tile_px, axis=0).repeat(tile_px, axis=1)
+    px = pygame.surfarray.pixels_alpha(surface)
+    px[x * tile_px:x * tile_px + alpha.shape[0], y * tile_px:y * tile_px + alpha.shape[1]] = alpha
+    del px  # Unlock the surface
+
+
 def update_fog_surface(state):
     """
-    Update state.fog_surface based on state.fog_grid.
+    Update state.fog_surface based on state.fog.
     We create a black surface and punch holes (alpha=0) where visible.
     """
-    if not state.fog_grid:
+    if state.fog is None:
         return
 
     width = C.BASE_GRID_WIDTH * C.TILE_SIZE
@@ -112,12 +292,56 @@ def update_fog_surface(state):
         state.fog_surface.fill((0, 0, 0, 255)) # Opaque black
         
         # Initial punch
-        for y in range(C.BASE_GRID_HEIGHT):
-            for x in range(C.BASE_GRID_WIDTH):
-                if state.fog_grid[y][x]:
-                    rect = pygame.Rect(x * C.TILE_SIZE, y * C.TILE_SIZE, C.TILE_SIZE, C.TILE_SIZE)
-                    # Clear alpha to 0
-                    state.fog_surface.fill((0, 0, 0, 0), rect)
+        _write_fog_alpha(state.fog_surface, 0, 0, state.fog.mask(), C.TILE_SIZE)
+
+
+def apply_fog_dirty(state, rects):
+    """
+    Patch the world fog surface and the fog layers of cached zoom chunks
+    inside the tile rectangles revealed since the last tick. Surfaces that
+    are not built yet are left alone; they are built from the fog state when
+    first needed.
+
+    Args:
+        state: GameState
+        rects: (x, y, w, h) tile rectangles from FogOfWar.take_dirty
+    """
+    if state.fog is None or (state.fog_surface is None and state.zoom_chunks is None):
+        return
+    for (x, y, w, h) in rects:
+        revealed = state.fog.rect_mask(x, y, w, h)
+        if state.fog_surface is not None:
+            _write_fog_alpha(state.fog_surface, x, y, revealed, C.TILE_SIZE)
+        if state.zoom_chunks is not None:
+            for chunk in state.zoom_chunks.overlapping(x, y, x + w, y + h):
+                if chunk.fog is None:
+                    continue
+                part = pygame.Rect(x, y, w, h).clip(pygame.Rect(chunk.x, chunk.y, chunk.w, chunk.h))
+                _write_fog_alpha(chunk.fog, part.left - chunk.x, part.top - chunk.y,
+                                 revealed[part.top - y:part.bottom - y, part.left - x:part.right - x],
+                                 C.TILE_SIZE * C.ZOOM_SCALE)
+
+
+def _zoom_chunk(state, key):
+    """
+    Cached zoom chunk for `key`, rendered (map and fog layer) if missing.
+    A chunk whose fog layer was dropped gets it rebuilt from the fog state.
+    """
+    cache = state.zoom_chunks
+    tile_px = C.TILE_SIZE * C.ZOOM_SCALE
+    chunk = cache.get(key)
+    if chunk is None:
+        x0, y0, x1, y1 = cache.bounds(key)
+        surf = pygame.Surface(((x1 - x0) * tile_px, (y1 - y0) * tile_px))
+        _paint_map(surf, state, x0, y0, x1, y1, zoom=True, surf_origin=(x0, y0))
+        chunk = ZoomChunk(x0, y0, x1 - x0, y1 - y0, surf)
+        cache.put(key, chunk)
+    if chunk.fog is None and state.fog is not None:
+        fog = pygame.Surface(chunk.map.get_size(), pygame.SRCALPHA)
+        fog.fill((0, 0, 0, 255))  # Fully opaque black
+        _write_fog_alpha(fog, 0, 0, state.fog.rect_mask(chunk.x, chunk.y, chunk.w, chunk.h), tile_px)
+        chunk.fog = fog
+    return chunk
 
 
 def render_zoom(screen, font, state):
@@ -131,133 +355,33 @@ def render_zoom(screen, font, state):
     view_x1 = min(C.BASE_GRID_WIDTH - 1, view_x0 + view_w)
     view_y1 = min(C.BASE_GRID_HEIGHT - 1, view_y0 + view_h)
 
-    # Generate full map cache if needed (only once, or when map changes)
-    if state.zoom_full_map_cache is None:
-        scale = C.ZOOM_SCALE
-        full_width = C.BASE_GRID_WIDTH * C.TILE_SIZE * scale
-        full_height = C.BASE_GRID_HEIGHT * C.TILE_SIZE * scale
-        
-        # Create cache surface for full map
-        cache_surface = pygame.Surface((full_width, full_height))
-        
-        # Create a transparent surface for grid lines
-        grid_surface = pygame.Surface((full_width, full_height), pygame.SRCALPHA)
-        
-        # Render all tiles and grid lines
-        if state.biome_grid and state.region_grid:
-            for y in range(C.BASE_GRID_HEIGHT):
-                for x in range(C.BASE_GRID_WIDTH):
-                    b = state.biome_grid[y][x]
-                    color = C.BIOME_COLORS.get(b, C.GREY)
-                    
-                    px = x * C.TILE_SIZE * scale
-                    py = y * C.TILE_SIZE * scale
-                    rect = pygame.Rect(px, py, C.TILE_SIZE * scale, C.TILE_SIZE * scale)
-                    pygame.draw.rect(cache_surface, color, rect)
-                    
-                    # Draw grid lines with 50% transparency
-                    grid_color = (160, 160, 160, 128)
-                    pygame.draw.line(grid_surface, grid_color, (rect.right - 1, rect.top), (rect.right - 1, rect.bottom - 1), 1)
-                    pygame.draw.line(grid_surface, grid_color, (rect.left, rect.bottom - 1), (rect.right - 1, rect.bottom - 1), 1)
-        
-        # Blit grid onto cache
-        cache_surface.blit(grid_surface, (0, 0))
-        
-        # Draw faction territories (semi-transparent overlays)
-        if state.factions:
-            overlay_surface = pygame.Surface((full_width, full_height), pygame.SRCALPHA)
-            for faction in state.factions:
-                if faction.territory_mask:
-                    # Create faction-specific overlay color
-                    overlay_color = faction.color + (80,)
-                    for (x, y) in faction.territory_mask:
-                        px = x * C.TILE_SIZE * scale
-                        py = y * C.TILE_SIZE * scale
-                        rect = pygame.Rect(px, py, C.TILE_SIZE * scale, C.TILE_SIZE * scale)
-                        overlay_surface.fill(overlay_color, rect)
-            cache_surface.blit(overlay_surface, (0, 0))
-        
-        # Draw borders
-        if state.biome_grid and state.region_grid:
-            # Build faction map for quick lookup
-            faction_map = {}
-            if state.factions:
-                for faction in state.factions:
-                    for (x, y) in faction.territory_mask:
-                        faction_map[(x, y)] = faction
-            
-            for y in range(C.BASE_GRID_HEIGHT):
-                for x in range(C.BASE_GRID_WIDTH):
-                    rid = state.region_grid[y][x]
-                    px = x * C.TILE_SIZE * scale
-                    py = y * C.TILE_SIZE * scale
-                    rect = pygame.Rect(px, py, C.TILE_SIZE * scale, C.TILE_SIZE * scale)
-                    
-                    # Region boundaries
-                    if x + 1 < C.BASE_GRID_WIDTH and state.region_grid[y][x + 1] != rid:
-                        pygame.draw.line(cache_surface, C.ZOOM_REGION_BORDER_COLOR, (rect.right, rect.top), (rect.right, rect.bottom), 4)
-                    if y + 1 < C.BASE_GRID_HEIGHT and state.region_grid[y + 1][x] != rid:
-                        pygame.draw.line(cache_surface, C.ZOOM_REGION_BORDER_COLOR, (rect.left, rect.bottom), (rect.right, rect.bottom), 4)
-                    
-                    # Faction borders
-                    current_faction = faction_map.get((x, y))
-                    faction_border_width = 6
-                    
-                    if x + 1 < C.BASE_GRID_WIDTH:
-                        right_faction = faction_map.get((x + 1, y))
-                        if current_faction != right_faction and (current_faction or right_faction):
-                            border_color = current_faction.color if current_faction else right_faction.color
-                            pygame.draw.line(cache_surface, border_color, (rect.right, rect.top), (rect.right, rect.bottom), faction_border_width)
-                    
-                    if y + 1 < C.BASE_GRID_HEIGHT:
-                        bottom_faction = faction_map.get((x, y + 1))
-                        if current_faction != bottom_faction and (current_faction or bottom_faction):
-                            border_color = current_faction.color if current_faction else bottom_faction.color
-                            pygame.draw.line(cache_surface, border_color, (rect.left, rect.bottom), (rect.right, rect.bottom), faction_border_width)
-        
-        
-        state.zoom_full_map_cache = cache_surface
-    
-    # Generate or update fog layer
-    if state.zoom_fog_layer is None and state.fog_grid:
-        scale = C.ZOOM_SCALE
-        full_width = C.BASE_GRID_WIDTH * C.TILE_SIZE * scale
-        full_height = C.BASE_GRID_HEIGHT * C.TILE_SIZE * scale
-        
-        # Create fog layer (black with alpha)
-        fog_layer = pygame.Surface((full_width, full_height), pygame.SRCALPHA)
-        fog_layer.fill((0, 0, 0, 255))  # Fully opaque black
-        
-        # Punch holes where fog is revealed
-        if not state.debug_fog_off:
-            for y in range(C.BASE_GRID_HEIGHT):
-                for x in range(C.BASE_GRID_WIDTH):
-                    if state.fog_grid[y][x]:
-                        px = x * C.TILE_SIZE * scale
-                        py = y * C.TILE_SIZE * scale
-                        rect = pygame.Rect(px, py, C.TILE_SIZE * scale, C.TILE_SIZE * scale)
-                        fog_layer.fill((0, 0, 0, 0), rect)  # Transparent
-        else:
-            # Debug mode: all transparent
-            fog_layer.fill((0, 0, 0, 0))
-        
-        state.zoom_fog_layer = fog_layer
-    
-    # Calculate viewport to blit
+    # Render the chunks in view (only when they first scroll in, or after the map changes)
+    repaint_damage(state)
     view_width_px = C.SCREEN_WIDTH - C.INFO_PANEL_WIDTH
     view_height_px = C.SCREEN_HEIGHT - C.TOP_BAR_HEIGHT
-    
-    source_x = view_x0 * C.TILE_SIZE * scale
-    source_y = view_y0 * C.TILE_SIZE * scale
-    source_rect = pygame.Rect(source_x, source_y, view_width_px, view_height_px)
-    
-    # Blit base map
-    if state.zoom_full_map_cache:
-        screen.blit(state.zoom_full_map_cache, (map_origin_x, map_origin_y), source_rect)
-    
-    # Blit fog layer
-    if state.zoom_fog_layer and not state.debug_fog_off:
-        screen.blit(state.zoom_fog_layer, (map_origin_x, map_origin_y), source_rect)
+    tile_px = C.TILE_SIZE * scale
+    if state.biome_grid is not None and state.region_grid is not None:
+        if state.zoom_chunks is None:
+            state.zoom_chunks = ZoomChunkCache()
+        keys = state.zoom_chunks.keys_in(
+            view_x0, view_y0,
+            min(C.BASE_GRID_WIDTH, view_x0 + -(-view_width_px // tile_px)),
+            min(C.BASE_GRID_HEIGHT, view_y0 + -(-view_height_px // tile_px)))
+        chunks = [_zoom_chunk(state, key) for key in keys]
+        state.zoom_chunks.trim(keys)
+
+        # Blit map chunks, then their fog layers, clipped to the map area
+        clip = screen.get_clip()
+        screen.set_clip(pygame.Rect(map_origin_x, map_origin_y, view_width_px, view_height_px))
+        for chunk in chunks:
+            screen.blit(chunk.map, (map_origin_x + (chunk.x - view_x0) * tile_px,
+                                    map_origin_y + (chunk.y - view_y0) * tile_px))
+        if not state.debug_fog_off:
+            for chunk in chunks:
+                if chunk.fog is not None:
+                    screen.blit(chunk.fog, (map_origin_x + (chunk.x - view_x0) * tile_px,
+                                            map_origin_y + (chunk.y - view_y0) * tile_px))
+        screen.set_clip(clip)
 
     mx, my = pygame.mouse.get_pos()
     hover_tile = None
@@ -270,7 +394,7 @@ def render_zoom(screen, font, state):
             # Hover highlight for explorable regions (only when explorer is selected)
             selected_units = [u for u in state.units if u.selected and u.unit_type == "explorer"]
             if selected_units:
-                hover_rid = state.region_grid[ty][tx]
+                hover_rid = int(state.region_grid[ty, tx])
                 
                 # Build adjacent regions cache if needed
                 from game_system import build_adjacent_regions_cache
@@ -287,9 +411,9 @@ def render_zoom(screen, font, state):
                     # Draw lighter overlay on fogged tiles of this region in view
                     for y in range(view_y0, view_y1 + 1):
                         for x in range(view_x0, view_x1 + 1):
-                            if (state.region_grid[y][x] == hover_rid and 
-                                state.fog_grid and 
-                                not state.fog_grid[y][x]):
+                            if (state.region_grid[y, x] == hover_rid and 
+                                state.fog is not None and 
+                                not state.fog.is_revealed(x, y)):
                                 px = map_origin_x + (x - view_x0) * C.TILE_SIZE * scale
                                 py = map_origin_y + (y - view_y0) * C.TILE_SIZE * scale
                                 rect = pygame.Rect(px, py, C.TILE_SIZE * scale, C.TILE_SIZE * scale)
@@ -308,62 +432,63 @@ def render_zoom(screen, font, state):
         if not hasattr(state, '_cached_selected_region_id_zoom') or state._cached_selected_region_id_zoom != state.selected_region:
             state._cached_selected_region_id_zoom = state.selected_region
             
-            # Create full-map overlay surface (cached)
+            # Create overlay surface over the region's bounding box (cached)
             scale = C.ZOOM_SCALE
-            full_width = C.BASE_GRID_WIDTH * C.TILE_SIZE * scale
-            full_height = C.BASE_GRID_HEIGHT * C.TILE_SIZE * scale
-            highlight_surface = pygame.Surface((full_width, full_height), pygame.SRCALPHA)
+            bx0, by0, bx1, by1 = state.region_index.bbox(state.selected_region) or (0, 0, 0, 0)
+            box_width = (bx1 - bx0 + 1) * C.TILE_SIZE * scale
+            box_height = (by1 - by0 + 1) * C.TILE_SIZE * scale
+            highlight_surface = pygame.Surface((box_width, box_height), pygame.SRCALPHA)
             highlight_color = (255, 220, 0, 100)  # Yellow with alpha
             
-            for y in range(C.BASE_GRID_HEIGHT):
-                for x in range(C.BASE_GRID_WIDTH):
-                    rid = state.region_grid[y][x]
-                    if rid == state.selected_region:
-                        px = x * C.TILE_SIZE * scale
-                        py = y * C.TILE_SIZE * scale
-                        rect = pygame.Rect(px, py, C.TILE_SIZE * scale, C.TILE_SIZE * scale)
-                        highlight_surface.fill(highlight_color, rect)
+            for x, y in state.region_index.tiles(state.selected_region):
+                px = (x - bx0) * C.TILE_SIZE * scale
+                py = (y - by0) * C.TILE_SIZE * scale
+                rect = pygame.Rect(px, py, C.TILE_SIZE * scale, C.TILE_SIZE * scale)
+                highlight_surface.fill(highlight_color, rect)
             
             state.selected_region_overlay_zoom_cache = highlight_surface
         
-        # Blit cached overlay (only visible portion)
+        # Blit cached overlay at the region's bounding box, clipped to the map area
         if state.selected_region_overlay_zoom_cache:
-            source_x = view_x0 * C.TILE_SIZE * scale
-            source_y = view_y0 * C.TILE_SIZE * scale
+            bx0, by0 = (state.region_index.bbox(state.selected_region) or (0, 0))[:2]
             view_width_px = C.SCREEN_WIDTH - C.INFO_PANEL_WIDTH
             view_height_px = C.SCREEN_HEIGHT - C.TOP_BAR_HEIGHT
-            source_rect = pygame.Rect(source_x, source_y, view_width_px, view_height_px)
-            screen.blit(state.selected_region_overlay_zoom_cache, (map_origin_x, map_origin_y), source_rect)
+            clip = screen.get_clip()
+            screen.set_clip(pygame.Rect(map_origin_x, map_origin_y, view_width_px, view_height_px))
+            screen.blit(state.selected_region_overlay_zoom_cache,
+                        (map_origin_x + (bx0 - view_x0) * C.TILE_SIZE * scale,
+                         map_origin_y + (by0 - view_y0) * C.TILE_SIZE * scale))
+            screen.set_clip(clip)
         
         # Draw border for clarity (only for visible tiles)
         border_color = (255, 220, 0)
         for y in range(view_y0, view_y1 + 1):
             for x in range(view_x0, view_x1 + 1):
-                rid = state.region_grid[y][x]
+                rid = state.region_grid[y, x]
                 if rid == state.selected_region:
                     px = map_origin_x + (x - view_x0) * C.TILE_SIZE * scale
                     py = map_origin_y + (y - view_y0) * C.TILE_SIZE * scale
                     rect = pygame.Rect(px, py, C.TILE_SIZE * scale, C.TILE_SIZE * scale)
                     
                     # Check neighbors for boundary
-                    if x + 1 <= view_x1 and state.region_grid[y][x + 1] != rid:
+                    if x + 1 <= view_x1 and state.region_grid[y, x + 1] != rid:
                         pygame.draw.line(screen, border_color, (rect.right, rect.top), (rect.right, rect.bottom), 3)
-                    if x - 1 >= view_x0 and state.region_grid[y][x - 1] != rid:
+                    if x - 1 >= view_x0 and state.region_grid[y, x - 1] != rid:
                         pygame.draw.line(screen, border_color, (rect.left, rect.top), (rect.left, rect.bottom), 3)
-                    if y + 1 <= view_y1 and state.region_grid[y + 1][x] != rid:
+                    if y + 1 <= view_y1 and state.region_grid[y + 1, x] != rid:
                         pygame.draw.line(screen, border_color, (rect.left, rect.bottom), (rect.right, rect.bottom), 3)
-                    if y - 1 >= view_y0 and state.region_grid[y - 1][x] != rid:
+                    if y - 1 >= view_y0 and state.region_grid[y - 1, x] != rid:
                         pygame.draw.line(screen, border_color, (rect.left, rect.top), (rect.right, rect.top), 3)
 
     # Render Region Seeds (Centers)
     if state.region_seeds:
         for idx, (sx, sy) in enumerate(state.region_seeds):
             # Only draw seeds if visible or fog off
-            if not state.debug_fog_off and state.fog_grid and not state.fog_grid[sy][sx]:
+            if not state.debug_fog_off and state.fog is not None and not state.fog.is_revealed(sx, sy):
                 continue
             
             # Skip SEA and LAKE
-            if state.biome_grid[sy][sx] in ("SEA", "LAKE"):
+            if grids.is_water(state.biome_grid, sx, sy):
                 continue
             
             # Check if seed is in current view
@@ -384,7 +509,7 @@ def render_zoom(screen, font, state):
     if state.resource_nodes:
         for node in state.resource_nodes:
             # Only draw if visible or fog off
-            if not state.debug_fog_off and state.fog_grid and not state.fog_grid[node.y][node.x]:
+            if not state.debug_fog_off and state.fog is not None and not state.fog.is_revealed(node.x, node.y):
                 continue
             
             # Check if node is in current view
@@ -419,11 +544,10 @@ def render_zoom(screen, font, state):
 
     # Render units in zoom view
     for unit in state.units:
-        ux = int(unit.x)
-        uy = int(unit.y)
-        if view_x0 <= ux <= view_x1 and view_y0 <= uy <= view_y1:
-            unit_px = map_origin_x + (ux - view_x0) * C.TILE_SIZE * scale + (C.TILE_SIZE * scale) // 2
-            unit_py = map_origin_y + (uy - view_y0) * C.TILE_SIZE * scale + (C.TILE_SIZE * scale) // 2
+        rx, ry = unit.render_pos(state.sim_alpha)
+        if view_x0 <= int(rx) <= view_x1 and view_y0 <= int(ry) <= view_y1:
+            unit_px = map_origin_x + int((rx - view_x0) * C.TILE_SIZE * scale) + (C.TILE_SIZE * scale) // 2
+            unit_py = map_origin_y + int((ry - view_y0) * C.TILE_SIZE * scale) + (C.TILE_SIZE * scale) // 2
             
             # Draw unit circle
             base_color = C.UNIT_COLORS.get(unit.unit_type, (200, 200, 200))
@@ -432,9 +556,11 @@ def render_zoom(screen, font, state):
             pygame.draw.circle(screen, color, (unit_px, unit_py), radius, 0)
             pygame.draw.circle(screen, (255, 255, 255), (unit_px, unit_py), radius, 2)
 
+    t = PROFILER.start()
     render_panel(screen, font, state, hover_tile=hover_tile)
     render_top_bar(screen, font, state)
     render_unit_list(screen, font, state)
+    PROFILER.stop("render_ui", t)
 
     # Render Confirmation Dialog (Same as render_main)
     if state.confirm_dialog:
@@ -481,8 +607,9 @@ def render_zoom(screen, font, state):
 
 
 def render_world_view(screen, font, state, back_button_rect):
-    if state.biome_grid and state.region_grid:
-        # Check if cache exists, if not create it
+    if state.biome_grid is not None and state.region_grid is not None:
+        # Check if cache exists, if not create it; otherwise patch changed tiles
+        repaint_damage(state)
         if state.map_surface is None:
             pre_render_map(state)
         
@@ -506,7 +633,7 @@ def render_world_view(screen, font, state, back_button_rect):
                 hover_gy = (my - C.TOP_BAR_HEIGHT) // C.TILE_SIZE
                 
                 if 0 <= hover_gx < C.BASE_GRID_WIDTH and 0 <= hover_gy < C.BASE_GRID_HEIGHT:
-                    hover_rid = state.region_grid[hover_gy][hover_gx]
+                    hover_rid = int(state.region_grid[hover_gy, hover_gx])
                     
                     # Build adjacent regions cache if needed
                     from game_system import build_adjacent_regions_cache
@@ -518,25 +645,17 @@ def render_world_view(screen, font, state, back_button_rect):
                         hover_rid in state.adjacent_regions_cache and 
                         hover_rid != state.player_region_id):
                         
-                        # Check if this region has any fog
-                        has_fog = False
-                        if state.fog_grid:
-                            for y in range(C.BASE_GRID_HEIGHT):
-                                for x in range(C.BASE_GRID_WIDTH):
-                                    if state.region_grid[y][x] == hover_rid and not state.fog_grid[y][x]:
-                                        has_fog = True
-                                        break
-                                if has_fog:
-                                    break
+                        # Fogged tiles of this region
+                        fogged = []
+                        if state.fog is not None and state.region_index.has_fog(hover_rid):
+                            fogged = [t for t in state.region_index.tiles(hover_rid) if not state.fog.is_revealed(*t)]
                         
                         # Draw lighter overlay on fogged tiles of this region
-                        if has_fog:
+                        if fogged:
                             hover_surface = pygame.Surface((C.BASE_GRID_WIDTH * C.TILE_SIZE, C.BASE_GRID_HEIGHT * C.TILE_SIZE), pygame.SRCALPHA)
-                            for y in range(C.BASE_GRID_HEIGHT):
-                                for x in range(C.BASE_GRID_WIDTH):
-                                    if state.region_grid[y][x] == hover_rid and not state.fog_grid[y][x]:
-                                        rect = pygame.Rect(x * C.TILE_SIZE, y * C.TILE_SIZE, C.TILE_SIZE, C.TILE_SIZE)
-                                        hover_surface.fill((60, 60, 60, 255), rect)  # Lighter gray, same alpha
+                            for x, y in fogged:
+                                rect = pygame.Rect(x * C.TILE_SIZE, y * C.TILE_SIZE, C.TILE_SIZE, C.TILE_SIZE)
+                                hover_surface.fill((60, 60, 60, 255), rect)  # Lighter gray, same alpha
                             screen.blit(hover_surface, (C.INFO_PANEL_WIDTH, C.TOP_BAR_HEIGHT))
 
         # Dynamic highlights (Selection) - Fill entire region with semi-transparent yellow
@@ -545,12 +664,7 @@ def render_world_view(screen, font, state, back_button_rect):
             if not hasattr(state, '_cached_selected_region_id') or state._cached_selected_region_id != state.selected_region:
                 # Selection changed, rebuild cache
                 state._cached_selected_region_id = state.selected_region
-                state._cached_selected_region_tiles = []
-                
-                for y in range(C.BASE_GRID_HEIGHT):
-                    for x in range(C.BASE_GRID_WIDTH):
-                        if state.region_grid[y][x] == state.selected_region:
-                            state._cached_selected_region_tiles.append((x, y))
+                state._cached_selected_region_tiles = state.region_index.tiles(state.selected_region)
                 
                 # Create cached overlay surface
                 highlight_surface = pygame.Surface((C.BASE_GRID_WIDTH * C.TILE_SIZE, C.BASE_GRID_HEIGHT * C.TILE_SIZE), pygame.SRCALPHA)
@@ -571,19 +685,19 @@ def render_world_view(screen, font, state, back_button_rect):
                 border_color = (255, 220, 0)
                 for x, y in state._cached_selected_region_tiles:
                     # Check neighbors for boundary
-                    if x + 1 < C.BASE_GRID_WIDTH and state.region_grid[y][x+1] != state.selected_region:
+                    if x + 1 < C.BASE_GRID_WIDTH and state.region_grid[y, x + 1] != state.selected_region:
                         x0 = C.INFO_PANEL_WIDTH + (x + 1) * C.TILE_SIZE
                         y0 = C.TOP_BAR_HEIGHT + y * C.TILE_SIZE
                         pygame.draw.line(screen, border_color, (x0, y0), (x0, y0 + C.TILE_SIZE), 2)
-                    if x > 0 and state.region_grid[y][x-1] != state.selected_region:
+                    if x > 0 and state.region_grid[y, x - 1] != state.selected_region:
                         x0 = C.INFO_PANEL_WIDTH + x * C.TILE_SIZE
                         y0 = C.TOP_BAR_HEIGHT + y * C.TILE_SIZE
                         pygame.draw.line(screen, border_color, (x0, y0), (x0, y0 + C.TILE_SIZE), 2)
-                    if y + 1 < C.BASE_GRID_HEIGHT and state.region_grid[y+1][x] != state.selected_region:
+                    if y + 1 < C.BASE_GRID_HEIGHT and state.region_grid[y + 1, x] != state.selected_region:
                         x0 = C.INFO_PANEL_WIDTH + x * C.TILE_SIZE
                         y0 = C.TOP_BAR_HEIGHT + (y + 1) * C.TILE_SIZE
                         pygame.draw.line(screen, border_color, (x0, y0), (x0 + C.TILE_SIZE, y0), 2)
-                    if y > 0 and state.region_grid[y-1][x] != state.selected_region:
+                    if y > 0 and state.region_grid[y - 1, x] != state.selected_region:
                         x0 = C.INFO_PANEL_WIDTH + x * C.TILE_SIZE
                         y0 = C.TOP_BAR_HEIGHT + y * C.TILE_SIZE
                         pygame.draw.line(screen, border_color, (x0, y0), (x0 + C.TILE_SIZE, y0), 2)
@@ -591,11 +705,11 @@ def render_world_view(screen, font, state, back_button_rect):
     if state.region_seeds:
         for idx, (sx, sy) in enumerate(state.region_seeds):
             # Only draw seeds if visible or fog off
-            if not state.debug_fog_off and state.fog_grid and not state.fog_grid[sy][sx]:
+            if not state.debug_fog_off and state.fog is not None and not state.fog.is_revealed(sx, sy):
                 continue
             
             # Skip SEA and LAKE
-            if state.biome_grid[sy][sx] in ("SEA", "LAKE"):
+            if grids.is_water(state.biome_grid, sx, sy):
                 continue
                 
             if idx == state.player_region_id:
@@ -611,8 +725,9 @@ def render_world_view(screen, font, state, back_button_rect):
 
     # Render units
     for unit in state.units:
-        unit_px = C.INFO_PANEL_WIDTH + int(unit.x * C.TILE_SIZE) + C.TILE_SIZE // 2
-        unit_py = C.TOP_BAR_HEIGHT + int(unit.y * C.TILE_SIZE) + C.TILE_SIZE // 2
+        rx, ry = unit.render_pos(state.sim_alpha)
+        unit_px = C.INFO_PANEL_WIDTH + int(rx * C.TILE_SIZE) + C.TILE_SIZE // 2
+        unit_py = C.TOP_BAR_HEIGHT + int(ry * C.TILE_SIZE) + C.TILE_SIZE // 2
         
         # Draw unit circle
         color = (0, 200, 255) if unit.selected else (100, 200, 255)
@@ -634,39 +749,27 @@ def render_world_view(screen, font, state, back_button_rect):
     )
     pygame.draw.rect(screen, C.WHITE, player_rect)
 
+    t = PROFILER.start()
     render_panel(screen, font, state)
     render_top_bar(screen, font, state)
     render_unit_list(screen, font, state)
+    PROFILER.stop("render_ui", t)
 
     # Debug: Display region count and biome distribution (cached)
-    if state.region_info and state.biome_grid:
+    if state.region_info and state.biome_grid is not None:
         # Cache debug info to avoid recalculating every frame
         if not hasattr(state, '_cached_debug_info'):
-            land_region_count = 0
-            for idx, info in enumerate(state.region_info):
-                # Check if this region has any land tiles
-                has_land = False
-                for y in range(C.BASE_GRID_HEIGHT):
-                    for x in range(C.BASE_GRID_WIDTH):
-                        if state.region_grid[y][x] == idx:
-                            if state.biome_grid[y][x] not in ("SEA", "LAKE"):
-                                has_land = True
-                                break
-                    if has_land:
-                        break
-                if has_land:
-                    land_region_count += 1
+            # Regions with any land tile
+            land_rids = np.unique(state.region_grid[~grids.water_mask(state.biome_grid)])
+            land_region_count = int(((land_rids >= 0) & (land_rids < len(state.region_info))).sum())
             
             # Calculate biome distribution
-            biome_counts = {}
+            biome_counts = np.bincount(state.biome_grid.ravel(), minlength=len(grids.BIOMES))
             total_tiles = C.BASE_GRID_WIDTH * C.BASE_GRID_HEIGHT
-            for y in range(C.BASE_GRID_HEIGHT):
-                for x in range(C.BASE_GRID_WIDTH):
-                    biome = state.biome_grid[y][x]
-                    biome_counts[biome] = biome_counts.get(biome, 0) + 1
         
             # Sort by percentage
-            biome_percentages = [(biome, (count / total_tiles) * 100) for biome, count in biome_counts.items()]
+            biome_percentages = [(grids.BIOMES[code], (int(count) / total_tiles) * 100)
+                                 for code, count in enumerate(biome_counts) if count]
             biome_percentages.sort(key=lambda x: x[1], reverse=True)
             
             # Cache the results
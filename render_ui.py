@@ -1,5 +1,6 @@
 import pygame
 import config as C
+import grids
 from render_utils import draw_text, draw_text_centered, format_weights, format_distribution
 
 def render_menu(screen, font, button_rect, state):
@@ -68,12 +69,52 @@ def render_menu(screen, font, button_rect, state):
     state.humid_minus_rect = minus_rect
     state.humid_plus_rect = plus_rect
 
+    start_y += 40
+
+    # World Seed
+    seed_label = state.world_seed if state.world_seed is not None else "ランダム"
+    lbl_surf = font.render(f"シード: {seed_label}", True, C.WHITE)
+    screen.blit(lbl_surf, (button_rect.x, start_y + 10))
+
+    reroll_rect = pygame.Rect(button_rect.right - 80, start_y, 70, 30)
+    pygame.draw.rect(screen, C.GREY, reroll_rect)
+    pygame.draw.rect(screen, C.WHITE, reroll_rect, 1)
+    draw_text_centered(screen, font, "変更", reroll_rect)
+
+    state.seed_reroll_rect = reroll_rect
 
-def render_loading(screen, font):
+
+def render_loading(screen, font, job=None):
+    """
+    Loading screen. With a WorldGenJob, also shows the current generation
+    stage, a progress bar and the cancel hint.
+    """
     load_text = font.render("ロード中...", True, C.WHITE)
     load_rect = load_text.get_rect(center=(C.SCREEN_WIDTH // 2, C.SCREEN_HEIGHT // 2))
     screen.blit(load_text, load_rect)
 
+    if job is None:
+        return
+
+    # Stage name
+    stage_name = C.GENERATION_STAGE_NAMES.get(job.stage, "準備中")
+    stage_surf = font.render(f"{stage_name} ({job.stage_index + 1}/{len(C.GENERATION_STAGES)})", True, C.WHITE)
+    stage_rect = stage_surf.get_rect(center=(C.SCREEN_WIDTH // 2, load_rect.bottom + 24))
+    screen.blit(stage_surf, stage_rect)
+
+    # Progress bar
+    bar_w, bar_h = 320, 14
+    bar_rect = pygame.Rect((C.SCREEN_WIDTH - bar_w) // 2, stage_rect.bottom + 12, bar_w, bar_h)
+    fill_rect = pygame.Rect(bar_rect.x, bar_rect.y, int(bar_w * job.progress), bar_h)
+    pygame.draw.rect(screen, C.DARK_GREY, bar_rect)
+    pygame.draw.rect(screen, (90, 180, 70), fill_rect)
+    pygame.draw.rect(screen, C.WHITE, bar_rect, 1)
+
+    # Cancel hint
+    hint_surf = font.render("Esc: キャンセル", True, C.GREY)
+    hint_rect = hint_surf.get_rect(center=(C.SCREEN_WIDTH // 2, bar_rect.bottom + 24))
+    screen.blit(hint_surf, hint_rect)
+
 
 def render_unit_list(screen, font, state):
     """Render unit list buttons in the top-right corner"""
@@ -123,7 +164,7 @@ def render_unit_list(screen, font, state):
         ux, uy = int(unit.x), int(unit.y)
         region_id = "?"
         if 0 <= ux < C.BASE_GRID_WIDTH and 0 <= uy < C.BASE_GRID_HEIGHT:
-            region_id = state.region_grid[uy][ux]
+            region_id = state.region_grid[uy, ux]
             
         status = "待機"
         if unit.target_region_id is not None:
@@ -182,7 +223,7 @@ def render_top_bar(screen, font, state):
         spinner_idx = int(state.game_time / 15) % 4
         spinner = ["|", "／", "－", "＼"][spinner_idx]
         
-    time_text = f"Day: {state.day}  {spinner}  ({status_text})"
+    time_text = f"Day: {state.day}  {spinner}  ({status_text} x{state.game_speed:g})"
     time_surf = font.render(time_text, True, C.WHITE)
     time_rect = time_surf.get_rect(right=C.SCREEN_WIDTH - pad, centery=C.TOP_BAR_HEIGHT // 2)
     screen.blit(time_surf, time_rect)
@@ -217,7 +258,7 @@ def render_panel(screen, font, state, hover_tile=None):
     if state.player_region_id is not None:
         draw_text(screen, font, f"自領域 ID: {state.player_region_id}", pad, current_y)
         current_y += lh
-        draw_text(screen, font, f"タイル数: {len(state.player_region_mask)}", pad, current_y)
+        draw_text(screen, font, f"タイル数: {state.territory.count(state.player_faction_id) if state.territory else 0}", pad, current_y)
         current_y += lh
 
     current_y += lh # spacer
@@ -297,7 +338,7 @@ def render_panel(screen, font, state, hover_tile=None):
         
         # Check fog
         is_fogged = False
-        if not state.debug_fog_off and state.fog_grid and not state.fog_grid[hy][hx]:
+        if not state.debug_fog_off and state.fog is not None and not state.fog.is_revealed(hx, hy):
             is_fogged = True
             
         draw_text(screen, font, "タイル情報", pad, current_y)
@@ -309,8 +350,8 @@ def render_panel(screen, font, state, hover_tile=None):
             draw_text(screen, font, "未探索", pad, current_y)
             current_y += lh
         else:
-            rid = state.region_grid[hy][hx]
-            b = state.biome_grid[hy][hx]
+            rid = state.region_grid[hy, hx]
+            b = grids.biome_name(state.biome_grid[hy, hx])
             draw_text(screen, font, f"バイオーム: {C.BIOME_NAMES.get(b, b)}", pad, current_y)
             current_y += lh
             draw_text(screen, font, f"リージョンID: {rid}", pad, current_y)
@@ -334,6 +375,23 @@ def render_panel(screen, font, state, hover_tile=None):
                         break
 
 
+def _save_thumbnail(meta, height):
+    """
+    Map thumbnail of a save slot scaled to `height` px, or None if the save has none.
+    Built once and kept in the slot metadata, which save_manager caches per file.
+    """
+    thumb = meta.get("thumbnail")
+    if not thumb:
+        return None
+    surf = meta.get("thumbnail_surface")
+    if surf is None or surf.get_height() != height:
+        w, h, rgb = thumb
+        surf = pygame.image.frombuffer(rgb, (w, h), "RGB")
+        surf = pygame.transform.smoothscale(surf, (max(1, w * height // h), height))
+        meta["thumbnail_surface"] = surf
+    return surf
+
+
 def render_save_load_menu(screen, font, state, is_save_mode=True):
     """
     Render the Save/Load menu with slots.
@@ -344,8 +402,19 @@ def render_save_load_menu(screen, font, state, is_save_mode=True):
     overlay.fill((0, 0, 0, 180))
     screen.blit(overlay, (0, 0))
     
+    import save_manager
+    slots = [0, 1, 2, 3] # 0 = Quick
+    if not is_save_mode:
+        # Newest of the rotating autosaves
+        autosave_slot = save_manager.latest_autosave_slot()
+        if autosave_slot is not None:
+            slots.insert(1, autosave_slot)
+
+    slot_height = 44
+    slot_spacing = 12
+
     # Centered Panel
-    panel_w, panel_h = 420, 360
+    panel_w, panel_h = 420, 360 + (len(slots) - 4) * (slot_height + slot_spacing)
     panel_rect = pygame.Rect((C.SCREEN_WIDTH - panel_w) // 2, (C.SCREEN_HEIGHT - panel_h) // 2, panel_w, panel_h)
     
     pygame.draw.rect(screen, C.DARK_GREY, panel_rect)
@@ -358,12 +427,7 @@ def render_save_load_menu(screen, font, state, is_save_mode=True):
     screen.blit(title_surf, title_rect)
     
     # Slots
-    import save_manager
-    slots = [0, 1, 2, 3] # 0 = Auto/Quick
-    
     start_y = title_rect.bottom + 30
-    slot_height = 44
-    slot_spacing = 12
     
     if not hasattr(state, 'save_load_rects'):
         state.save_load_rects = []
@@ -384,17 +448,26 @@ def render_save_load_menu(screen, font, state, is_save_mode=True):
         pygame.draw.rect(screen, C.WHITE, slot_rect, 1)
         
         # Text
-        slot_name_map = {0: "オート/クイック", 1: "スロット 1", 2: "スロット 2", 3: "スロット 3"}
-        slot_name = slot_name_map.get(slot_id, f"Slot {slot_id}")
+        slot_name_map = {0: "クイック", 1: "スロット 1", 2: "スロット 2", 3: "スロット 3"}
+        slot_name = "オート" if slot_id < 0 else slot_name_map.get(slot_id, f"Slot {slot_id}")
         
-        if meta and meta.get("exists"):
+        text_rect = slot_rect
+        thumb = _save_thumbnail(meta, slot_height - 6) if meta else None
+        if thumb is not None:
+            screen.blit(thumb, (slot_rect.left + 3, slot_rect.top + 3))
+            text_rect = pygame.Rect(slot_rect.left + thumb.get_width() + 6, slot_rect.top,
+                                    slot_rect.width - thumb.get_width() - 6, slot_rect.height)
+
+        if meta and meta.get("error"):
+            info_text = f"{slot_name}: 読み込み不可 ({meta.get('date').split(' ')[0]})"
+        elif meta and meta.get("exists"):
             day_str = f"Day {meta.get('day')}"
             date_str = meta.get('date').split(" ")[0] # Just date
             info_text = f"{slot_name}: {day_str} ({date_str})"
         else:
             info_text = f"{slot_name}: ---"
             
-        draw_text_centered(screen, font, info_text, slot_rect)
+        draw_text_centered(screen, font, info_text, text_rect)
         
         state.save_load_rects.append((slot_rect, slot_id))
         start_y += slot_height + slot_spacing
@@ -411,3 +484,35 @@ def render_save_load_menu(screen, font, state, is_save_mode=True):
     draw_text_centered(screen, font, "キャンセル", back_rect)
     
     state.save_load_back_rect = back_rect
+
+
+def render_profiler(screen, font, profiler):
+    """
+    Frame profiler overlay (top left of the map area): rolling mean / p50 / p95 / p99 in ms
+    per stage. Stages under render_zoom / render_world are included in them.
+    """
+    rows = profiler.summary()
+    if not rows:
+        return
+    line_h = font.get_linesize()
+    width = 420
+    height = (len(rows) + 2) * line_h + 8
+    x = C.INFO_PANEL_WIDTH + 8
+    y = C.TOP_BAR_HEIGHT + 8
+
+    panel = pygame.Surface((width, height), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 180))
+    screen.blit(panel, (x, y))
+
+    frame_ms = profiler.mean("total")
+    fps = 1000.0 / frame_ms if frame_ms > 0 else 0.0
+    trace = f"  記録中 {len(profiler.trace)}f" if profiler.trace is not None else ""
+    draw_text(screen, font, f"プロファイラ  {fps:.0f} FPS{trace}", x + 8, y + 4, color=(255, 220, 0))
+    columns = (("ms", 8), ("平均", 150), ("p50", 215), ("p95", 280), ("p99", 345))
+    for label, cx in columns:
+        draw_text(screen, font, label, x + cx, y + 4 + line_h, color=(180, 180, 180))
+    for i, row in enumerate(rows):
+        ry = y + 4 + (i + 2) * line_h
+        draw_text(screen, font, row["stage"], x + 8, ry)
+        for key, (_, cx) in zip(("mean", "p50", "p95", "p99"), columns[1:]):
+            draw_text(screen, font, f"{row[key]:.2f}", x + cx, ry)
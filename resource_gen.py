@@ -1,58 +1,59 @@
 import random
 from typing import List, Tuple, Dict, Set
+import numpy as np
 import config as C
+import grids
 from state import ResourceNode
 
 
-def generate_resource_nodes(biome_grid: List[List[str]], region_grid: List[List[int]], 
-                           region_seeds: List[Tuple[int, int]]) -> List[ResourceNode]:
+def generate_resource_nodes(biome_grid: np.ndarray, region_grid: np.ndarray,
+                           region_seeds: List[Tuple[int, int]], rng: random.Random) -> List[ResourceNode]:
     """
     Generate resource nodes based on RESOURCE_TYPES config.
     This is data-driven - add new resources in config.py without changing this code.
+    All rolls come from `rng`, so the same stream gives the same nodes.
     """
     nodes = []
     region_limits: Dict[str, Set[int]] = {}  # Track region limits per resource type
     
-    # Pre-calculate Biome -> [ResourceType] map
+    # Pre-calculate Biome code -> [ResourceType] table
     # This avoids iterating all 100 resource types for every tile
-    biome_resource_map = {}
+    biome_resource_map = [[] for _ in grids.BIOMES]
     for res_type, res_config in C.RESOURCE_TYPES.items():
         if res_config.get("region_limit"):
             region_limits[res_type] = set()
             
-        for biome in res_config["biomes"]:
-            if biome not in biome_resource_map:
-                biome_resource_map[biome] = []
-            biome_resource_map[biome].append((res_type, res_config))
+        for code in grids.biome_codes(res_config["biomes"]):
+            biome_resource_map[code].append((res_type, res_config))
     
+    seed_positions = set(region_seeds)
+    biome_rows = biome_grid.tolist()  # Plain lists are faster for per-tile access
     for y in range(C.BASE_GRID_HEIGHT):
         for x in range(C.BASE_GRID_WIDTH):
-            biome = biome_grid[y][x]
-            
             # Skip if no resources defined for this biome
-            possible_resources = biome_resource_map.get(biome)
+            possible_resources = biome_resource_map[biome_rows[y][x]]
             if not possible_resources:
                 continue
             
             # Skip region centers
-            if (x, y) in region_seeds:
+            if (x, y) in seed_positions:
                 continue
             
             # Check applicable resources only
             for res_type, res_config in possible_resources:
                 # Check spawn rate
-                if random.random() >= res_config["spawn_rate"]:
+                if rng.random() >= res_config["spawn_rate"]:
                     continue
                 
                 # Check region limit
-                region_id = region_grid[y][x]
+                region_id = int(region_grid[y, x])
                 if res_config.get("region_limit"):
                     if region_id in region_limits[res_type]:
                         continue  # This region already has this resource
                     region_limits[res_type].add(region_id)
                 
                 # Determine max_development
-                rand = random.random()
+                rand = rng.random()
                 if rand < C.MAX_DEV_3_RATE:
                     max_dev = 3
                 elif rand < C.MAX_DEV_3_RATE + C.MAX_DEV_2_RATE:
@@ -68,11 +69,11 @@ def generate_resource_nodes(biome_grid: List[List[str]], region_grid: List[List[
                 else:
                     # Cluster resource
                     min_size, max_size = cluster_size
-                    size = random.randint(min_size, max_size)
-                    cluster = _create_cluster(x, y, biome_grid, res_config["biomes"], size)
+                    size = rng.randint(min_size, max_size)
+                    cluster = _create_cluster(x, y, biome_grid, res_config["biomes"], size, rng)
                     for cx, cy in cluster:
                         # Each tile in cluster gets its own max_dev roll
-                        rand = random.random()
+                        rand = rng.random()
                         if rand < C.MAX_DEV_3_RATE:
                             c_max_dev = 3
                         elif rand < C.MAX_DEV_3_RATE + C.MAX_DEV_2_RATE:
@@ -87,16 +88,17 @@ def generate_resource_nodes(biome_grid: List[List[str]], region_grid: List[List[
     return nodes
 
 
-def _create_cluster(start_x: int, start_y: int, biome_grid: List[List[str]], 
-                    target_biomes, target_size: int) -> List[Tuple[int, int]]:
+def _create_cluster(start_x: int, start_y: int, biome_grid: np.ndarray,
+                    target_biomes, target_size: int, rng: random.Random) -> List[Tuple[int, int]]:
     """
     Create a cluster of tiles of the same biome(s) starting from (start_x, start_y).
     target_biomes can be a string or list of strings.
     Returns list of (x, y) coordinates.
     """
-    # Normalize to list
+    # Normalize to a set of biome codes
     if isinstance(target_biomes, str):
         target_biomes = [target_biomes]
+    target_codes = set(grids.biome_codes(target_biomes))
     
     cluster = [(start_x, start_y)]
     candidates = []
@@ -105,13 +107,13 @@ def _create_cluster(start_x: int, start_y: int, biome_grid: List[List[str]],
     for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
         nx, ny = start_x + dx, start_y + dy
         if (0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT and
-            biome_grid[ny][nx] in target_biomes):
+            biome_grid[ny, nx] in target_codes):
             candidates.append((nx, ny))
     
     # Grow cluster
     while len(cluster) < target_size and candidates:
         # Pick random candidate
-        tile = random.choice(candidates)
+        tile = rng.choice(candidates)
         candidates.remove(tile)
         
         if tile not in cluster:
@@ -121,7 +123,7 @@ def _create_cluster(start_x: int, start_y: int, biome_grid: List[List[str]],
             for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
                 nx, ny = tile[0] + dx, tile[1] + dy
                 if (0 <= nx < C.BASE_GRID_WIDTH and 0 <= ny < C.BASE_GRID_HEIGHT and
-                    biome_grid[ny][nx] in target_biomes and
+                    biome_grid[ny, nx] in target_codes and
                     (nx, ny) not in cluster and (nx, ny) not in candidates):
                     candidates.append((nx, ny))
     
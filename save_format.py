@@ -0,0 +1,449 @@
+"""
+Save file container.
+
+    header      fixed-size struct: magic, format version, day, gold, food,
+                player faction, save time, thumbnail size, body size / CRC,
+                id of the world blob the save refers to (v2)
+    thumbnail   RGB bytes of a small map preview (thumb_w * thumb_h * 3)
+    body        section table (length-prefixed JSON) followed by the sections
+
+The header and thumbnail are enough for the save/load menu, so listing the
+slots never touches the body.
+
+The world data that never changes after generate_world (grids, region seeds
+and summaries, resource node positions, the distance fields and entrance
+costs of the pathfinder) is kept in a separate world blob,
+written once and named by the SHA-1 of its content. Its grids are stored
+uncompressed and aligned so a load maps them straight from the file. A save body holds only
+the delta: explored flags, resource development, the tile owner grid of the
+faction territories (v3; v2 stored a bitmap per faction) and a compressed pickle of the rest of the GameState (clock, fog,
+factions, units, ...). Version 1 saves, which embed the grids, are still read.
+"""
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config as C
+import grids
+from pathfinding import TABLE_NAMES, Pathfinder
+from state import GameState, ResourceNode
+from territory import NO_OWNER, TerritoryMap
+
+MAGIC = b"PGSV"
+VERSION = 3
+
+# magic, version, header size, day, gold, food, faction, timestamp,
+# thumb_w, thumb_h, body size, body crc32
+_HEADER = struct.Struct("<4sHHIiiidHHII")
+# v2: SHA-1 of the world blob (all zero if the world is stored in the body)
+_HEADER_WORLD = struct.Struct("<20s")
+_TOC_LEN = struct.Struct("<I")
+
+WORLD_MAGIC = b"PGWD"
+WORLD_VERSION = 2
+# magic, version, body size, body crc32. v1: compressed sections follow the
+# header. v2: the raw grids follow at _MAP_ALIGN-aligned offsets and the body
+# (section table and compressed payload) is at the end of the file
+_WORLD_HEADER = struct.Struct("<4sHII")
+_MAP_ALIGN = 64
+
+# GameState fields stored as array sections instead of inside the pickle
+ARRAY_FIELDS = ("biome_grid", "region_grid")
+# Fields fixed at generation time, stored in the world blob with ARRAY_FIELDS
+# (region_info without "explored", resource_nodes without "development")
+WORLD_FIELDS = ("region_seeds", "region_info", "resource_nodes", "coast_edge")
+
+# Thumbnail colour of tiles the player has not seen
+_THUMB_HIDDEN = (20, 20, 24)
+
+# (biome_grid, region_grid, region_info, resource_nodes, world id, static payload)
+# of the last world hashed or loaded; reused while the state holds the same objects
+_world_cache: Optional[tuple] = None
+
+
+class SaveFormatError(ValueError):
+    """The file is not a save container, or one this version cannot read."""
+
+
+def make_thumbnail(state) -> Tuple[int, int, bytes]:
+    """
+    Map preview: one pixel per SAVE_THUMB_STEP tiles, biome colours with
+    unrevealed tiles darkened.
+
+    Returns:
+        (width, height, RGB bytes), (0, 0, b"") without a world
+    """
+    if state.biome_grid is None:
+        return 0, 0, b""
+    step = C.SAVE_THUMB_STEP
+    rgb = grids.BIOME_PALETTE[state.biome_grid[::step, ::step]]
+    if state.fog is not None:
+        hidden = ~state.fog.mask()[::step, ::step]
+        rgb[hidden] = _THUMB_HIDDEN
+    h, w = rgb.shape[:2]
+    return w, h, np.ascontiguousarray(rgb).tobytes()
+
+
+def _world_key(state) -> tuple:
+    return (state.biome_grid, state.region_grid, state.region_info, state.resource_nodes)
+
+
+def _world_digest(arrays, payload: bytes) -> str:
+    digest = hashlib.sha1()
+    for name, array in arrays:
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode("utf-8"))
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(payload)
+    return digest.hexdigest()
+
+
+def _world_arrays(state) -> List[Tuple[str, np.ndarray]]:
+    """Array sections of the world blob: the grids, then the pathfinder tables."""
+    arrays = [(name, getattr(state, name)) for name in ARRAY_FIELDS]
+    return arrays + list(state.pathfinder.tables().items())
+
+
+def world_data(state):
+    """
+    Static world of a state: its id (content hash), array sections and the
+    pickled WORLD_FIELDS. Hashed once per world; later calls reuse the result
+    while the state still holds the same grid / summary objects.
+
+    Returns:
+        (world id, [(name, array)], payload), or None without a world
+    """
+    global _world_cache
+    if state.biome_grid is None or state.region_grid is None or state.region_info is None:
+        return None
+    key = _world_key(state)
+    cached = _world_cache
+    if cached is not None and all(a is b for a, b in zip(cached[:4], key)):
+        return cached[4], _world_arrays(state), cached[5]
+
+    static = {
+        "region_seeds": state.region_seeds,
+        "region_info": [{k: v for k, v in info.items() if k != "explored"} for info in state.region_info],
+        "resource_nodes": [(n.x, n.y, n.type, n.max_development) for n in state.resource_nodes],
+        "coast_edge": state.coast_edge,
+    }
+    payload = pickle.dumps(static, protocol=pickle.HIGHEST_PROTOCOL)
+    arrays = _world_arrays(state)
+    world_id = _world_digest(arrays, payload)
+    _world_cache = key + (world_id, payload)
+    return world_id, arrays, payload
+
+
+def world_filename(world_dir: str, world_id: str) -> str:
+    return os.path.join(world_dir, f"{world_id}.world")
+
+
+class SaveSnapshot:
+    """
+    Everything a save needs, taken on the main thread so the game can keep
+    running while it is compressed and written (see encode).
+
+    The world grids and static payload are shared with the live state rather
+    than copied: they never change after generate_world. The mutable rest
+    is pickled here.
+
+    Attributes:
+        header: (day, gold, food, faction, timestamp) for the file header
+        thumbnail: (w, h, RGB bytes) from make_thumbnail
+        world_id: Id of the world blob, None if the world is in the body
+        world_arrays, world_payload: Content of the world blob (see world_data)
+        arrays: (name, array) sections of the body
+        payload: Pickled GameState fields not stored elsewhere
+    """
+
+    def __init__(self, state):
+        fields = state.__getstate__()
+        self.header = (int(state.day), int(state.gold), int(state.food),
+                       int(state.player_faction_id), time.time())
+        self.thumbnail = make_thumbnail(state)
+        self.arrays = []
+        self.world_id = None
+        self.world_arrays = []
+        self.world_payload = b""
+
+        world = world_data(state)
+        if world is not None:
+            self.world_id, self.world_arrays, self.world_payload = world
+            for name in ARRAY_FIELDS + WORLD_FIELDS + ("resource_map",):
+                fields.pop(name, None)
+            self.arrays.append(("explored", np.array(
+                [info.get("explored", False) for info in state.region_info], dtype=bool)))
+            self.arrays.append(("development", np.array(
+                [n.development for n in state.resource_nodes], dtype=np.int16)))
+        else:
+            for name in ARRAY_FIELDS:
+                array = fields.pop(name, None)
+                if array is not None:
+                    self.arrays.append((name, array))
+        territory = fields.pop("territory", None)
+        if territory is not None:
+            # Copied: the owner grid keeps changing while the save is written
+            self.arrays.append(("owner", territory.owner.copy()))
+        self.payload = pickle.dumps(fields, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _join_territories(territory, width: int) -> np.ndarray:
+    """
+    Owner grid from the per-faction bitmaps of v2 saves ((n, H, ceil(W / 8))
+    uint8, packed along x). A tile in several bitmaps goes to the last faction.
+    """
+    masks = np.unpackbits(territory, axis=2, count=width, bitorder="little").astype(bool)
+    owner = np.full(masks.shape[1:], NO_OWNER, dtype=np.int8)
+    for faction_id, mask in enumerate(masks):
+        owner[mask] = faction_id
+    return owner
+
+
+def _pack_sections(arrays, pickles, mapped=()) -> bytes:
+    """
+    Section table and zlib-compressed sections: arrays, then pickled payloads.
+    `mapped` entries (arrays stored uncompressed elsewhere in the file, with
+    absolute offsets) are only listed in the table.
+    """
+    sections = []
+    for name, array in arrays:
+        array = np.ascontiguousarray(array)
+        sections.append(({"name": name, "kind": "array", "dtype": array.dtype.str,
+                          "shape": list(array.shape)}, zlib.compress(array.tobytes(), C.SAVE_COMPRESS_LEVEL)))
+    for name, payload in pickles:
+        sections.append(({"name": name, "kind": "pickle"}, zlib.compress(payload, C.SAVE_COMPRESS_LEVEL)))
+
+    offset = 0
+    toc = []
+    for entry, data in sections:
+        toc.append(dict(entry, offset=offset, size=len(data)))
+        offset += len(data)
+    toc.extend(mapped)
+    toc_bytes = json.dumps(toc).encode("utf-8")
+    return b"".join([_TOC_LEN.pack(len(toc_bytes)), toc_bytes] + [data for _, data in sections])
+
+
+def _unpack_sections(body: bytes, mapped=None) -> Tuple[Dict[str, np.ndarray], Dict[str, bytes]]:
+    """
+    Inverse of _pack_sections.
+
+    Args:
+        body: Section table and sections
+        mapped: Buffer over the whole file (an mmap) for "mapped" arrays;
+            they are returned as read-only views of it, without copying
+
+    Returns:
+        ({name: array}, {name: pickled payload})
+    """
+    (toc_len,) = _TOC_LEN.unpack_from(body)
+    start = _TOC_LEN.size + toc_len
+    toc = json.loads(body[_TOC_LEN.size:start].decode("utf-8"))
+    arrays = {}
+    pickles = {}
+    for entry in toc:
+        if entry["kind"] == "mapped":
+            dtype = np.dtype(entry["dtype"])
+            arrays[entry["name"]] = np.frombuffer(mapped, dtype=dtype, count=entry["size"] // dtype.itemsize,
+                                                  offset=entry["offset"]).reshape(entry["shape"])
+            continue
+        data = zlib.decompress(body[start + entry["offset"]:start + entry["offset"] + entry["size"]])
+        if entry["kind"] == "array":
+            arrays[entry["name"]] = np.frombuffer(data, dtype=np.dtype(entry["dtype"])).reshape(entry["shape"]).copy()
+        else:
+            pickles[entry["name"]] = data
+    return arrays, pickles
+
+
+def encode(snapshot: SaveSnapshot) -> bytes:
+    """
+    Build the save container of a snapshot (the world blob is written
+    separately, see encode_world). Safe to call from a worker thread (zlib
+    releases the GIL while compressing).
+    """
+    body = _pack_sections(snapshot.arrays, [("state", snapshot.payload)])
+    thumb_w, thumb_h, thumb = snapshot.thumbnail
+    world_ref = bytes.fromhex(snapshot.world_id) if snapshot.world_id else b""
+    header = _HEADER.pack(MAGIC, VERSION, _HEADER.size + _HEADER_WORLD.size, *snapshot.header,
+                          thumb_w, thumb_h, len(body), zlib.crc32(body))
+    return header + _HEADER_WORLD.pack(world_ref) + thumb + body
+
+
+def encode_world(snapshot: SaveSnapshot) -> bytes:
+    """World blob of a snapshot, to be stored under world_filename(snapshot.world_id)."""
+    parts = []
+    mapped = []
+    offset = _WORLD_HEADER.size
+    for name, array in snapshot.world_arrays:
+        array = np.ascontiguousarray(array)
+        pad = -offset % _MAP_ALIGN
+        parts.append(b"\0" * pad)
+        offset += pad
+        mapped.append({"name": name, "kind": "mapped", "dtype": array.dtype.str,
+                       "shape": list(array.shape), "offset": offset, "size": array.nbytes})
+        parts.append(array.tobytes())
+        offset += array.nbytes
+    body = _pack_sections([], [("world", snapshot.world_payload)], mapped)
+    header = _WORLD_HEADER.pack(WORLD_MAGIC, WORLD_VERSION, len(body), zlib.crc32(body))
+    return b"".join([header] + parts + [body])
+
+
+def read_header(f) -> Dict:
+    """
+    Read the header and thumbnail from an open file, leaving it at the body.
+
+    Returns:
+        Dict with version, day, gold, food, faction, timestamp,
+        thumbnail ((w, h, RGB bytes) or None), world_id (or None),
+        body_size, body_crc
+
+    Raises:
+        SaveFormatError: Not a save container or a newer version
+    """
+    raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size or raw[:4] != MAGIC:
+        raise SaveFormatError("not a save file")
+    (_, version, header_size, day, gold, food, faction, timestamp,
+     thumb_w, thumb_h, body_size, body_crc) = _HEADER.unpack(raw)
+    if version > VERSION:
+        raise SaveFormatError(f"save format v{version} is newer than v{VERSION}")
+    world_id = None
+    extra = header_size - _HEADER.size
+    if version >= 2:
+        raw = f.read(_HEADER_WORLD.size)
+        if len(raw) < _HEADER_WORLD.size:
+            raise SaveFormatError("truncated header")
+        (world_ref,) = _HEADER_WORLD.unpack(raw)
+        if any(world_ref):
+            world_id = world_ref.hex()
+        extra -= _HEADER_WORLD.size
+    # Later versions may append fields to the header
+    f.seek(extra, 1)
+    thumb = f.read(thumb_w * thumb_h * 3)
+    if len(thumb) < thumb_w * thumb_h * 3:
+        raise SaveFormatError("truncated thumbnail")
+    return {
+        "version": version,
+        "day": day,
+        "gold": gold,
+        "food": food,
+        "faction": faction,
+        "timestamp": timestamp,
+        "thumbnail": (thumb_w, thumb_h, thumb) if thumb else None,
+        "world_id": world_id,
+        "body_size": body_size,
+        "body_crc": body_crc,
+    }
+
+
+def _read_world(world_dir: str, world_id: str):
+    """
+    Load a world blob. The grids of a v2 blob are read-only views of a
+    memory map of the file: pages are read when first touched, nothing is
+    copied. Only the section table and payload are checked against the CRC.
+
+    Returns:
+        ({name: array}, static payload bytes)
+    """
+    path = world_filename(world_dir, world_id)
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(_WORLD_HEADER.size)
+            if len(raw) < _WORLD_HEADER.size:
+                raise SaveFormatError("world data is truncated")
+            magic, version, body_size, body_crc = _WORLD_HEADER.unpack(raw)
+            if magic != WORLD_MAGIC or version > WORLD_VERSION:
+                raise SaveFormatError(f"{path} is not a readable world blob")
+            mapped = None
+            if version >= 2:
+                f.seek(-body_size, os.SEEK_END)
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            body = f.read(body_size)
+    except OSError:
+        raise SaveFormatError(f"world data {world_id} is missing")
+    if len(body) != body_size or zlib.crc32(body) != body_crc:
+        raise SaveFormatError("world data is truncated or corrupt")
+    arrays, pickles = _unpack_sections(body, mapped)
+    return arrays, pickles["world"]
+
+
+def decode(f, world_dir: str, header: Optional[Dict] = None):
+    """
+    Read a GameState from an open save container.
+
+    Args:
+        f: Binary file at the start of the container, or just past the
+            thumbnail if `header` was already read from it
+        world_dir: Directory of the world blobs
+        header: Result of read_header, if already read
+
+    Raises:
+        SaveFormatError: Wrong format, truncated or corrupt body, missing world
+    """
+    global _world_cache
+    if header is None:
+        header = read_header(f)
+    body = f.read(header["body_size"])
+    if len(body) < header["body_size"] or zlib.crc32(body) != header["body_crc"]:
+        raise SaveFormatError("save body is truncated or corrupt")
+
+    arrays, pickles = _unpack_sections(body)
+    if "state" not in pickles:
+        raise SaveFormatError("save has no state section")
+    fields = pickle.loads(pickles["state"])
+
+    world_id = header["world_id"]
+    tables = {}
+    if world_id is not None:
+        world_arrays, world_payload = _read_world(world_dir, world_id)
+        tables = {name: world_arrays.pop(name) for name in TABLE_NAMES if name in world_arrays}
+        static = pickle.loads(world_payload)
+        fields.update(world_arrays)
+        fields["region_seeds"] = static["region_seeds"]
+        fields["coast_edge"] = static["coast_edge"]
+        fields["region_info"] = static["region_info"]
+        for info, explored in zip(fields["region_info"], arrays.pop("explored").tolist()):
+            info["explored"] = explored
+        fields["resource_nodes"] = [
+            ResourceNode(x, y, res_type, development, max_development)
+            for (x, y, res_type, max_development), development
+            in zip(static["resource_nodes"], arrays.pop("development").tolist())
+        ]
+        fields.pop("resource_map", None)
+        if "territory" in arrays:
+            arrays["owner"] = _join_territories(arrays.pop("territory"), fields["biome_grid"].shape[1])
+    fields.update({name: arrays[name] for name in ARRAY_FIELDS if name in arrays})
+    if "owner" in arrays:
+        fields["territory"] = TerritoryMap.from_owner(arrays["owner"])
+
+    state = GameState.__new__(GameState)
+    state.__setstate__(fields)
+    if state.biome_grid is not None and state.region_grid is not None:
+        # Built with the load, not on the first frame that moves a unit.
+        # Worlds saved before the pathfinder tables compute them here once
+        state.pathfinder = Pathfinder(state.biome_grid, state.region_grid, tables or None)
+    if world_id is not None and tables:
+        # Saving this state again reuses the world blob without hashing it
+        # (a blob without the pathfinder tables is replaced by the next save)
+        _world_cache = _world_key(state) + (world_id, world_payload)
+    return state
+
+
+def world_refs(paths: List[str]) -> set:
+    """Ids of the world blobs referenced by the given save files (unreadable files are skipped)."""
+    refs = set()
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                world_id = read_header(f)["world_id"]
+        except (OSError, SaveFormatError, struct.error):
+            continue
+        if world_id is not None:
+            refs.add(world_id)
+    return refs
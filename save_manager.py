@@ -1,86 +1,280 @@
+import glob
 import pickle
 import os
+import queue
+import threading
+from datetime import datetime
+import config as C
+import save_format
+from pathfinding import Pathfinder
 from state import GameState
 
 SAVE_DIR = "save"
+# World blobs shared by the saves of the same world (see save_format)
+WORLD_DIR = os.path.join(SAVE_DIR, "world")
+
+# Slot ids of the rotating autosaves (-1 = autosave_1.sav, ...)
+AUTOSAVE_SLOT_IDS = tuple(-(i + 1) for i in range(C.AUTOSAVE_SLOTS))
+
+# filename -> (mtime_ns, size, metadata); the menu asks every frame
+_metadata_cache = {}
 
 def get_slot_filename(slot_id: int) -> str:
-    """Generate filename for a specific slot. 0 is autosave/quicksave."""
+    """Generate filename for a specific slot. 0 is quicksave, negative ids are autosaves."""
     if not os.path.exists(SAVE_DIR):
         os.makedirs(SAVE_DIR)
-        
+
+    if slot_id == 0:
+        filename = "quicksave.sav"
+    elif slot_id < 0:
+        filename = f"autosave_{-slot_id}.sav"
+    else:
+        filename = f"save_slot_{slot_id}.sav"
+    return os.path.join(SAVE_DIR, filename)
+
+def get_legacy_filename(slot_id: int) -> str:
+    """Pickle file of the same slot written before the save container (read only)."""
     filename = "quicksave.pkl" if slot_id == 0 else f"save_slot_{slot_id}.pkl"
     return os.path.join(SAVE_DIR, filename)
 
-def get_save_metadata(slot_id: int) -> dict:
-    """Return dict with save info or None if empty."""
+def _existing_filename(slot_id: int):
+    """Save file of a slot, falling back to an old pickle save; None if the slot is empty."""
     filename = get_slot_filename(slot_id)
-    if not os.path.exists(filename):
+    if os.path.exists(filename):
+        return filename
+    if slot_id < 0:
         return None
-    
+    legacy = get_legacy_filename(slot_id)
+    if os.path.exists(legacy):
+        return legacy
+    return None
+
+def _read_metadata(filename: str, timestamp: float) -> dict:
+    """Slot info from the save header (or the whole pickle for old saves)."""
     try:
-        timestamp = os.path.getmtime(filename)
-        from datetime import datetime
-        date_str = datetime.fromtimestamp(timestamp).strftime('%Y/%m/%d %H:%M')
-        
-        # We could load the whole state to get day/gold etc, but that's slow.
-        # For now just return file exists info, or maybe peek?
-        # Let's peek safely.
-        with open(filename, "rb") as f:
-            # Just read the object. If it's huge, this might be slow, but for now it's fine.
-            # Optimization: We could store a separate .meta file.
-            # But let's stick to simple pickle load for now.
-            try:
+        if filename.endswith(".pkl"):
+            with open(filename, "rb") as f:
                 state = pickle.load(f)
-                info = {
-                    "exists": True,
-                    "date": date_str,
-                    "day": getattr(state, "day", "?"),
-                    "gold": getattr(state, "gold", "?"),
-                    "faction": getattr(state, "player_faction_id", 0)
-                }
-                return info
-            except:
-                return {"exists": True, "date": date_str, "error": "Corrupt"}
+            header = {
+                "day": getattr(state, "day", "?"),
+                "gold": getattr(state, "gold", "?"),
+                "faction": getattr(state, "player_faction_id", 0),
+                "thumbnail": None,
+            }
+        else:
+            with open(filename, "rb") as f:
+                header = save_format.read_header(f)
+            timestamp = header["timestamp"]
     except Exception:
+        return {"exists": True, "date": datetime.fromtimestamp(timestamp).strftime('%Y/%m/%d %H:%M'),
+                "error": "Corrupt"}
+
+    return {
+        "exists": True,
+        "date": datetime.fromtimestamp(timestamp).strftime('%Y/%m/%d %H:%M'),
+        "timestamp": timestamp,
+        "day": header["day"],
+        "gold": header["gold"],
+        "faction": header["faction"],
+        "thumbnail": header["thumbnail"],
+    }
+
+def get_save_metadata(slot_id: int) -> dict:
+    """
+    Return dict with save info or None if empty.
+    Only the file header is read, and the result is cached until the file's
+    mtime / size change.
+    """
+    filename = _existing_filename(slot_id)
+    if filename is None:
+        return None
+    try:
+        st = os.stat(filename)
+    except OSError:
         return None
 
+    cached = _metadata_cache.get(filename)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    info = _read_metadata(filename, st.st_mtime)
+    _metadata_cache[filename] = (st.st_mtime_ns, st.st_size, info)
+    return info
+
+def latest_autosave_slot():
+    """Autosave slot written last, or None if there is no autosave."""
+    latest = None
+    latest_time = None
+    for slot_id in AUTOSAVE_SLOT_IDS:
+        meta = get_save_metadata(slot_id)
+        if meta and "timestamp" in meta and (latest_time is None or meta["timestamp"] > latest_time):
+            latest, latest_time = slot_id, meta["timestamp"]
+    return latest
+
+def next_autosave_slot() -> int:
+    """Autosave slot to overwrite next: the first empty one, else the oldest."""
+    oldest = AUTOSAVE_SLOT_IDS[0]
+    oldest_time = None
+    for slot_id in AUTOSAVE_SLOT_IDS:
+        meta = get_save_metadata(slot_id)
+        if meta is None:
+            return slot_id
+        stamp = meta.get("timestamp", 0.0)
+        if oldest_time is None or stamp < oldest_time:
+            oldest, oldest_time = slot_id, stamp
+    return oldest
+
+def _write_atomic(filename: str, data: bytes):
+    """
+    Write under a temporary name and rename into place, so a crash mid-write
+    leaves the previous save of the slot intact.
+    """
+    tmp_filename = filename + ".tmp"
+    try:
+        with open(tmp_filename, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
+    except Exception:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+def _prune_worlds():
+    """Delete world blobs no save file refers to any more."""
+    saves = glob.glob(os.path.join(SAVE_DIR, "*.sav"))
+    referenced = save_format.world_refs(saves)
+    for path in glob.glob(os.path.join(WORLD_DIR, "*.world")):
+        if os.path.splitext(os.path.basename(path))[0] not in referenced:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _write_snapshot(snapshot, filename: str) -> bool:
+    """
+    Write the world blob of the snapshot if it is not on disk yet, then the
+    save itself (both atomically, the world first so a save never refers to
+    a missing world).
+    """
+    try:
+        new_world = False
+        if snapshot.world_id is not None:
+            world_filename = save_format.world_filename(WORLD_DIR, snapshot.world_id)
+            if not os.path.exists(world_filename):
+                os.makedirs(WORLD_DIR, exist_ok=True)
+                _write_atomic(world_filename, save_format.encode_world(snapshot))
+                new_world = True
+        data = save_format.encode(snapshot)
+        _write_atomic(filename, data)
+        print(f"Game saved successfully to {filename} ({len(data) / 1024:.1f} KB)")
+        if new_world:
+            _prune_worlds()
+        return True
+    except Exception as e:
+        print(f"Failed to save game: {e}")
+        return False
+
 def save_game(state: GameState, slot_id: int = 0) -> bool:
     """
-    Save the current game state to a file using pickle.
-    slot_id: 0 for quicksave, 1-3 for manual slots.
+    Save the current game state to a file (save_format container).
+    slot_id: 0 for quicksave, 1-3 for manual slots, negative for autosaves.
     Returns True if successful, False otherwise.
     """
     filename = get_slot_filename(slot_id)
     try:
-        # pickle.dump will call state.__getstate__() automatically
-        with open(filename, "wb") as f:
-            pickle.dump(state, f)
-        print(f"Game saved successfully to {filename}")
-        return True
+        snapshot = save_format.SaveSnapshot(state)
     except Exception as e:
         print(f"Failed to save game: {e}")
         return False
+    return _write_snapshot(snapshot, filename)
+
+
+class SaveWriter:
+    """
+    Background thread that compresses and writes save snapshots in the order
+    they were queued. Only the snapshot is taken on the caller's thread.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def submit(self, snapshot, filename: str):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+            self._thread.start()
+        self._queue.put((snapshot, filename))
+
+    @property
+    def busy(self) -> bool:
+        """True while a queued save has not been written yet."""
+        return self._queue.unfinished_tasks > 0
+
+    def wait(self):
+        """Block until every queued save is on disk."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            snapshot, filename = self._queue.get()
+            try:
+                _write_snapshot(snapshot, filename)
+            finally:
+                self._queue.task_done()
+
+
+_writer = SaveWriter()
+
+def save_game_async(state: GameState, slot_id: int = 0) -> bool:
+    """
+    Snapshot the game state and write it on the background save thread.
+    Returns True if the save was queued (write errors are only printed).
+    """
+    filename = get_slot_filename(slot_id)
+    try:
+        snapshot = save_format.SaveSnapshot(state)
+    except Exception as e:
+        print(f"Failed to save game: {e}")
+        return False
+    _writer.submit(snapshot, filename)
+    return True
+
+def is_saving() -> bool:
+    """True while a background save is still being written."""
+    return _writer.busy
+
+def wait_for_saves():
+    """Block until background saves are written (call before exiting)."""
+    _writer.wait()
 
 def load_game(slot_id: int = 0) -> GameState:
     """
     Load game state from a file.
     Returns the loaded GameState object, or None if failed.
     """
-    filename = get_slot_filename(slot_id)
-    if not os.path.exists(filename):
-        print(f"Save file {filename} does not exist.")
+    # A save to this slot may still be in flight
+    _writer.wait()
+    filename = _existing_filename(slot_id)
+    if filename is None:
+        print(f"Save file {get_slot_filename(slot_id)} does not exist.")
         return None
-        
+
     try:
         with open(filename, "rb") as f:
-            state = pickle.load(f)
-        
+            if filename.endswith(".pkl"):
+                # Saves written before the save container
+                state = pickle.load(f)
+                if isinstance(state, GameState) and state.biome_grid is not None:
+                    state.pathfinder = Pathfinder(state.biome_grid, state.region_grid)
+            else:
+                state = save_format.decode(f, WORLD_DIR)
+
         # Post-load validation (optional but good for safety)
         if not isinstance(state, GameState):
             print("Loaded file is not a valid GameState object")
             return None
-            
+
         print(f"Game loaded successfully from {filename}")
         return state
     except Exception as e:
@@ -0,0 +1,123 @@
+"""
+Fixed-timestep simulation.
+The world advances in ticks of constant size (one tick = one unit of
+game_time), independent of the frame rate. Each frame converts the real time
+that passed into a number of ticks through an accumulator; game speed changes
+how many ticks run, never how large a tick is. The fraction of a tick left in
+the accumulator is used to interpolate unit positions when drawing.
+"""
+import config as C
+import conquest
+from frame_profiler import PROFILER
+
+
+class FixedTimestep:
+    """
+    Accumulator turning frame time into simulation ticks.
+
+    Args:
+        ticks_per_second: Ticks per real second at 1x speed
+        max_frame_seconds: Real time simulated per frame at most (catch-up cap);
+            after a long stall the rest is dropped instead of replayed
+    """
+
+    def __init__(self, ticks_per_second: float = C.SIM_TICKS_PER_SECOND,
+                 max_frame_seconds: float = C.SIM_MAX_FRAME_SECONDS):
+        self.ticks_per_second = ticks_per_second
+        self.max_frame_seconds = max_frame_seconds
+        self.accumulator = 0.0  # Ticks owed, below 1 after advance()
+
+    def advance(self, frame_seconds: float, speed: float) -> int:
+        """
+        Add one frame of real time.
+
+        Returns:
+            Number of ticks to run this frame
+        """
+        frame_seconds = min(frame_seconds, self.max_frame_seconds)
+        self.accumulator += frame_seconds * self.ticks_per_second * speed
+        ticks = int(self.accumulator)
+        self.accumulator -= ticks
+        return ticks
+
+    @property
+    def alpha(self) -> float:
+        """Progress into the next tick (0..1), for render interpolation."""
+        return self.accumulator
+
+    def reset(self):
+        self.accumulator = 0.0
+
+
+def tick(state):
+    """
+    Advance the world by one tick: game time / day, unit movement, conquest
+    and unit vision, then the region / lake bookkeeping of what was revealed.
+    """
+    state.game_time += 1
+    if state.game_time >= C.TICKS_PER_DAY:
+        state.game_time -= C.TICKS_PER_DAY
+        state.day += 1
+
+    for unit in state.units:
+        unit.prev_x = unit.x
+        unit.prev_y = unit.y
+        t = PROFILER.start()
+        unit.update(1.0, state)
+        PROFILER.stop("units", t)
+
+        # Territory expansion for conquistadors
+        t = PROFILER.start()
+        conquest.update_conquest(unit, state)
+        PROFILER.stop("conquest", t)
+        # Reveal fog based on unit vision
+        if state.fog is not None:
+            t = PROFILER.start()
+            state.fog.reveal_around(int(unit.x), int(unit.y), unit.vision_range)
+            PROFILER.stop("fog_reveal", t)
+
+    if state.fog is not None and state.fog.revealed:
+        t = PROFILER.start()
+        process_reveals(state)
+        PROFILER.stop("reveal_index", t)
+
+
+def _auto_explore_lakes(state, completed):
+    """
+    Auto-explore lake regions when ALL surrounding tiles are revealed.
+    A lake is auto-explored only when its entire perimeter is visible.
+
+    Args:
+        state: GameState
+        completed: Lake region ids whose perimeter just became fully revealed
+    """
+    for region_id in completed:
+        if region_id >= len(state.region_info) or state.region_info[region_id].get("explored", False):
+            continue
+        # Reveal all lake tiles in this region
+        state.fog.reveal_tiles(state.lake_index.tiles[region_id])
+
+        # Mark region as explored
+        state.region_info[region_id]["explored"] = True
+
+
+def process_reveals(state):
+    """
+    Count the tiles revealed since the last call into the region and lake
+    indexes, and auto-explore the lakes this completes. Lake tiles revealed
+    here can complete a neighbouring lake, so repeat until nothing is new.
+    """
+    if state.region_index is None or state.lake_index is None or not state.region_info:
+        state.fog.take_revealed()
+        return
+
+    completed = state.lake_index.take_ready()
+    revealed = state.fog.take_revealed()
+    frontier = state.fog_frontier
+    while revealed or completed:
+        state.region_index.on_revealed(revealed)
+        frontier.on_revealed(revealed)
+        completed += state.lake_index.on_revealed(revealed)
+        _auto_explore_lakes(state, completed)
+        completed = []
+        revealed = state.fog.take_revealed()
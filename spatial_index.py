@@ -0,0 +1,116 @@
+"""
+Spatial index for nearest-seed (Voronoi) queries during map generation.
+Seeds are bucketed into a uniform grid so each query only measures the seeds
+in nearby buckets instead of every seed on the map.
+"""
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class SeedIndex:
+    """
+    Bucketed grid of seed points answering exact nearest-seed queries.
+
+    Ties are broken towards the lowest seed index, matching a linear scan
+    with a strict "<" comparison.
+    """
+
+    def __init__(self, seeds: List[Tuple[int, int]], cell_size: Optional[int] = None, area: Optional[int] = None):
+        pts = np.asarray(seeds, dtype=np.int64).reshape(-1, 2)
+        self.seed_x = pts[:, 0]
+        self.seed_y = pts[:, 1]
+
+        if cell_size is None:
+            # Aim for roughly one seed per bucket
+            if area is None and len(pts):
+                area = int((self.seed_x.max() + 1) * (self.seed_y.max() + 1))
+            cell_size = int(math.sqrt((area or 1) / max(1, len(pts))))
+        self.cell_size = max(4, cell_size)
+
+        self.buckets = {}
+        for idx, (sx, sy) in enumerate(pts):
+            key = (int(sx) // self.cell_size, int(sy) // self.cell_size)
+            self.buckets.setdefault(key, []).append(idx)
+        self._bucket_arrays = {k: np.asarray(v, dtype=np.int64) for k, v in self.buckets.items()}
+
+    def _candidates(self, bx: int, by: int, ring: int) -> np.ndarray:
+        """Sorted seed indices in all buckets within `ring` cells of (bx, by)."""
+        found = []
+        for cy in range(by - ring, by + ring + 1):
+            for cx in range(bx - ring, bx + ring + 1):
+                arr = self._bucket_arrays.get((cx, cy))
+                if arr is not None:
+                    found.append(arr)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(found))
+
+    def nearest(self, xs, ys, jitter=None) -> np.ndarray:
+        """
+        Find the nearest seed for every query point.
+
+        Args:
+            xs, ys: Integer tile coordinates (any shape, flattened)
+            jitter: Optional per-point offset added to every distance
+
+        Returns:
+            Array of seed indices (-1 if there are no seeds)
+        """
+        xs = np.asarray(xs, dtype=np.int64).ravel()
+        ys = np.asarray(ys, dtype=np.int64).ravel()
+        result = np.full(xs.shape, -1, dtype=np.int64)
+        if xs.size == 0 or self.seed_x.size == 0:
+            return result
+        if jitter is not None:
+            jitter = np.asarray(jitter, dtype=np.float64).ravel()
+
+        cell = self.cell_size
+        bxs = xs // cell
+        bys = ys // cell
+
+        # Ring at which every seed is a candidate, whatever the query bucket
+        seed_bx = self.seed_x // cell
+        seed_by = self.seed_y // cell
+        max_ring = int(max(
+            np.abs(bxs.max() - seed_bx.min()), np.abs(seed_bx.max() - bxs.min()),
+            np.abs(bys.max() - seed_by.min()), np.abs(seed_by.max() - bys.min()),
+        ))
+
+        # Group query points by bucket
+        width = int(max(bxs.max(), seed_bx.max())) + 1
+        keys = bys * width + bxs
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], sorted_keys.size]
+
+        for start, end in zip(starts, ends):
+            members = order[start:end]
+            bx = int(bxs[members[0]])
+            by = int(bys[members[0]])
+            qx = xs[members][:, None]
+            qy = ys[members][:, None]
+
+            ring = 0
+            while True:
+                cand = self._candidates(bx, by, ring)
+                if cand.size:
+                    dx = self.seed_x[cand][None, :] - qx
+                    dy = self.seed_y[cand][None, :] - qy
+                    dist = np.sqrt(dx * dx + dy * dy)
+                    # Any seed outside the ring is further than ring * cell
+                    if ring >= max_ring or dist.min(axis=1).max() <= ring * cell:
+                        break
+                elif ring >= max_ring:
+                    break
+                ring += 1
+
+            if not cand.size:
+                continue
+            if jitter is not None:
+                dist = dist + jitter[members][:, None]
+            result[members] = cand[np.argmin(dist, axis=1)]
+
+        return result
@@ -1,6 +1,14 @@
 from dataclasses import dataclass, field
 from typing import Optional, Set, Tuple, List
+import numpy as np
 import config as C
+import grids
+from fog_frontier import FogFrontier
+from fog_of_war import FogOfWar
+from lake_index import LakeIndex
+from pathfinding import Pathfinder
+from region_index import RegionIndex
+from territory import NO_OWNER, YIELD_KINDS, TerritoryMap
 
 
 @dataclass
@@ -18,21 +26,16 @@ class GameState:
     player_grid_x: int = C.BASE_GRID_WIDTH // 2
     player_grid_y: int = C.BASE_GRID_HEIGHT // 2
     player_region_id: Optional[int] = None
-    player_region_mask: Set[Tuple[int, int]] = field(default_factory=set)
     player_region_center: Tuple[int, int] = (0, 0)
     selected_region: Optional[int] = None
     adjacent_regions_cache: Optional[Set[int]] = None  # Cache of regions adjacent to player region
-    
-    # resources
-    food: int = 0
-    gold: int = 0
+    _region_index: Optional[RegionIndex] = field(default=None, repr=False)  # See the region_index property
     
     # UI state
     confirm_dialog: Optional[dict] = None # {message, on_yes, on_no}
 
     # screen state
     screen_state: str = "menu"  # menu, loading, game
-    loading_frames_remaining: int = 0
 
     # zoom
     zoom_mode: bool = False
@@ -41,9 +44,9 @@ class GameState:
     zoom_bounds: Tuple[int, int, int, int] = (0, 0, 0, 0)
 
     # world data
-    biome_grid: Optional[List[List[str]]] = None
+    biome_grid: Optional[np.ndarray] = None  # (H, W) uint8 biome codes, see grids
     region_seeds: Optional[List[Tuple[int, int]]] = None
-    region_grid: Optional[List[List[int]]] = None
+    region_grid: Optional[np.ndarray] = None  # (H, W) int16 region ids, -1 = none
     region_info: Optional[List[dict]] = None
     coast_edge: Optional[str] = None
     resource_nodes: List[ResourceNode] = field(default_factory=list)
@@ -53,28 +56,35 @@ class GameState:
     pending_generate: bool = False
     
     # game loop state
-    game_time: float = 0.0
+    game_time: float = 0.0  # Ticks into the current day
     day: int = 1
     is_paused: bool = True
-    game_speed: float = 1.0
+    game_speed: float = 1.0  # Ticks per frame time multiplier (see simulation.FixedTimestep)
+    sim_alpha: float = 1.0  # Progress into the next tick, for drawing units between ticks
     
     # fog of war
-    fog_grid: Optional[List[List[bool]]] = None
+    fog: Optional[FogOfWar] = None  # Revealed tiles, bit-packed
+    _lake_index: Optional[LakeIndex] = field(default=None, repr=False)  # See the lake_index property
+    _region_index_stale: bool = field(default=False, repr=False)  # Built on next access (after a load)
+    _lake_index_stale: bool = field(default=False, repr=False)
+    _pathfinder: Optional[Pathfinder] = field(default=None, repr=False)  # See the pathfinder property
+    _fog_frontier: Optional[FogFrontier] = field(default=None, repr=False)  # See the fog_frontier property
     fog_surface: Optional[object] = None
     debug_fog_off: bool = False
     
     # rendering cache
     map_surface: Optional[object] = None
-    zoom_full_map_cache: Optional[object] = None  # Full map at zoom scale (no fog)
-    zoom_fog_layer: Optional[object] = None  # Fog overlay at zoom scale
+    zoom_chunks: Optional[object] = None  # ZoomChunkCache: zoom view map / fog surfaces by chunk
     selected_region_overlay_cache: Optional[object] = None  # Cached overlay for selected region (world view)
     selected_region_overlay_zoom_cache: Optional[object] = None  # Cached overlay for selected region (zoom view)
+    map_damage: Set[Tuple[int, int]] = field(default_factory=set)  # Tiles to repaint on the map caches
     
     # units
     units: List = field(default_factory=list)
     
     # territory expansion (conquistador)
     territory_expansion_regions: dict = field(default_factory=dict)  # {region_id: {"tiles": set(), "progress": int}}
+    conquest_frontiers: dict = field(default_factory=dict, repr=False)  # {region_id: conquest.ConquestFrontier}, rebuilt after a load
     
     # double-click detection
     last_click_time: float = 0.0
@@ -82,9 +92,10 @@ class GameState:
     DOUBLE_CLICK_TIME: float = 0.3  # seconds
     
     # menu state
-    use_debug_map: bool = C.DEBUG_LOAD_MAP
+    use_map_cache: bool = C.MAP_CACHE_ENABLED
     
     # map gen parameters
+    world_seed: Optional[int] = None  # None = draw a new seed on start
     gen_elev_freq: float = C.elev_freq
     gen_humid_freq: float = C.humid_freq
     
@@ -93,21 +104,168 @@ class GameState:
     # =========================
     factions: List = field(default_factory=list)  # List of Faction objects
     player_faction_id: int = 0  # ID of the player's faction (always 0)
-    
-    # Backward compatibility properties
+    territory: Optional[TerritoryMap] = None  # Owning faction id per tile, see territory.py
+
+    def add_faction(self, faction):
+        """Append a faction (its faction_id must be its index) and attach the territory map to it"""
+        faction.territory = self.territory
+        self.factions.append(faction)
+
     @property
-    def player_region_mask_compat(self):
-        """Backward compatibility: returns player faction's territory"""
-        if self.factions and len(self.factions) > self.player_faction_id:
-            return self.factions[self.player_faction_id].territory_mask
-        return self.player_region_mask
+    def player_region_mask(self) -> Optional[np.ndarray]:
+        """Read-only bool bitmap of the player faction's tiles (None before a world exists)"""
+        if self.territory is None:
+            return None
+        return self.territory.mask(self.player_faction_id)
     
+    @property
+    def food(self) -> int:
+        """Player faction's food income (see territory.TerritoryMap.income)"""
+        return self.territory.income(self.player_faction_id, "food") if self.territory is not None else 0
+
+    @property
+    def gold(self) -> int:
+        """Player faction's gold income"""
+        return self.territory.income(self.player_faction_id, "gold") if self.territory is not None else 0
+
+    def rebuild_income(self):
+        """
+        Rebuild the tile yields of the income ledgers from resource_nodes.
+        Call whenever the resource nodes are replaced wholesale.
+        """
+        if self.territory is None:
+            return
+        yields = np.zeros_like(self.territory.yields)
+        for node in self.resource_nodes:
+            kind = C.RESOURCE_TYPES.get(node.type, {}).get("produces")
+            if kind in YIELD_KINDS:
+                yields[YIELD_KINDS.index(kind), node.y, node.x] += node.development
+        self.territory.set_yields(yields)
+
     def get_faction_at_tile(self, x: int, y: int):
         """Get the faction that owns a specific tile, or None"""
+        if self.territory is None:
+            return None
+        owner = self.territory.owner_at(x, y)
+        return self.factions[owner] if owner != NO_OWNER else None
+
+    def _migrate_territory(self, legacy_player_tiles):
+        """
+        Build the TerritoryMap of a state pickled when territories were tile
+        sets (player_region_mask and Faction.territory_mask). A tile in several
+        sets goes to the last listed faction, as it was drawn.
+        """
+        if self.biome_grid is None:
+            self.territory = None
+            return
+        height, width = self.biome_grid.shape
+        self.territory = TerritoryMap(width, height)
+        if legacy_player_tiles and self.factions:
+            self.territory.claim_tiles(self.player_faction_id, legacy_player_tiles)
         for faction in self.factions:
-            if faction.owns_tile(x, y):
-                return faction
-        return None
+            tiles = faction.__dict__.pop('territory_mask', None)
+            if tiles:
+                self.territory.claim_tiles(faction.faction_id, tiles)
+
+    @property
+    def region_index(self) -> Optional[RegionIndex]:
+        """Tiles / bbox / revealed counts per region (built on first use after a load)."""
+        if self._region_index_stale:
+            self._region_index_stale = False
+            if self.region_grid is not None:
+                self._region_index = RegionIndex(self.biome_grid, self.region_grid, self._counted_mask())
+        return self._region_index
+
+    @region_index.setter
+    def region_index(self, value: Optional[RegionIndex]):
+        self._region_index = value
+        self._region_index_stale = False
+
+    @property
+    def lake_index(self) -> Optional[LakeIndex]:
+        """Lake perimeter counters (built on first use after a load)."""
+        if self._lake_index_stale:
+            self._lake_index_stale = False
+            if self.region_grid is not None and self.biome_grid is not None and self.fog is not None:
+                self._lake_index = LakeIndex.build(self.biome_grid, self.region_grid, self._counted_mask())
+        return self._lake_index
+
+    @lake_index.setter
+    def lake_index(self, value: Optional[LakeIndex]):
+        self._lake_index = value
+        self._lake_index_stale = False
+
+    @property
+    def pathfinder(self) -> Optional[Pathfinder]:
+        """Unit path planner (set by generate_world and the save loader; built here only if the grids were replaced since)."""
+        if self.region_grid is None or self.biome_grid is None:
+            return None
+        pathfinder = self._pathfinder
+        if pathfinder is None or pathfinder.region_grid is not self.region_grid \
+                or pathfinder.biome_grid is not self.biome_grid:
+            self._pathfinder = Pathfinder(self.biome_grid, self.region_grid)
+        return self._pathfinder
+
+    @pathfinder.setter
+    def pathfinder(self, value: Optional[Pathfinder]):
+        self._pathfinder = value
+
+    @property
+    def fog_frontier(self) -> Optional[FogFrontier]:
+        """Fog clusters of the regions explorers target (created again whenever the fog or region index is replaced)."""
+        if self.fog is None:
+            return None
+        region_index = self.region_index
+        if region_index is None:
+            return None
+        frontier = self._fog_frontier
+        if frontier is None or frontier.fog is not self.fog or frontier.region_index is not region_index:
+            self._fog_frontier = FogFrontier(self.fog, self.region_grid, region_index)
+        return self._fog_frontier
+
+    def _counted_mask(self) -> Optional[np.ndarray]:
+        """
+        Revealed tiles as of the last simulation.process_reveals: the fog
+        without the reveals still queued, which process_reveals counts in.
+        """
+        if self.fog is None:
+            return None
+        mask = self.fog.mask()
+        if self.fog.revealed:
+            xs, ys = zip(*self.fog.revealed)
+            mask[list(ys), list(xs)] = False
+        return mask
+
+    def invalidate_indexes(self):
+        """
+        Drop the region and lake indexes. Each is rebuilt when next used,
+        so a load does not pay for them before the first frame.
+        """
+        self._region_index = None
+        self._lake_index = None
+        self._region_index_stale = True
+        self._lake_index_stale = True
+
+    def rebuild_indexes(self):
+        """
+        Rebuild the region and lake indexes from the grids and the current fog.
+        Call whenever the grids or the fog are replaced wholesale; reveals made
+        after this are counted in by the main loop.
+        """
+        self._region_index_stale = False
+        self._lake_index_stale = False
+        if self.region_grid is None:
+            self.region_index = None
+            self.lake_index = None
+            return
+        revealed = self.fog.mask() if self.fog is not None else None
+        self.region_index = RegionIndex(self.biome_grid, self.region_grid, revealed)
+        if self.biome_grid is not None and revealed is not None:
+            self.lake_index = LakeIndex.build(self.biome_grid, self.region_grid, revealed)
+            # Already counted by the builds above
+            self.fog.take_revealed()
+        else:
+            self.lake_index = None
 
     def __getstate__(self):
         """Custom pickling to exclude surfaces and callbacks"""
@@ -118,10 +276,15 @@ class GameState:
         keys_to_exclude = [
             'map_surface', 
             'fog_surface', 
-            'zoom_full_map_cache', 
-            'zoom_fog_layer', 
+            'zoom_chunks',
             'selected_region_overlay_cache',
-            'selected_region_overlay_zoom_cache'
+            'selected_region_overlay_zoom_cache',
+            # Derived indexes, rebuilt on first use after a load
+            '_region_index',
+            '_lake_index',
+            '_pathfinder',
+            '_fog_frontier',
+            'conquest_frontiers',
         ]
         
         for key in keys_to_exclude:
@@ -142,10 +305,14 @@ class GameState:
         # This is also a good place to reset any temporary caches
         self.map_surface = None
         self.fog_surface = None
-        self.zoom_full_map_cache = None
-        self.zoom_fog_layer = None
+        self.zoom_chunks = None
+        # Full-map zoom surfaces of older saves
+        self.__dict__.pop('zoom_full_map_cache', None)
+        self.__dict__.pop('zoom_fog_layer', None)
         self.selected_region_overlay_cache = None
         self.selected_region_overlay_zoom_cache = None
+        self.map_damage = set()
+        self.conquest_frontiers = {}
         self.confirm_dialog = None
         
         # Reset ephemeral caches
@@ -159,6 +326,31 @@ class GameState:
         if hasattr(self, '_cached_debug_info'):
             delattr(self, '_cached_debug_info')
             
+        # Convert nested-list grids from old saves (backward compatibility)
+        if isinstance(self.__dict__.get('biome_grid'), list):
+            self.biome_grid = grids.encode_biomes(self.biome_grid)
+        if isinstance(self.__dict__.get('region_grid'), list):
+            self.region_grid = grids.region_array(self.region_grid)
+        # Old saves store fog as nested bool lists
+        fog_grid = self.__dict__.pop('fog_grid', None)
+        if fog_grid is not None:
+            self.fog = FogOfWar.from_mask(np.asarray(fog_grid, dtype=bool))
+        elif 'fog' not in self.__dict__:
+            self.fog = None
+        # Indexes pickled by older versions
+        self.__dict__.pop('region_index', None)
+        self.__dict__.pop('lake_index', None)
+        self.invalidate_indexes()
+
+        # Territories stored as tile sets by older versions
+        legacy_player_tiles = self.__dict__.pop('player_region_mask', None)
+        self.__dict__.setdefault('factions', [])
+        if 'territory' not in self.__dict__:
+            self._migrate_territory(legacy_player_tiles)
+        for faction in self.factions:
+            faction.__dict__.pop('territory_mask', None)
+            faction.territory = self.territory
+
         # Rebuild resource_map if missing (backward compatibility)
         if hasattr(self, 'resource_nodes') and not hasattr(self, 'resource_map'):
             self.resource_map = { (n.x, n.y): n for n in self.resource_nodes }
@@ -169,3 +361,8 @@ class GameState:
              # So we just check if it's empty but nodes exist.
              self.resource_map = { (n.x, n.y): n for n in self.resource_nodes }
 
+        # Income is derived from the resource nodes (older saves stored the player's totals)
+        self.__dict__.pop('food', None)
+        self.__dict__.pop('gold', None)
+        self.rebuild_income()
+
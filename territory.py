@@ -0,0 +1,261 @@
+"""
+Faction territory.
+One small-int faction id per tile (NO_OWNER where nobody owns it) is the
+source of truth, so a tile can never belong to two factions. Each faction
+also has a boolean bitmap over the same grid and a tile count, kept in step
+with every claim, so ownership checks and counts are O(1) and unions,
+intersections and borders are whole-array NumPy operations.
+
+Resource income is kept the same way: every tile has a yield per resource
+kind (the development of the resource node on it), and each faction has a
+running sum of the yields of its tiles. A change of owner moves the tile's
+yields between two ledgers and a change of development adjusts one, so
+reading a faction's income never walks the resource nodes.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+NO_OWNER = -1
+# Faction ids are stored as int8: at most 128 factions
+MAX_FACTIONS = 128
+# Resource kinds of the income ledgers (config.RESOURCE_TYPES "produces")
+YIELD_KINDS = ("food", "gold")
+
+
+class TerritoryMap:
+    """
+    Tile owners of the world.
+
+    `owner` is an (H, W) int8 array of faction ids; treat it as read-only and
+    change ownership through claim / claim_mask / release, which keep the
+    per-faction bitmaps, counts and income ledgers up to date.
+
+    `yields` is a (len(YIELD_KINDS), H, W) array of what each tile produces;
+    it is derived from the resource nodes (not saved) and changed through
+    set_yield / set_yields.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.owner = np.full((height, width), NO_OWNER, dtype=np.int8)
+        self._masks: Dict[int, np.ndarray] = {}
+        self._counts: Dict[int, int] = {}
+        self.yields = np.zeros((len(YIELD_KINDS), height, width), dtype=np.int32)
+        self._income: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_owner(cls, owner: np.ndarray) -> "TerritoryMap":
+        """Build from an (H, W) array of faction ids (NO_OWNER = none)."""
+        height, width = owner.shape
+        territory = cls(width, height)
+        territory.owner[:] = owner
+        territory._rebuild()
+        return territory
+
+    def _rebuild(self):
+        """Recompute the bitmaps, counts and income from the owner and yield grids."""
+        self._masks = {}
+        self._counts = {}
+        self._income = {}
+        ids, counts = np.unique(self.owner, return_counts=True)
+        for faction_id, count in zip(ids.tolist(), counts.tolist()):
+            if faction_id != NO_OWNER:
+                self._masks[faction_id] = self.owner == faction_id
+                self._counts[faction_id] = count
+                self._income[faction_id] = self.yields[:, self._masks[faction_id]].sum(axis=1, dtype=np.int64)
+
+    def __getstate__(self):
+        # The bitmaps and counts follow from the owner grid
+        return {"owner": self.owner}
+
+    def __setstate__(self, state):
+        self.owner = np.array(state["owner"], dtype=np.int8)
+        self.height, self.width = self.owner.shape
+        self.yields = np.zeros((len(YIELD_KINDS),) + self.owner.shape, dtype=np.int32)
+        self._rebuild()
+
+    def _bitmap(self, faction_id: int) -> np.ndarray:
+        mask = self._masks.get(faction_id)
+        if mask is None:
+            if not 0 <= faction_id < MAX_FACTIONS:
+                raise ValueError(f"faction id {faction_id} out of range")
+            mask = self._masks[faction_id] = np.zeros(self.owner.shape, dtype=bool)
+            self._counts[faction_id] = 0
+            self._income[faction_id] = np.zeros(len(YIELD_KINDS), dtype=np.int64)
+        return mask
+
+    # ---- queries ----
+
+    def owner_at(self, x: int, y: int) -> int:
+        """Faction id owning tile (x, y), or NO_OWNER."""
+        return int(self.owner[y, x])
+
+    def owns(self, faction_id: int, x: int, y: int) -> bool:
+        """True if the faction owns tile (x, y)."""
+        return bool(self.owner[y, x] == faction_id)
+
+    def count(self, faction_id: int) -> int:
+        """Number of tiles the faction owns."""
+        return self._counts.get(faction_id, 0)
+
+    def mask(self, faction_id: int) -> np.ndarray:
+        """Read-only (H, W) bool bitmap of the faction's tiles (a live view)."""
+        mask = self._masks.get(faction_id)
+        if mask is None:
+            mask = np.zeros(self.owner.shape, dtype=bool)
+        view = mask.view()
+        view.flags.writeable = False
+        return view
+
+    def income(self, faction_id: int, kind: str) -> int:
+        """Summed yield of one resource kind ("food" / "gold") over the faction's tiles."""
+        income = self._income.get(faction_id)
+        return int(income[YIELD_KINDS.index(kind)]) if income is not None else 0
+
+    def union(self, faction_ids: Iterable[int]) -> np.ndarray:
+        """Bitmap of the tiles owned by any of the factions."""
+        result = np.zeros(self.owner.shape, dtype=bool)
+        for faction_id in faction_ids:
+            if faction_id in self._masks:
+                result |= self._masks[faction_id]
+        return result
+
+    def count_in(self, faction_id: int, area: np.ndarray) -> int:
+        """Number of the faction's tiles inside a bool (H, W) area."""
+        mask = self._masks.get(faction_id)
+        return int(np.count_nonzero(mask & area)) if mask is not None else 0
+
+    def tiles(self, faction_id: int) -> List[Tuple[int, int]]:
+        """The faction's tiles as (x, y), in row-major order."""
+        mask = self._masks.get(faction_id)
+        if mask is None:
+            return []
+        ys, xs = np.nonzero(mask)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def bbox(self, faction_id: int) -> Optional[Tuple[int, int, int, int]]:
+        """(min_x, min_y, max_x, max_y) of the faction's tiles, or None if it owns none."""
+        if not self.count(faction_id):
+            return None
+        mask = self._masks[faction_id]
+        xs = np.flatnonzero(mask.any(axis=0))
+        ys = np.flatnonzero(mask.any(axis=1))
+        return int(xs[0]), int(ys[0]), int(xs[-1]), int(ys[-1])
+
+    def border_mask(self, faction_id: int) -> np.ndarray:
+        """The faction's tiles with a 4-neighbour it does not own (map edges do not count)."""
+        mask = self.mask(faction_id)
+        inner = mask.copy()
+        inner[:, 1:] &= mask[:, :-1]
+        inner[:, :-1] &= mask[:, 1:]
+        inner[1:, :] &= mask[:-1, :]
+        inner[:-1, :] &= mask[1:, :]
+        return mask & ~inner
+
+    def neighbor_mask(self, faction_id: int, window: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """
+        Tiles (owned or not) with a 4-neighbour owned by the faction.
+
+        Args:
+            window: (x0, y0, x1, y1), end exclusive, to compute only that part
+                of the map (owned tiles outside it are not seen)
+        """
+        mask = self.mask(faction_id)
+        if window is not None:
+            x0, y0, x1, y1 = window
+            mask = mask[y0:y1, x0:x1]
+        near = np.zeros_like(mask)
+        near[:, 1:] |= mask[:, :-1]
+        near[:, :-1] |= mask[:, 1:]
+        near[1:, :] |= mask[:-1, :]
+        near[:-1, :] |= mask[1:, :]
+        return near
+
+    def frontier_mask(self, faction_id: int, window: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """Tiles outside the faction's territory with a 4-neighbour inside it (window: see neighbor_mask)."""
+        mask = self.mask(faction_id)
+        if window is not None:
+            x0, y0, x1, y1 = window
+            mask = mask[y0:y1, x0:x1]
+        return self.neighbor_mask(faction_id, window) & ~mask
+
+    # ---- changes ----
+
+    def claim(self, faction_id: int, x: int, y: int) -> int:
+        """
+        Give tile (x, y) to a faction (NO_OWNER releases it), taking it from
+        its previous owner.
+
+        Returns:
+            The previous owner
+        """
+        previous = int(self.owner[y, x])
+        if previous == faction_id:
+            return previous
+        tile_yields = self.yields[:, y, x]
+        if faction_id != NO_OWNER:
+            self._bitmap(faction_id)[y, x] = True
+            self._counts[faction_id] += 1
+            self._income[faction_id] += tile_yields
+        if previous != NO_OWNER:
+            self._masks[previous][y, x] = False
+            self._counts[previous] -= 1
+            self._income[previous] -= tile_yields
+        self.owner[y, x] = faction_id
+        return previous
+
+    def release(self, x: int, y: int) -> int:
+        """Make tile (x, y) unowned. Returns the previous owner."""
+        return self.claim(NO_OWNER, x, y)
+
+    def claim_mask(self, faction_id: int, area: np.ndarray) -> int:
+        """
+        Give every tile of a bool (H, W) area to a faction (NO_OWNER releases
+        them), taking them from their previous owners.
+
+        Returns:
+            Number of tiles that changed owner
+        """
+        changed = np.asarray(area, dtype=bool) & (self.owner != faction_id)
+        owners = self.owner[changed]
+        moved = self.yields[:, changed]
+        previous, counts = np.unique(owners, return_counts=True)
+        if faction_id != NO_OWNER:
+            self._bitmap(faction_id)[changed] = True
+        for prev, count in zip(previous.tolist(), counts.tolist()):
+            if prev != NO_OWNER:
+                self._masks[prev][changed] = False
+                self._counts[prev] -= count
+                self._income[prev] -= moved[:, owners == prev].sum(axis=1, dtype=np.int64)
+        self.owner[changed] = faction_id
+        total = int(counts.sum())
+        if faction_id != NO_OWNER:
+            self._counts[faction_id] += total
+            self._income[faction_id] += moved.sum(axis=1, dtype=np.int64)
+        return total
+
+    def claim_tiles(self, faction_id: int, tiles: Iterable[Tuple[int, int]]) -> int:
+        """claim_mask for a collection of (x, y) tiles."""
+        tiles = list(tiles)
+        if not tiles:
+            return 0
+        area = np.zeros(self.owner.shape, dtype=bool)
+        xs, ys = zip(*tiles)
+        area[list(ys), list(xs)] = True
+        return self.claim_mask(faction_id, area)
+
+    def set_yield(self, x: int, y: int, kind: str, value: int):
+        """Set what tile (x, y) produces of a resource kind, updating its owner's income."""
+        k = YIELD_KINDS.index(kind)
+        delta = value - int(self.yields[k, y, x])
+        self.yields[k, y, x] = value
+        owner = int(self.owner[y, x])
+        if owner != NO_OWNER:
+            self._income[owner][k] += delta
+
+    def set_yields(self, yields: np.ndarray):
+        """Replace the whole (len(YIELD_KINDS), H, W) yield grid and recompute every ledger."""
+        self.yields = np.asarray(yields, dtype=np.int32).copy()
+        self._rebuild()
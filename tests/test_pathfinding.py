@@ -0,0 +1,141 @@
+"""
+Pathfinder against an exact Dijkstra over the tiles, on the world of seed 42.
+"""
+import heapq
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config as C  # noqa: E402
+from game_system import generate_world  # noqa: E402
+from pathfinding import MOVES, SQRT2, Pathfinder  # noqa: E402
+from state import GameState  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def world():
+    state = GameState()
+    state.world_seed = 42
+    generate_world(state)
+    return state
+
+
+@pytest.fixture
+def pathfinder(world):
+    return Pathfinder(world.biome_grid, world.region_grid)
+
+
+def dijkstra(pathfinder, start, goal):
+    """Exact least cost from start to goal ((x, y) tiles), None if unreachable."""
+    width, height = pathfinder.width, pathfinder.height
+    cost = pathfinder.cost
+    dist = {start: 0.0}
+    open_heap = [(0.0, start)]
+    while open_heap:
+        d, (x, y) = heapq.heappop(open_heap)
+        if (x, y) == goal:
+            return d
+        if d > dist[(x, y)]:
+            continue
+        for dx, dy, length in MOVES:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height) or not np.isfinite(cost[ny, nx]):
+                continue
+            if dx and dy and not (np.isfinite(cost[y, nx]) and np.isfinite(cost[ny, x])):
+                continue
+            nd = d + (cost[y, x] + cost[ny, nx]) * 0.5 * length
+            if nd < dist.get((nx, ny), np.inf):
+                dist[(nx, ny)] = nd
+                heapq.heappush(open_heap, (nd, (nx, ny)))
+    return None
+
+
+def path_cost(pathfinder, start, waypoints):
+    """Cost of walking the straight runs between waypoints; fails on a move that is not allowed."""
+    cost = pathfinder.cost
+    total = 0.0
+    x, y = start
+    for wx, wy in waypoints:
+        while (x, y) != (wx, wy):
+            dx = (wx > x) - (wx < x)
+            dy = (wy > y) - (wy < y)
+            assert np.isfinite(cost[y + dy, x + dx]), f"path enters {(x + dx, y + dy)}"
+            if dx and dy:
+                assert np.isfinite(cost[y, x + dx]) and np.isfinite(cost[y + dy, x]), f"path cuts a corner at {(x, y)}"
+            total += (cost[y, x] + cost[y + dy, x + dx]) * 0.5 * (SQRT2 if dx and dy else 1.0)
+            x, y = x + dx, y + dy
+    return total
+
+
+def land_tiles(pathfinder):
+    ys, xs = np.nonzero(np.isfinite(pathfinder.cost))
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def test_same_region_goal_without_entrances(pathfinder):
+    # Both tiles are in region 10, which has no entrance: the capped A*
+    # used to give up and the route through the entrances found nothing
+    start, goal = (22, 37), (18, 50)
+    assert pathfinder.region_grid[37, 22] == pathfinder.region_grid[50, 18]
+    path = pathfinder.find_path(start, goal)
+    assert path is not None and path[-1] == goal
+    assert path_cost(pathfinder, start, path) == pytest.approx(dijkstra(pathfinder, start, goal))
+
+
+def test_same_region_paths_are_least_cost(pathfinder):
+    rng = random.Random(1)
+    tiles = land_tiles(pathfinder)
+    regions = pathfinder.region_grid
+    by_region = {}
+    for x, y in tiles:
+        by_region.setdefault(int(regions[y, x]), []).append((x, y))
+    ratios = []
+    while len(ratios) < 40:
+        start = rng.choice(tiles)
+        goal = rng.choice(by_region[int(regions[start[1], start[0]])])
+        best = dijkstra(pathfinder, start, goal)
+        if start == goal or best is None:
+            continue
+        path = pathfinder.find_path(start, goal)
+        assert path is not None, (start, goal)
+        ratios.append(path_cost(pathfinder, start, path) / best)
+    # Only paths that would shortcut through a neighbouring region are longer
+    assert np.median(ratios) == pytest.approx(1.0)
+    assert max(ratios) < 1.5
+
+
+def test_reachable_goals_always_get_a_path(pathfinder):
+    rng = random.Random(2)
+    tiles = land_tiles(pathfinder)
+    for _ in range(30):
+        start, goal = rng.choice(tiles), rng.choice(tiles)
+        best = dijkstra(pathfinder, start, goal)
+        path = pathfinder.find_path(start, goal)
+        if best is None:
+            assert path is None
+        elif start != goal:
+            assert path is not None and path[-1] == goal, (start, goal)
+            assert path_cost(pathfinder, start, path) <= best * 2.0
+
+
+def test_flow_field_orders_match_single_orders(world, pathfinder, monkeypatch):
+    rng = random.Random(3)
+    tiles = land_tiles(pathfinder)
+    goal = rng.choice(tiles)
+    starts = [rng.choice(tiles) for _ in range(30)]
+
+    monkeypatch.setattr(C, "PATH_FLOW_FIELD_UNITS", len(starts) + 1)
+    single = [pathfinder.find_path(start, goal) for start in starts]
+    shared = Pathfinder(world.biome_grid, world.region_grid, pathfinder.tables())
+    monkeypatch.setattr(C, "PATH_FLOW_FIELD_UNITS", 1)
+    for start, path in zip(starts, single):
+        flow_path = shared.find_path(start, goal)
+        assert (flow_path is None) == (path is None)
+        if path is not None:
+            assert path_cost(pathfinder, start, flow_path) == pytest.approx(path_cost(pathfinder, start, path))
+    assert goal[1] * pathfinder.width + goal[0] in shared._flow_fields
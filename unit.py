@@ -2,13 +2,6 @@ from dataclasses import dataclass
 from typing import Optional, Tuple, List
 import config as C
 
-# Exploration algorithm scoring weights
-# These control the priority of different factors when choosing next exploration target
-SCORE_WEIGHT_CLUSTER_SIZE = 1000000  # Priority 1: Prefer small fog clusters
-SCORE_WEIGHT_DISTANCE_TO_UNIT = 100  # Priority 2: Prefer fog close to current position
-SCORE_WEIGHT_DISTANCE_TO_BASE = 1    # Priority 3: Prefer fog close to base (tiebreaker)
-
-
 
 @dataclass
 class Unit:
@@ -21,7 +14,15 @@ class Unit:
     # Movement
     target_x: Optional[float] = None
     target_y: Optional[float] = None
-    move_speed: float = 0.5  # tiles per frame at normal speed
+    move_speed: float = 0.5  # tiles per tick
+    
+    # Waypoints to the target (see pathfinding), planned for path_target
+    path: Optional[List[Tuple[float, float]]] = None
+    path_target: Optional[Tuple[float, float]] = None
+    
+    # Position before the last tick (render interpolation)
+    prev_x: Optional[float] = None
+    prev_y: Optional[float] = None
     
     # Vision
     vision_range: int = 3
@@ -60,116 +61,29 @@ class Unit:
                 "no_rect": None
             }
     
-    def _find_fog_clusters(self, fog_tiles: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
-        """Group fog tiles into connected clusters using BFS"""
-        clusters = []
-        visited = set()
-        fog_set = set(fog_tiles)
-        
-        for start_node in fog_tiles:
-            if start_node in visited:
-                continue
-            
-            # BFS to find cluster
-            cluster = []
-            queue = [start_node]
-            visited.add(start_node)
-            cluster.append(start_node)
-            
-            idx = 0
-            while idx < len(queue):
-                curr = queue[idx]
-                idx += 1
-                
-                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                    nx, ny = curr[0] + dx, curr[1] + dy
-                    if (nx, ny) in fog_set and (nx, ny) not in visited:
-                        visited.add((nx, ny))
-                        queue.append((nx, ny))
-                        cluster.append((nx, ny))
-            
-            clusters.append(cluster)
-        
-        return clusters
-    
-    def _choose_best_exploration_target(self, clusters: List[List[Tuple[int, int]]], state) -> Optional[Tuple[int, int]]:
-        """Choose the best fog tile to explore next based on scoring algorithm"""
-        cx, cy = int(self.x), int(self.y)
-        base_x, base_y = state.player_region_center if state.player_region_center else (cx, cy)
-        
-        best_score = 1e9
-        best_target = None
-        
-        for cluster in clusters:
-            size = len(cluster)
-            
-            # Find closest tile in cluster to current position
-            min_dist_to_unit = 1e9
-            closest_tile = None
-            min_dist_to_base = 1e9
-            
-            for (tx, ty) in cluster:
-                # Distance to current position
-                d_unit = (tx - cx)**2 + (ty - cy)**2
-                # Distance to base
-                d_base = (tx - base_x)**2 + (ty - base_y)**2
-                
-                # Pick tile closest to unit, or if tied, closest to base
-                if d_unit < min_dist_to_unit or (d_unit == min_dist_to_unit and d_base < min_dist_to_base):
-                    min_dist_to_unit = d_unit
-                    closest_tile = (tx, ty)
-                    min_dist_to_base = d_base
-            
-            # Score formula using named constants
-            score = (size * SCORE_WEIGHT_CLUSTER_SIZE + 
-                    min_dist_to_unit * SCORE_WEIGHT_DISTANCE_TO_UNIT + 
-                    min_dist_to_base * SCORE_WEIGHT_DISTANCE_TO_BASE)
-            
-            if score < best_score:
-                best_score = score
-                best_target = closest_tile
-        
-        return best_target
-    
     def _update_exploration(self, state):
         """Update automated exploration logic"""
         if self.target_x is not None and self.target_y is not None:
             return  # Already have a target
         
-        # Build region tiles cache if not exists
-        if not hasattr(state, '_region_tiles_cache'):
-            state._region_tiles_cache = {}
-            for y in range(C.BASE_GRID_HEIGHT):
-                for x in range(C.BASE_GRID_WIDTH):
-                    rid = state.region_grid[y][x]
-                    if rid not in state._region_tiles_cache:
-                        state._region_tiles_cache[rid] = []
-                    state._region_tiles_cache[rid].append((x, y))
-        
-        # Get tiles for target region from cache
-        region_tiles = state._region_tiles_cache.get(self.target_region_id, [])
-        
-        # Collect fogged tiles in target region
-        fog_tiles = []
-        for x, y in region_tiles:
-            if not state.fog_grid[y][x]:
-                fog_tiles.append((x, y))
+        # Best fog tile of the target region, from its fog clusters
+        best_target = None
+        if state.region_index.has_fog(self.target_region_id):
+            cx, cy = int(self.x), int(self.y)
+            base = state.player_region_center if state.player_region_center else (cx, cy)
+            best_target = state.fog_frontier.best_target(self.target_region_id, (cx, cy), base)
         
-        if not fog_tiles:
+        if best_target is None:
             # Region fully explored
             completed_region_id = self.target_region_id
             if state.region_info and completed_region_id < len(state.region_info):
                 state.region_info[completed_region_id]["explored"] = True
             
             self.target_region_id = None
-            self._handle_exploration_completion(state, completed_region_id, region_tiles)
+            self._handle_exploration_completion(state, completed_region_id,
+                                                state.region_index.tiles(completed_region_id))
         else:
-            # Find best target among fog clusters
-            clusters = self._find_fog_clusters(fog_tiles)
-            best_target = self._choose_best_exploration_target(clusters, state)
-            
-            if best_target:
-                self.set_target(float(best_target[0]), float(best_target[1]))
+            self.set_target(float(best_target[0]), float(best_target[1]))
     
     def update(self, game_speed: float, state=None):
         """Update unit state (movement, etc)"""
@@ -178,25 +92,57 @@ class Unit:
             self._update_exploration(state)
 
         if self.target_x is not None and self.target_y is not None:
-            # Move towards target
-            dx = self.target_x - self.x
-            dy = self.target_y - self.y
-            dist = (dx * dx + dy * dy) ** 0.5
-            
-            if dist < 0.1:
-                # Reached target
-                self.x = self.target_x
-                self.y = self.target_y
+            # Targets are also set directly (target_x / target_y), so replan
+            # whenever the target differs from the planned one
+            if self.path_target != (self.target_x, self.target_y) or not self.path:
+                self._plan_path(state)
+            self._follow_path(game_speed, state)
+    
+    def _plan_path(self, state):
+        """Plan waypoints to the target; straight to it without a pathfinder or a land route"""
+        target = (self.target_x, self.target_y)
+        self.path_target = target
+        self.path = []
+        pathfinder = state.pathfinder if state is not None else None
+        if pathfinder is not None:
+            tiles = pathfinder.find_path((int(self.x), int(self.y)), (int(self.target_x), int(self.target_y)))
+            if tiles:
+                self.path = [(float(x), float(y)) for x, y in tiles[:-1]]
+        # The last waypoint is always the exact target
+        self.path.append(target)
+    
+    def _follow_path(self, game_speed: float, state):
+        """Move along the waypoints, slower on costly terrain"""
+        move_dist = self.move_speed * game_speed
+        pathfinder = state.pathfinder if state is not None else None
+        if pathfinder is not None:
+            cost = pathfinder.cost_at(int(self.x), int(self.y))
+            if cost != float("inf"):
+                move_dist /= cost
+        
+        wx, wy = self.path[0]
+        dx = wx - self.x
+        dy = wy - self.y
+        dist = (dx * dx + dy * dy) ** 0.5
+        if dist <= move_dist:
+            # Reached the waypoint
+            self.x = wx
+            self.y = wy
+            self.path.pop(0)
+            if not self.path:
                 self.target_x = None
                 self.target_y = None
-            else:
-                # Move towards target
-                move_dist = self.move_speed * game_speed
-                if move_dist > dist:
-                    move_dist = dist
-                
-                self.x += (dx / dist) * move_dist
-                self.y += (dy / dist) * move_dist
+                self.path_target = None
+        else:
+            self.x += (dx / dist) * move_dist
+            self.y += (dy / dist) * move_dist
+    
+    def render_pos(self, alpha: float) -> Tuple[float, float]:
+        """Position to draw, between the last two ticks (alpha 0 = previous, 1 = current)"""
+        if self.prev_x is None or self.prev_y is None:
+            return self.x, self.y
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
     
     def set_target(self, tx: float, ty: float):
         """Set movement target"""
@@ -222,6 +168,9 @@ class Unit:
 
     def __getstate__(self):
         state = self.__dict__.copy()
+        # Replanned after a load
+        state['path'] = None
+        state['path_target'] = None
         return state
 
     def __setstate__(self, state):
@@ -0,0 +1,82 @@
+"""
+Background world generation.
+Runs game_system.generate_world on a worker thread so the event loop keeps
+running, reports stage-by-stage progress, and supports cooperative cancel.
+"""
+import threading
+from typing import Optional
+
+import config as C
+from state import GameState
+
+
+class GenerationCancelled(Exception):
+    """Raised inside the worker when the job is cancelled."""
+
+
+class WorldGenJob:
+    """
+    One world generation run on a worker thread.
+
+    The world is built into a fresh GameState, so a cancelled or failed job
+    never leaves the caller's state half-written. Poll `done` from the main
+    loop and take `result` when it is set.
+    """
+
+    def __init__(self, template: GameState):
+        self.stage: Optional[str] = None
+        self.stage_index = 0
+        self.result: Optional[GameState] = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self._cancel = threading.Event()
+
+        # Carry over the menu settings that drive generation
+        self._state = GameState()
+        self._state.use_map_cache = getattr(template, "use_map_cache", C.MAP_CACHE_ENABLED)
+        self._state.world_seed = getattr(template, "world_seed", None)
+        self._state.gen_elev_freq = template.gen_elev_freq
+        self._state.gen_humid_freq = template.gen_humid_freq
+
+        self._thread = threading.Thread(target=self._run, name="world-gen", daemon=True)
+
+    @property
+    def progress(self) -> float:
+        """Fraction of stages started so far (0.0 - 1.0)."""
+        if self.done:
+            return 1.0
+        return self.stage_index / len(C.GENERATION_STAGES)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Request cancellation; the worker stops at the next stage boundary."""
+        self._cancel.set()
+
+    def report(self, stage: str):
+        """Progress callback passed to generate_world."""
+        if self._cancel.is_set():
+            raise GenerationCancelled()
+        self.stage = stage
+        if stage in C.GENERATION_STAGES:
+            self.stage_index = C.GENERATION_STAGES.index(stage)
+
+    def _run(self):
+        from game_system import generate_world
+        try:
+            generate_world(self._state, progress=self.report)
+            if not self._cancel.is_set():
+                self.result = self._state
+        except GenerationCancelled:
+            print("World generation cancelled")
+        except Exception as e:
+            print(f"World generation failed: {e}")
+            self.error = e
+        finally:
+            self.done = True
@@ -0,0 +1,121 @@
+"""
+Chunked cache for the zoom view.
+The zoom map is split into square chunks of tiles, each with its own map
+surface and fog layer. Chunks are rendered when they first scroll into view
+and kept in LRU order; once the surfaces go over the memory budget the least
+recently drawn chunks are dropped (they are rendered again if needed).
+"""
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import config as C
+
+# Chunk key: (column, row) of the chunk
+ChunkKey = Tuple[int, int]
+
+
+def surface_bytes(surface) -> int:
+    """Pixel memory of one pygame surface."""
+    return surface.get_pitch() * surface.get_height()
+
+
+class ZoomChunk:
+    """
+    One chunk of the zoom view.
+
+    Attributes:
+        x, y: Top-left tile of the chunk
+        w, h: Size in tiles (smaller at the right / bottom edge of the map)
+        map: Map surface (biomes, borders, overlays) of the chunk
+        fog: SRCALPHA fog layer of the chunk, None until built
+    """
+
+    def __init__(self, x: int, y: int, w: int, h: int, map_surface):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.map = map_surface
+        self.fog = None
+
+    def nbytes(self) -> int:
+        """Pixel memory held by the chunk's surfaces."""
+        total = surface_bytes(self.map)
+        if self.fog is not None:
+            total += surface_bytes(self.fog)
+        return total
+
+
+class ZoomChunkCache:
+    """
+    LRU cache of zoom chunks with a memory budget.
+
+    Args:
+        chunk_tiles: Chunk size in tiles
+        budget_bytes: Surface memory to keep before evicting old chunks
+    """
+
+    def __init__(self, chunk_tiles: int = C.ZOOM_CHUNK_TILES,
+                 budget_bytes: int = C.ZOOM_CHUNK_CACHE_MB * 1024 * 1024):
+        self.chunk_tiles = chunk_tiles
+        self.budget_bytes = budget_bytes
+        self._chunks: "OrderedDict[ChunkKey, ZoomChunk]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def nbytes(self) -> int:
+        """Surface memory held by all cached chunks."""
+        return sum(chunk.nbytes() for chunk in self._chunks.values())
+
+    def keys_in(self, x0: int, y0: int, x1: int, y1: int) -> List[ChunkKey]:
+        """Keys of the chunks covering tiles [x0, x1) x [y0, y1), row by row."""
+        n = self.chunk_tiles
+        return [(cx, cy)
+                for cy in range(y0 // n, (y1 - 1) // n + 1)
+                for cx in range(x0 // n, (x1 - 1) // n + 1)]
+
+    def bounds(self, key: ChunkKey) -> Tuple[int, int, int, int]:
+        """Tile rectangle (x0, y0, x1, y1) of a chunk, end exclusive, clipped to the map."""
+        n = self.chunk_tiles
+        x0 = key[0] * n
+        y0 = key[1] * n
+        return x0, y0, min(C.BASE_GRID_WIDTH, x0 + n), min(C.BASE_GRID_HEIGHT, y0 + n)
+
+    def get(self, key: ChunkKey) -> Optional[ZoomChunk]:
+        """Cached chunk (marked as most recently used), or None."""
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+        return chunk
+
+    def put(self, key: ChunkKey, chunk: ZoomChunk):
+        """Store a chunk as the most recently used one."""
+        self._chunks[key] = chunk
+        self._chunks.move_to_end(key)
+
+    def trim(self, keep: Iterable[ChunkKey] = ()):
+        """
+        Evict least recently used chunks until the cache fits its budget.
+        Chunks in `keep` (the ones on screen) are never evicted.
+        """
+        keep = set(keep)
+        total = self.nbytes()
+        for key in list(self._chunks):
+            if total <= self.budget_bytes:
+                break
+            if key in keep:
+                continue
+            total -= self._chunks.pop(key).nbytes()
+
+    def overlapping(self, x0: int, y0: int, x1: int, y1: int) -> Iterator[ZoomChunk]:
+        """Cached chunks that overlap tiles [x0, x1) x [y0, y1) (LRU order unchanged)."""
+        for key in self.keys_in(x0, y0, x1, y1):
+            chunk = self._chunks.get(key)
+            if chunk is not None:
+                yield chunk
+
+    def drop_fog(self):
+        """Forget every fog layer; they are rebuilt from the fog state when drawn."""
+        for chunk in self._chunks.values():
+            chunk.fog = None